@@ -1,59 +1,186 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.crud.article import article_crud
-from app.schemas.article import ArticleCreate, ArticleInDB, ArticleUpdate
-from app.database.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.http_cache import conditional_json
+from app.crud.article import InvalidCursor
+from app.crud.article_async import async_article_crud
+from app.schemas.article import (
+    ArticleBulkCreate,
+    ArticleCreate,
+    ArticleDistinctiveTerms,
+    ArticleInDB,
+    ArticleSearchResult,
+    ArticleUpdate,
+    SimilarArticle,
+    UserArticleStatsResponse,
+)
+from app.database.session import get_async_db
 from typing import List, Optional
 
 router = APIRouter()
 
+
+def _similarity_index():
+    # Imported on first use: the index needs numpy, which importing the app should not pay for.
+    from app.services.similarity import similarity_index
+
+    return similarity_index
+
+
 @router.post("/", response_model=ArticleInDB, status_code=status.HTTP_201_CREATED)
-async def create_article(article: ArticleCreate, db: Session = Depends(get_db)):
+async def create_article(article: ArticleCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Saves a Wikipedia article to the database.
     """
-    db_article = article_crud.create_article(db, article)
+    db_article = await async_article_crud.create_article(db, article)
+    await run_in_threadpool(_similarity_index().add_articles, [db_article])
     return db_article
 
+@router.post("/bulk", response_model=List[ArticleInDB], status_code=status.HTTP_201_CREATED)
+async def bulk_save_articles(payload: ArticleBulkCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Saves many articles in one transaction, updating the ones the user already saved.
+    """
+    saved = await async_article_crud.bulk_upsert_articles(db, payload.articles)
+    await run_in_threadpool(_similarity_index().add_articles, saved)
+    return saved
+
+@router.get("/search", response_model=List[ArticleSearchResult])
+async def search_saved_articles(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en título, resumen y notas"),
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    user_id: Optional[int] = Query(None),
+):
+    """
+    Full-text search over saved articles, best match first, with highlighted snippets.
+    """
+    try:
+        rows, next_cursor = await async_article_crud.search_articles(
+            db, q, limit=limit, cursor=cursor, user_id=user_id,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginación inválido.")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        ArticleSearchResult(**ArticleInDB.model_validate(article).model_dump(), rank=rank, snippet=snippet or "")
+        for article, rank, snippet in rows
+    ]
+
+@router.get("/stats", response_model=UserArticleStatsResponse)
+async def get_saved_articles_stats(
+    user_id: int = Query(...),
+    db: AsyncSession = Depends(get_async_db),
+    top: int = Query(20, ge=1, le=100, description="Cuántos términos más frecuentes devolver"),
+    recent: int = Query(20, ge=0, le=100, description="Artículos más recientes con sus términos distintivos"),
+):
+    """
+    Aggregate stats of a user's saved articles: top terms, sentiment distribution,
+    word-count percentiles and the TF-IDF distinctive terms of the ``recent``
+    newest articles (those of any other article come from /{article_id}/distinctive-terms).
+
+    Served from aggregates kept up to date on every save and delete, so the cost
+    does not grow with the number of saved articles.
+    """
+    return await async_article_crud.get_user_stats(db, user_id, top=top, recent=recent)
+
 @router.get("/{article_id}", response_model=ArticleInDB)
-async def get_article(article_id: int, db: Session = Depends(get_db)):
+async def get_article(article_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    Retrieves a saved article by its ID.
+    Retrieves a saved article by its ID, or 304 if If-None-Match matches its ETag.
     """
-    db_article = article_crud.get_article(db, article_id)
+    db_article = await async_article_crud.get_article(db, article_id)
     if not db_article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artículo no encontrado.")
-    return db_article
+    return conditional_json(request, ArticleInDB.model_validate(db_article).model_dump(mode="json"))
+
+@router.get("/{article_id}/similar", response_model=List[SimilarArticle])
+async def get_similar_articles(
+    article_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    k: int = Query(10, ge=1, le=100, description="Número de artículos similares"),
+):
+    """
+    The saved articles of the same user most similar to this one, by TF-IDF
+    cosine similarity of their words (title, summary and frequent words).
+    """
+    db_article = await async_article_crud.get_article(db, article_id)
+    if not db_article:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artículo no encontrado.")
+    index = _similarity_index()
+    if article_id not in index:
+        await run_in_threadpool(index.add_articles, [db_article])
+    ranked = await run_in_threadpool(index.similar, article_id, k, db_article.user_id)
+    articles = await async_article_crud.get_articles_by_ids(db, [similar_id for similar_id, _ in ranked])
+    scores = dict(ranked)
+    return [
+        SimilarArticle(**ArticleInDB.model_validate(article).model_dump(), similarity=scores[article.id])
+        for article in articles
+    ]
+
+@router.get("/{article_id}/distinctive-terms", response_model=ArticleDistinctiveTerms)
+async def get_article_distinctive_terms(
+    article_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(5, ge=1, le=100, description="Cuántos términos distintivos devolver"),
+):
+    """
+    The TF-IDF distinctive terms of a saved article against the rest of its
+    user's library, for articles older than the ones the stats list.
+    """
+    db_article = await async_article_crud.get_article(db, article_id)
+    if not db_article:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artículo no encontrado.")
+    return await async_article_crud.get_distinctive_terms(db, db_article, limit=limit)
 
 @router.get("/", response_model=List[ArticleInDB])
 async def get_saved_articles(
-    db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    user_id: Optional[int] = Query(None),
+    title_prefix: Optional[str] = Query(None, min_length=1, max_length=200),
+    sentiment_label: Optional[str] = Query(None),
+    word: Optional[str] = Query(None, min_length=1, max_length=100, description="Solo artículos con esta palabra frecuente"),
 ):
     """
-    Retrieves a list of saved articles with pagination.
+    Retrieves saved articles, newest first, with cursor pagination.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
     """
-    articles = article_crud.get_articles(db, skip=skip, limit=limit)
+    try:
+        articles, next_cursor = await async_article_crud.get_articles_page(
+            db, limit=limit, cursor=cursor, user_id=user_id,
+            title_prefix=title_prefix, sentiment_label=sentiment_label, word=word,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginación inválido.")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return articles
 
 @router.patch("/{article_id}", response_model=ArticleInDB)
-async def update_article_notes(article_id: int, article_update: ArticleUpdate, db: Session = Depends(get_db)):
+async def update_article_notes(article_id: int, article_update: ArticleUpdate, db: AsyncSession = Depends(get_async_db)):
     """
     Updates personal notes for a saved article.
     """
-    db_article = article_crud.update_article(db, article_id, article_update)
+    db_article = await async_article_crud.update_article(db, article_id, article_update)
     if not db_article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artículo no encontrado.")
     return db_article
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_article(article_id: int, db: Session = Depends(get_db)):
+async def delete_article(article_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Deletes a saved article from the database.
     """
-    db_article = article_crud.delete_article(db, article_id)
+    db_article = await async_article_crud.delete_article(db, article_id)
     if not db_article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artículo no encontrado.")
+    await run_in_threadpool(_similarity_index().remove, article_id)
     return
\ No newline at end of file
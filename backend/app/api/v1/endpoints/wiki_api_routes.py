@@ -1,12 +1,53 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
-from app.schemas.wikipedia import WikipediaSearchArticle, WikipediaArticleDetail
-from app.services.wikipedia_api import WikipediaService
+import inspect
+from typing import Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.http_cache import conditional_json, encoded_bodies, fields_key, make_etag, parse_fields
+from app.core.metrics import stage_timer
+from app.schemas.wikipedia import (
+    BatchAnalysisRequest,
+    BatchAnalysisResult,
+    SentimentBackendName,
+    WikipediaArticleDetail,
+    WikipediaSearchArticle,
+)
+from app.services.analysis import ANALYSIS_VERSION
+from app.services.batch import BatchArticleAnalyzer
+from app.services.cache import article_cache
+from app.services.mediawiki import default_lang
+from app.services.upstream import get_upstream_governor
+from app.services.warmup import warmup_workers
+from app.services.wikipedia_registry import wikipedia_services
 
 router = APIRouter()
 
-def get_wikipedia_service():
-    return WikipediaService()
+def get_wikipedia_service(lang: Optional[str] = None):
+    """The shared service of a wiki language (the default one when None)."""
+    return wikipedia_services.get(lang)
+
+def wiki_language(
+    lang: Optional[str] = Query(
+        None, description="Idioma de Wikipedia, p. ej. es o en (por defecto, el primero de WIKIPEDIA_LANGUAGES)",
+    ),
+) -> str:
+    """Validates the ``lang`` query parameter against WIKIPEDIA_LANGUAGES."""
+    if lang is None:
+        return default_lang()
+    lang = lang.strip().lower()
+    if lang not in settings.WIKIPEDIA_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idioma no admitido: '{lang}'. Idiomas disponibles: {', '.join(settings.WIKIPEDIA_LANGUAGES)}.",
+        )
+    return lang
+
+async def _call_service(method, *args, **kwargs):
+    """Awaits the async backend and keeps the blocking one off the event loop."""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
 
 @router.get(
     "/search", 
@@ -17,13 +58,14 @@ def get_wikipedia_service():
 async def search_wikipedia_articles(
     query: str = Query(..., min_length=1, max_length=100, description="Consulta de búsqueda de Wikipedia"),
 
-    limit: int = Query(10, ge=1, le=50, description="Número máximo de resultados de búsqueda a devolver (1-50)")
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de resultados de búsqueda a devolver (1-50)"),
+    lang: str = Depends(wiki_language),
 ) -> List[WikipediaSearchArticle]:
     """
     Handles the search for Wikipedia articles.
     """
-    service = get_wikipedia_service()
-    articles = service.search_articles(query, limit=limit)
+    service = get_wikipedia_service(lang)
+    articles = await _call_service(service.search_articles, query, limit=limit)
     return articles
 
 @router.get(
@@ -33,13 +75,104 @@ async def search_wikipedia_articles(
     description="Obtiene el contenido detallado de un artículo específico de Wikipedia por título."
 )
 async def get_wikipedia_article_details(
-    title: str
+    title: str,
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a devolver separados por comas, p. ej. title,word_count,frequent_words (por defecto, todos)",
+    ),
+    sentiment: Optional[SentimentBackendName] = Query(
+        None,
+        description="Analizador de sentimiento: textblob o lexicon_es (por defecto, el configurado en SENTIMENT_BACKEND)",
+    ),
+    lang: str = Depends(wiki_language),
 ) -> Optional[WikipediaArticleDetail]:
     """
     Handles fetching detailed Wikipedia article content.
+
+    Answers 304 when If-None-Match holds the ETag of the same revision,
+    analysis version, sentiment backend and field selection. Bodies are
+    kept encoded under that ETag, so repeated requests skip serialization.
     """
-    service = get_wikipedia_service()
-    article = service.get_article_details(title)
+    include = parse_fields(fields, WikipediaArticleDetail)
+    sentiment = sentiment or settings.SENTIMENT_BACKEND
+    service = get_wikipedia_service(lang)
+    article = await _call_service(service.get_article_details, title, sentiment=sentiment, fields=include)
     if not article:
         raise HTTPException(status_code=404, detail=f"Artículo '{title}' no encontrado.")
-    return article
\ No newline at end of file
+    etag = None
+    if article.revision_id is not None:
+        etag = make_etag(
+            "wikipedia", service.lang, article.title, article.revision_id,
+            ANALYSIS_VERSION, settings.ANALYSIS_TOP_WORDS, sentiment, fields_key(include),
+        )
+    with stage_timer("serialize"):
+        # Every field is a plain JSON type, so the python-mode dump encodes to the same bytes, faster.
+        return conditional_json(request, lambda: article.model_dump(include=include), etag, cache=encoded_bodies)
+
+@router.post(
+    "/articles:batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {"schema": BatchAnalysisResult.model_json_schema()}}}},
+    summary="Análisis de artículos por lotes",
+    description=(
+        "Analiza hasta 1000 títulos en una sola solicitud. Devuelve NDJSON con una línea por título "
+        "a medida que cada análisis termina; los errores (desambiguación, página inexistente) se "
+        "informan en la línea del título sin interrumpir el lote."
+    )
+)
+async def analyze_wikipedia_articles_batch(
+    batch: BatchAnalysisRequest, lang: str = Depends(wiki_language),
+) -> StreamingResponse:
+    """
+    Streams the analysis of many Wikipedia articles as newline-delimited JSON.
+    """
+    async def ndjson():
+        async for result in BatchArticleAnalyzer(lang=lang).analyze(batch.titles, batch.sentiment):
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get(
+    "/cache/stats",
+    summary="Estadísticas de la caché de artículos",
+    description="Devuelve los contadores de aciertos, fallos, revalidaciones y desalojos de la caché de artículos analizados."
+)
+async def get_article_cache_stats() -> Dict[str, int]:
+    """
+    Returns the article cache counters.
+    """
+    return article_cache.stats()
+
+@router.get(
+    "/coalescing/stats",
+    summary="Estadísticas de deduplicación de solicitudes",
+    description="Devuelve cuántas búsquedas y consultas de artículos se ejecutaron contra Wikipedia y cuántas se resolvieron compartiendo una solicitud ya en curso."
+)
+async def get_coalescing_stats(lang: str = Depends(wiki_language)) -> Dict[str, int]:
+    """
+    Returns the request coalescing counters of the Wikipedia service of a language.
+    """
+    return get_wikipedia_service(lang).flights.stats()
+
+@router.get(
+    "/warmup/stats",
+    summary="Estadísticas del precalentamiento de la caché",
+    description="Devuelve cuántos títulos reanalizó el proceso de precalentamiento, cuántos omitió por no haber cambiado su revisión y cuántos fallaron."
+)
+async def get_warmup_stats(lang: str = Depends(wiki_language)) -> Dict[str, float]:
+    """
+    Returns the counters of the in-process cache warm-up worker of a language.
+    """
+    return warmup_workers.get(lang).stats()
+
+@router.get(
+    "/upstream/stats",
+    summary="Estado de las llamadas a Wikipedia",
+    description="Devuelve el estado del cortocircuito (closed, open o half_open), el límite de concurrencia adaptativo, las solicitudes en curso y en espera, y cuántas llamadas a Wikipedia se reintentaron, fueron limitadas o rechazadas."
+)
+async def get_upstream_stats(lang: str = Depends(wiki_language)) -> Dict[str, Union[str, int, float]]:
+    """
+    Returns the state of the upstream governor of a language.
+    """
+    return get_upstream_governor(lang).stats()
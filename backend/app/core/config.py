@@ -1,4 +1,4 @@
-from decouple import config
+from decouple import Csv, config
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings:
@@ -7,7 +7,91 @@ class Settings:
     API_V1_STR: str = "/api/v1"
 
     DATABASE_URL: str = config("DATABASE_URL", cast=str)
-    WIKIPEDIA_API_BASE_URL: str = config("WIKIPEDIA_API_BASE_URL", cast=str)
+    DB_POOL_SIZE: int = config("DB_POOL_SIZE", default=5, cast=int)
+    DB_MAX_OVERFLOW: int = config("DB_MAX_OVERFLOW", default=10, cast=int)
+    DB_POOL_TIMEOUT: float = config("DB_POOL_TIMEOUT", default=30.0, cast=float)
+    DB_POOL_PRE_PING: bool = config("DB_POOL_PRE_PING", default=True, cast=bool)
+    # Postgres statement_timeout for every connection, in milliseconds; 0 disables it.
+    DB_STATEMENT_TIMEOUT_MS: int = config("DB_STATEMENT_TIMEOUT_MS", default=0, cast=int)
+    WIKIPEDIA_API_URL_TEMPLATE: str = config("WIKIPEDIA_API_URL_TEMPLATE", default="https://{lang}.wikipedia.org/w/api.php", cast=str)
+    WIKIPEDIA_TIMEOUT: float = config("WIKIPEDIA_TIMEOUT", default=10.0, cast=float)
+    WIKIPEDIA_CONNECT_TIMEOUT: float = config("WIKIPEDIA_CONNECT_TIMEOUT", default=3.0, cast=float)
+    # Seconds a whole search may take, and titles per request and parallel requests when resolving its results.
+    WIKIPEDIA_SEARCH_DEADLINE: float = config("WIKIPEDIA_SEARCH_DEADLINE", default=5.0, cast=float)
+    WIKIPEDIA_RESOLVE_BATCH_SIZE: int = config("WIKIPEDIA_RESOLVE_BATCH_SIZE", default=50, cast=int)
+    WIKIPEDIA_RESOLVE_WORKERS: int = config("WIKIPEDIA_RESOLVE_WORKERS", default=4, cast=int)
+    # Wiki languages the API serves (the ``lang`` parameter), comma separated; the first one is the default.
+    WIKIPEDIA_LANGUAGES: list = config("WIKIPEDIA_LANGUAGES", default="es", cast=Csv())
+
+    # "sync" runs the blocking client in a worker thread, "async" uses the shared httpx pool.
+    WIKIPEDIA_BACKEND: str = config("WIKIPEDIA_BACKEND", default="sync", cast=str)
+    WIKIPEDIA_MAX_CONNECTIONS: int = config("WIKIPEDIA_MAX_CONNECTIONS", default=20, cast=int)
+    WIKIPEDIA_MAX_KEEPALIVE_CONNECTIONS: int = config("WIKIPEDIA_MAX_KEEPALIVE_CONNECTIONS", default=10, cast=int)
+    WIKIPEDIA_KEEPALIVE_EXPIRY: float = config("WIKIPEDIA_KEEPALIVE_EXPIRY", default=30.0, cast=float)
+
+    # Upstream governance, per wiki language. Requests per second and burst; a rate of 0 disables the limit.
+    WIKIPEDIA_RATE: float = config("WIKIPEDIA_RATE", default=100.0, cast=float)
+    WIKIPEDIA_BURST: float = config("WIKIPEDIA_BURST", default=100.0, cast=float)
+    # Adaptive concurrency limit: starts here, never below the minimum nor above WIKIPEDIA_MAX_CONNECTIONS.
+    WIKIPEDIA_CONCURRENCY_INITIAL: int = config("WIKIPEDIA_CONCURRENCY_INITIAL", default=10, cast=int)
+    WIKIPEDIA_CONCURRENCY_MIN: int = config("WIKIPEDIA_CONCURRENCY_MIN", default=1, cast=int)
+    # Seconds a request may wait for a free upstream slot before failing with 503.
+    WIKIPEDIA_QUEUE_TIMEOUT: float = config("WIKIPEDIA_QUEUE_TIMEOUT", default=1.0, cast=float)
+    # Retries of throttled, overloaded or timed out requests, backing off from this many seconds.
+    WIKIPEDIA_RETRIES: int = config("WIKIPEDIA_RETRIES", default=2, cast=int)
+    WIKIPEDIA_RETRY_BACKOFF: float = config("WIKIPEDIA_RETRY_BACKOFF", default=0.2, cast=float)
+    # A Retry-After longer than this fails the request at once instead of waiting.
+    WIKIPEDIA_RETRY_MAX_WAIT: float = config("WIKIPEDIA_RETRY_MAX_WAIT", default=5.0, cast=float)
+    # Failed requests in a row that open the circuit breaker, and seconds it stays open.
+    WIKIPEDIA_BREAKER_THRESHOLD: int = config("WIKIPEDIA_BREAKER_THRESHOLD", default=5, cast=int)
+    WIKIPEDIA_BREAKER_COOLDOWN: float = config("WIKIPEDIA_BREAKER_COOLDOWN", default=30.0, cast=float)
+
+    ARTICLE_CACHE_SIZE: int = config("ARTICLE_CACHE_SIZE", default=4096, cast=int)
+    ARTICLE_CACHE_TTL: float = config("ARTICLE_CACHE_TTL", default=300.0, cast=float)
+    # SQLite file for the persistent cache tier; empty keeps the cache in memory only.
+    ARTICLE_CACHE_PATH: str = config("ARTICLE_CACHE_PATH", default="", cast=str)
+
+    # Worker processes for text analysis; 0 analyses in the request's own thread.
+    ANALYSIS_WORKERS: int = config("ANALYSIS_WORKERS", default=0, cast=int)
+    # Analyses queued or running before new ones are rejected with 503 (0 means 4 per worker).
+    ANALYSIS_MAX_PENDING: int = config("ANALYSIS_MAX_PENDING", default=0, cast=int)
+    ANALYSIS_TOP_WORDS: int = config("ANALYSIS_TOP_WORDS", default=10, cast=int)
+    ANALYSIS_CHUNK_SIZE: int = config("ANALYSIS_CHUNK_SIZE", default=64 * 1024, cast=int)
+    # Default sentiment scorer: "textblob" (English lexicon) or "lexicon_es" (Spanish lexicon, faster).
+    SENTIMENT_BACKEND: str = config("SENTIMENT_BACKEND", default="textblob", cast=str)
+
+    # Multi-title content requests and analyses a single batch job may have in flight.
+    BATCH_FETCH_CONCURRENCY: int = config("BATCH_FETCH_CONCURRENCY", default=2, cast=int)
+    BATCH_ANALYSIS_CONCURRENCY: int = config("BATCH_ANALYSIS_CONCURRENCY", default=4, cast=int)
+
+    # Background re-analysis of saved and hot titles into the article cache.
+    WARMUP_ENABLED: bool = config("WARMUP_ENABLED", default=False, cast=bool)
+    WARMUP_INTERVAL: float = config("WARMUP_INTERVAL", default=900.0, cast=float)
+    # Comma separated titles warmed on every cycle besides the saved ones.
+    WARMUP_HOT_TITLES: str = config("WARMUP_HOT_TITLES", default="", cast=str)
+    WARMUP_MAX_TITLES: int = config("WARMUP_MAX_TITLES", default=500, cast=int)
+    # Requests per second the worker may send to Wikipedia.
+    WARMUP_RATE: float = config("WARMUP_RATE", default=2.0, cast=float)
+    WARMUP_CONCURRENCY: int = config("WARMUP_CONCURRENCY", default=2, cast=int)
+    # Lock file that keeps the warm-up to a single process; empty uses one in the temp directory.
+    WARMUP_LOCK_PATH: str = config("WARMUP_LOCK_PATH", default="", cast=str)
+
+    # Responses smaller than this many bytes are sent uncompressed.
+    COMPRESSION_MINIMUM_SIZE: int = config("COMPRESSION_MINIMUM_SIZE", default=500, cast=int)
+    COMPRESSION_GZIP_LEVEL: int = config("COMPRESSION_GZIP_LEVEL", default=6, cast=int)
+    COMPRESSION_BROTLI_QUALITY: int = config("COMPRESSION_BROTLI_QUALITY", default=5, cast=int)
+    # Bytes of encoded article responses kept by ETag, so unchanged analyses are not re-encoded; 0 disables it.
+    ENCODED_BODY_CACHE_BYTES: int = config("ENCODED_BODY_CACHE_BYTES", default=64 * 1024 * 1024, cast=int)
+
+    # Directory holding the memory-mapped similar-articles index; empty keeps it in memory and rebuilds it at startup.
+    SIMILARITY_INDEX_PATH: str = config("SIMILARITY_INDEX_PATH", default="", cast=str)
+    # Length of the hashed term vectors; each saved article takes 4 bytes per dimension.
+    SIMILARITY_DIMENSIONS: int = config("SIMILARITY_DIMENSIONS", default=1024, cast=int)
+    # Seconds between checks for articles saved or deleted by other workers; 0 disables them.
+    SIMILARITY_REFRESH_INTERVAL: float = config("SIMILARITY_REFRESH_INTERVAL", default=30.0, cast=float)
+
+    # Adds a Server-Timing header with per-stage durations to every response.
+    SERVER_TIMING_ENABLED: bool = config("SERVER_TIMING_ENABLED", default=False, cast=bool)
 
     model_config = SettingsConfigDict(env_file=".env")
 
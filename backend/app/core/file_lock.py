@@ -0,0 +1,24 @@
+"""
+Exclusive, non-blocking file locks, for work that only one process of a
+multi-worker deployment may do. A lock is held until its file is closed or
+the process exits.
+"""
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so every process gets the lock.
+    fcntl = None
+
+
+def try_lock(path: str) -> Optional[IO]:
+    """Opens and locks ``path``; None when another process already holds it."""
+    lock_file = open(path, "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Type, Union
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+
+from app.core.compression import ENCODING_ETAG_SUFFIXES
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional: without it bodies are encoded with the json module
+    orjson = None
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that fully determine a representation."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The If-None-Match entry that refers to ``etag``, or None.
+
+    The compression middleware's per-encoding suffixes count as the same
+    entity, and the entry is returned as sent so a 304 echoes the validator
+    the client actually holds.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for sent in if_none_match.split(","):
+        sent = sent.strip()
+        candidate = sent[2:] if sent.startswith("W/") else sent
+        for suffix in ENCODING_ETAG_SUFFIXES:
+            if candidate.endswith(f'{suffix}"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return sent
+    return None
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Set[str]]:
+    """The ``fields=`` query parameter as a set of field names of ``model`` (None means all)."""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos: {', '.join(sorted(unknown))}.",
+        )
+    return requested
+
+
+def dumps_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, the same bytes from the json module otherwise."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedBodyCache:
+    """
+    LRU of encoded JSON bodies keyed by their strong ETag, bounded by their
+    total size. An ETag names one exact representation, so a body stored
+    under it never goes stale.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(etag)
+            self.hits += 1
+            return body
+
+    def put(self, etag: str, body: bytes) -> None:
+        # Bodies over a quarter of the budget would evict too much to be worth keeping.
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            previous = self._bodies.pop(etag, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._bodies[etag] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._bodies),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+encoded_bodies = EncodedBodyCache(settings.ENCODED_BODY_CACHE_BYTES)
+
+
+def conditional_json(request: Request, content: Union[Any, Callable[[], Any]], etag: Optional[str] = None,
+                     cache: Optional[EncodedBodyCache] = None) -> Response:
+    """
+    JSON response carrying a strong ETag, or 304 Not Modified when the client
+    already holds it. Without an explicit ``etag`` one is taken from the body.
+
+    ``content`` may be a callable building it, so a 304 or a body found in
+    ``cache`` (looked up by ``etag``) skips building and encoding it.
+    """
+    if etag is not None:
+        matched = matching_etag(request.headers.get("if-none-match"), etag)
+        if matched:
+            return _not_modified(matched)
+    body = cache.get(etag) if cache is not None and etag is not None else None
+    if body is None:
+        body = dumps_json(content() if callable(content) else content)
+        if cache is not None and etag is not None:
+            cache.put(etag, body)
+    if etag is None:
+        etag = make_etag(hashlib.sha256(body).hexdigest())
+        matched = matching_etag(request.headers.get("if-none-match"), etag)
+        if matched:
+            return _not_modified(matched)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def fields_key(fields: Optional[Iterable[str]]) -> str:
+    return ",".join(sorted(fields)) if fields else "*"
@@ -0,0 +1,224 @@
+"""
+Prometheus metrics for the API, served as text on ``GET /metrics``.
+
+Besides a latency histogram per route, the hot path is timed by stage
+(fetch, tokenize, count, sentiment, serialize), upstream calls to
+Wikipedia are counted with their errors, and the database pools report how
+long a request waited for a connection. With ``SERVER_TIMING_ENABLED`` the
+stage timings of each request are also sent back in a ``Server-Timing``
+header, so they show up in the browser's network panel.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Mapping, Optional, Tuple, Type
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to answer an HTTP request, by route template.",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = Histogram(
+    "article_stage_duration_seconds",
+    "Time spent in each stage of fetching and analysing an article.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter(
+    "wikipedia_upstream_requests",
+    "Requests sent to Wikipedia.",
+    ["client"],
+)
+UPSTREAM_ERRORS = Counter(
+    "wikipedia_upstream_errors",
+    "Requests to Wikipedia that failed, by reason.",
+    ["client", "reason"],
+)
+UPSTREAM_SECONDS = Histogram(
+    "wikipedia_upstream_request_duration_seconds",
+    "Latency of requests sent to Wikipedia.",
+    ["client"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the database pool.",
+    ["engine"],
+    buckets=STAGE_BUCKETS,
+)
+
+# Stage durations (ms) of the current request, only set while Server-Timing is collected.
+_server_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timings", default=None)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _server_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+
+def observe_stages(timings: Mapping[str, float]) -> None:
+    """Records stage durations measured elsewhere, e.g. in an analysis worker process."""
+    for stage, seconds in timings.items():
+        observe_stage(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def upstream_error_reason(exc: BaseException) -> str:
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    return f"http_{status_code}" if status_code else type(exc).__name__
+
+
+@contextmanager
+def upstream_call(client: str, expected: Tuple[Type[BaseException], ...] = ()) -> Iterator[None]:
+    """
+    Counts and times one request to Wikipedia. Exceptions in ``expected`` are
+    answers rather than failures (a missing page) and are not counted as errors.
+    """
+    UPSTREAM_REQUESTS.labels(client).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except expected:
+        raise
+    except Exception as exc:
+        UPSTREAM_ERRORS.labels(client, upstream_error_reason(exc)).inc()
+        raise
+    finally:
+        UPSTREAM_SECONDS.labels(client).observe(time.perf_counter() - started)
+
+
+class CacheStatsCollector:
+    """
+    Exposes a cache's ``stats()`` as hit and miss counters plus a hit ratio
+    gauge, read at scrape time so the cache itself needs no Prometheus code.
+    """
+
+    def __init__(self, name: str, stats: Callable[[], Mapping[str, int]]):
+        self.name = name
+        self.stats = stats
+
+    def collect(self):
+        stats = self.stats()
+        hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+        for key, value in stats.items():
+            if key in ("size", "maxsize", "bytes", "max_bytes"):
+                yield GaugeMetricFamily(f"{self.name}_{key}", f"{self.name} {key}.", value=value)
+            else:
+                yield CounterMetricFamily(f"{self.name}_{key}", f"{self.name} {key}.", value=value)
+        yield GaugeMetricFamily(
+            f"{self.name}_hit_ratio",
+            f"Share of {self.name} lookups answered from the cache.",
+            value=hits / (hits + misses) if hits + misses else 0.0,
+        )
+
+
+class PoolStatsCollector:
+    """Connections checked out of, and idle in, each SQLAlchemy queue pool at scrape time."""
+
+    def __init__(self, pools: Callable[[], Mapping[str, object]]):
+        self.pools = pools
+
+    def collect(self):
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections in use.", labels=["engine"])
+        idle = GaugeMetricFamily("db_pool_idle", "Open connections waiting in the pool.", labels=["engine"])
+        for label, pool in self.pools().items():
+            if hasattr(pool, "checkedout"):
+                checked_out.add_metric([label], pool.checkedout())
+                idle.add_metric([label], pool.checkedin())
+        yield checked_out
+        yield idle
+
+
+class UpstreamStatsCollector:
+    """State of each wiki language's upstream governor (app.services.upstream) at scrape time."""
+
+    GAUGES = ("concurrency_limit", "in_flight", "queued", "tokens", "consecutive_failures")
+    COUNTERS = ("calls", "retries", "throttled", "failures", "rejected", "breaker_opened")
+
+    def __init__(self, stats: Callable[[], Mapping[str, Mapping[str, object]]]):
+        self.stats = stats
+
+    def collect(self):
+        stats = self.stats()
+        families = [
+            GaugeMetricFamily(f"wikipedia_upstream_{key}", f"Upstream governor {key}.", labels=["lang"])
+            for key in self.GAUGES
+        ] + [
+            CounterMetricFamily(f"wikipedia_upstream_{key}", f"Upstream governor {key}.", labels=["lang"])
+            for key in self.COUNTERS
+        ]
+        open_state = GaugeMetricFamily(
+            "wikipedia_upstream_circuit_open", "1 while the circuit breaker rejects calls.", labels=["lang"]
+        )
+        for lang, governor in stats.items():
+            for family, key in zip(families, self.GAUGES + self.COUNTERS):
+                family.add_metric([lang], governor[key])
+            open_state.add_metric([lang], 0 if governor["state"] == "closed" else 1)
+        yield from families
+        yield open_state
+
+
+def route_label(scope: Scope) -> str:
+    """The matched route's path template, so /articles/1 and /articles/2 share a series."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def format_server_timing(timings: Mapping[str, float]) -> str:
+    return ", ".join(f"{stage};dur={duration:.1f}" for stage, duration in timings.items())
+
+
+class MetricsMiddleware:
+    """
+    Observes every HTTP request in ``http_request_duration_seconds`` and, when
+    ``server_timing`` is on, adds a Server-Timing header with the request's
+    stage durations and its total time until the response started.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        timings: Optional[Dict[str, float]] = {} if self.server_timing else None
+        token = _server_timings.set(timings)
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings is not None:
+                    timings["total"] = (time.perf_counter() - started) * 1000
+                    MutableHeaders(scope=message).append("Server-Timing", format_server_timing(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _server_timings.reset(token)
+            REQUEST_SECONDS.labels(scope["method"], route_label(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
@@ -1,50 +1,286 @@
+from sqlalchemy import column, exists, func, literal, literal_column, select, table, tuple_
 from sqlalchemy.orm import Session
-from app.database.models import Article
+from app.crud.article_stats import (
+    COUNTED_COLUMNS,
+    StatsDelta,
+    article_count_statement,
+    article_distinctive_terms,
+    build_user_stats,
+    dialect_insert,
+    document_frequency_statement,
+    existing_articles_statements,
+    lock_users_statements,
+    recent_terms,
+    stats_statements,
+    user_stats_statements,
+)
+from app.database.models import Article, UserArticleStats, UserStatBucket, UserTermStats, normalize_frequent_words
 from app.schemas.article import ArticleCreate, ArticleUpdate
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+import base64
+import binascii
 import json
 
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor was not produced by encode_cursor."""
+
+
+def _pack_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def encode_cursor(article: Article) -> str:
+    """Opaque token pointing just past ``article`` in (saved_at, id) order."""
+    return _pack_cursor([article.saved_at.isoformat(), article.id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    saved_at, article_id = _unpack_cursor(cursor)
+    try:
+        return datetime.fromisoformat(saved_at), int(article_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    rank, article_id = _unpack_cursor(cursor)
+    try:
+        return float(rank), int(article_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+# Rows per INSERT statement; ten columns each keeps SQLite under its bound-parameter limit.
+BULK_CHUNK_SIZE = 500
+
+
+def bulk_upsert_statements(dialect: str, articles: List[ArticleCreate]) -> Tuple[List[Tuple[int, str]], list]:
+    """
+    Multi-row INSERT ... ON CONFLICT (user_id, wikipedia_title) DO UPDATE ... RETURNING
+    statements for ``articles``, plus the (user_id, title) keys in input order.
+
+    Analysis fields are replaced, existing notes are kept unless new ones are
+    given, and within the batch the last copy of a title wins.
+    """
+    rows = {}
+    saved_at = datetime.now(timezone.utc)
+    for article in articles:
+        rows[(article.user_id, article.wikipedia_title)] = {
+            "wikipedia_title": article.wikipedia_title,
+            "wikipedia_url": str(article.wikipedia_url),
+            "processed_summary": article.processed_summary,
+            "word_count": article.word_count,
+            "frequent_words": article.frequent_words,
+            "sentiment_polarity": article.sentiment_polarity,
+            "sentiment_subjectivity": article.sentiment_subjectivity,
+            "sentiment_label": article.sentiment_label,
+            "personal_notes": article.personal_notes,
+            "user_id": article.user_id,
+            "saved_at": saved_at,
+        }
+
+    insert = dialect_insert(dialect)
+    statements = []
+    values = list(rows.values())
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        stmt = insert(Article).values(values[start:start + BULK_CHUNK_SIZE])
+        statements.append(stmt.on_conflict_do_update(
+            index_elements=[Article.user_id, Article.wikipedia_title],
+            set_={
+                "wikipedia_url": stmt.excluded.wikipedia_url,
+                "processed_summary": stmt.excluded.processed_summary,
+                "word_count": stmt.excluded.word_count,
+                "frequent_words": stmt.excluded.frequent_words,
+                "sentiment_polarity": stmt.excluded.sentiment_polarity,
+                "sentiment_subjectivity": stmt.excluded.sentiment_subjectivity,
+                "sentiment_label": stmt.excluded.sentiment_label,
+                "personal_notes": func.coalesce(stmt.excluded.personal_notes, Article.personal_notes),
+                "saved_at": stmt.excluded.saved_at,
+            },
+        ).returning(Article))
+    return list(rows), statements
+
+
+def has_frequent_word(dialect: str, word: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSONB
+        # [[word]] is contained in [[word, count], ...]; served by the GIN index.
+        return Article.frequent_words.op("@>")(literal([[word]], JSONB))
+    top_word = func.json_each(Article.frequent_words).table_valued("value").alias("top_word")
+    return exists().where(func.json_extract(top_word.c.value, "$[0]") == word)
+
+
+def articles_page_statement(
+    dialect: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    title_prefix: Optional[str] = None,
+    sentiment_label: Optional[str] = None,
+    word: Optional[str] = None,
+):
+    """
+    SELECT for one page of saved articles, newest first.
+
+    Uses keyset pagination on (saved_at, id): the cursor holds the last row
+    seen and the page starts right after it, so every page costs the same
+    however deep it is and rows saved meanwhile never shift or repeat
+    entries. Fetches one extra row so split_page can tell whether another
+    page follows. ``word`` keeps only articles that have it among their
+    frequent words.
+    """
+    stmt = select(Article)
+    if user_id is not None:
+        stmt = stmt.where(Article.user_id == user_id)
+    if title_prefix:
+        stmt = stmt.where(Article.wikipedia_title.startswith(title_prefix, autoescape=True))
+    if sentiment_label:
+        stmt = stmt.where(Article.sentiment_label == sentiment_label)
+    if word:
+        stmt = stmt.where(has_frequent_word(dialect, word.lower()))
+    if cursor:
+        saved_at, article_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Article.saved_at, Article.id) < tuple_(saved_at, article_id))
+    return stmt.order_by(Article.saved_at.desc(), Article.id.desc()).limit(limit + 1)
+
+
+def split_page(articles: List[Article], limit: int) -> Tuple[List[Article], Optional[str]]:
+    """The page itself and the cursor for the next one (None on the last page)."""
+    next_cursor = encode_cursor(articles[limit - 1]) if len(articles) > limit else None
+    return articles[:limit], next_cursor
+
+
+def fts5_query(text: str) -> str:
+    """User text as an FTS5 query: every word quoted (no operators), all of them required."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def search_statement(
+    dialect: str,
+    text: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+):
+    """
+    SELECT (Article, rank, snippet) for articles matching ``text``, best match first.
+
+    Postgres ranks the generated tsvector with ts_rank_cd and highlights with
+    ts_headline; SQLite uses the FTS5 table, bm25 (negated so higher is
+    better) and snippet(). Pages are keyset on (rank, id), and like
+    articles_page_statement one extra row is fetched for split_search_page.
+    """
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery("spanish", text)
+        search_vector = literal_column("articles.search_vector")
+        matches = select(Article.id.label("id"), func.ts_rank_cd(search_vector, query).label("rank")).where(
+            search_vector.op("@@")(query)
+        ).subquery("matches")
+        # Outside the subquery, so only the rows of the page get highlighted.
+        snippet = func.ts_headline(
+            "spanish", func.concat_ws(" … ", Article.wikipedia_title, Article.processed_summary, Article.personal_notes),
+            query, "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5",
+        )
+    else:
+        fts = table("articles_fts", column("rowid"))
+        matches = select(
+            fts.c.rowid.label("id"),
+            # Title matches weigh most, then the summary, then the notes.
+            (-func.bm25(literal_column("articles_fts"), 10.0, 4.0, 1.0)).label("rank"),
+            func.snippet(literal_column("articles_fts"), -1, "<mark>", "</mark>", "…", 16).label("snippet"),
+        ).where(literal_column("articles_fts").op("MATCH")(fts5_query(text))).subquery("matches")
+        snippet = matches.c.snippet
+
+    stmt = select(Article, matches.c.rank, snippet).join(matches, matches.c.id == Article.id)
+    if user_id is not None:
+        stmt = stmt.where(Article.user_id == user_id)
+    if cursor:
+        rank_value, article_id = decode_search_cursor(cursor)
+        stmt = stmt.where(tuple_(matches.c.rank, Article.id) < tuple_(rank_value, article_id))
+    return stmt.order_by(matches.c.rank.desc(), Article.id.desc()).limit(limit + 1)
+
+
+def split_search_page(rows: list, limit: int) -> Tuple[List[Tuple[Article, float, str]], Optional[str]]:
+    """split_page for search_statement rows of (article, rank, snippet)."""
+    next_cursor = None
+    if len(rows) > limit:
+        article, rank, _ = rows[limit - 1]
+        next_cursor = _pack_cursor([rank, article.id])
+    return [tuple(row) for row in rows[:limit]], next_cursor
+
+
 class CRUDArticle:
+    def _apply_stats(self, db: Session, delta: StatsDelta) -> None:
+        for stmt in stats_statements(db.get_bind().dialect.name, delta):
+            db.execute(stmt)
+
     def create_article(self, db: Session, article: ArticleCreate) -> Article:
-        db_article = Article(
-            wikipedia_title=article.wikipedia_title,
-            wikipedia_url=str(article.wikipedia_url),
-            processed_summary=article.processed_summary,
-            word_count=article.word_count,
-            frequent_words=article.frequent_words,
-            sentiment_polarity=article.sentiment_polarity,
-            sentiment_subjectivity=article.sentiment_subjectivity,
-            sentiment_label=article.sentiment_label,
-            personal_notes=article.personal_notes,
-            user_id=article.user_id,
-        )
-        db.add(db_article)
+        """Saves an article; saving a title the user already saved updates it, as bulk_upsert_articles does."""
+        return self.bulk_upsert_articles(db, [article])[0]
+
+    def bulk_upsert_articles(self, db: Session, articles: List[ArticleCreate]) -> List[Article]:
+        """
+        Saves many articles in one transaction, updating the ones the user already
+        saved (see bulk_upsert_statements). Returns them in the order given.
+        """
+        keys, statements = bulk_upsert_statements(db.get_bind().dialect.name, articles)
+        delta = StatsDelta()
+        for stmt in lock_users_statements(db.get_bind().dialect.name, (user_id for user_id, _ in keys)):
+            db.execute(stmt)
+        for stmt in existing_articles_statements(keys):
+            for row in db.execute(stmt):
+                delta.remove(row)
+        saved = {}
+        for stmt in statements:
+            for db_article in db.scalars(stmt, execution_options={"populate_existing": True}):
+                saved[(db_article.user_id, db_article.wikipedia_title)] = db_article
+        for db_article in saved.values():
+            delta.add(db_article)
+        self._apply_stats(db, delta)
         db.commit()
-        db.refresh(db_article)
-        self._convert_frequent_words_for_schema(db_article)
-        return db_article
+        return [saved[key] for key in keys]
+
+    def get_articles_page(
+        self,
+        db: Session,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        user_id: Optional[int] = None,
+        title_prefix: Optional[str] = None,
+        sentiment_label: Optional[str] = None,
+        word: Optional[str] = None,
+    ) -> Tuple[List[Article], Optional[str]]:
+        """One page of saved articles, newest first, plus the cursor for the next page."""
+        stmt = articles_page_statement(
+            db.get_bind().dialect.name, limit=limit, cursor=cursor, user_id=user_id,
+            title_prefix=title_prefix, sentiment_label=sentiment_label, word=word,
+        )
+        return split_page(list(db.scalars(stmt)), limit)
 
-    def get_articles(self, db: Session, skip: int = 0, limit: int = 10) -> List[Article]: # Ensure self is here and return type is List[Article]
-        articles_from_db = db.query(Article).offset(skip).limit(limit).all()
-
-        for article_obj in articles_from_db:
-            if article_obj.frequent_words and isinstance(article_obj.frequent_words, str):
-                try:
-                    loaded_words = json.loads(article_obj.frequent_words)
-                    
-                    if isinstance(loaded_words, list) and all(isinstance(item, str) for item in loaded_words):
-                        article_obj.frequent_words = [[word, 0] for word in loaded_words]
-                    elif isinstance(loaded_words, list) and all(isinstance(item, list) and len(item) == 2 and isinstance(item[0], str) and isinstance(item[1], (int, float)) for item in loaded_words):
-                        article_obj.frequent_words = loaded_words
-                    else:
-                        article_obj.frequent_words = []
-                except (json.JSONDecodeError, TypeError):
-                    article_obj.frequent_words = [] 
-            else:
-                article_obj.frequent_words = []
-
-        return articles_from_db
+    def search_articles(
+        self,
+        db: Session,
+        text: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> Tuple[List[Tuple[Article, float, str]], Optional[str]]:
+        """Full-text search over title, summary and notes: (article, rank, snippet) rows and the next cursor."""
+        stmt = search_statement(db.get_bind().dialect.name, text, limit=limit, cursor=cursor, user_id=user_id)
+        return split_search_page(db.execute(stmt).all(), limit)
 
     def get_article(self, db: Session, article_id: int) -> Optional[Article]:
         return db.query(Article).filter(Article.id == article_id).first()
@@ -59,39 +295,60 @@ class CRUDArticle:
             db.commit()
             db.refresh(db_article)
 
-            if isinstance(db_article.frequent_words, str):
-                try:
-                    loaded = json.loads(db_article.frequent_words)
-                    if isinstance(loaded, list):
-                        db_article.frequent_words = loaded
-                    else:
-                        db_article.frequent_words = []
-                except json.JSONDecodeError:
-                    db_article.frequent_words = []
-
         return db_article
 
     def delete_article(self, db: Session, article_id: int) -> Optional[Article]:
-        db_article = db.query(Article).filter(Article.id == article_id).first()
+        # Locked, so a concurrent delete of the same article finds it gone instead of uncounting it again.
+        for stmt in lock_users_statements(db.get_bind().dialect.name, []):
+            db.execute(stmt)
+        db_article = db.query(Article).filter(Article.id == article_id).with_for_update().first()
         if db_article:
+            delta = StatsDelta()
+            delta.remove(db_article)
             db.delete(db_article)
+            self._apply_stats(db, delta)
             db.commit()
         return db_article
-    
-    def _convert_frequent_words_for_schema(self, article_obj: Article) -> None:
-        """Helper to convert frequent_words from DB format to schema expected format."""
-        if article_obj.frequent_words and isinstance(article_obj.frequent_words, str):
-            try:
-                loaded_words = json.loads(article_obj.frequent_words)
-                if isinstance(loaded_words, list) and all(isinstance(item, str) for item in loaded_words):
-                    article_obj.frequent_words = [[word, 0] for word in loaded_words]
-                elif isinstance(loaded_words, list) and all(isinstance(item, list) and len(item) == 2 and isinstance(item[0], str) and isinstance(item[1], (int, float)) for item in loaded_words):
-                    article_obj.frequent_words = loaded_words
-                else:
-                    article_obj.frequent_words = []
-            except (json.JSONDecodeError, TypeError):
-                article_obj.frequent_words = []
-        elif article_obj.frequent_words is None:
-            article_obj.frequent_words = [] 
+
+    def get_user_stats(self, db: Session, user_id: int, top: int = 20, recent: int = 20) -> dict:
+        """
+        Aggregate stats of a user's saved articles, read from the maintained
+        aggregates plus the ``recent`` newest articles (see build_user_stats).
+        """
+        statements = user_stats_statements(user_id, top, recent)
+        recent_rows = db.execute(statements["recent"]).all()
+        terms = recent_terms(recent_rows)
+        document_frequency = dict(db.execute(document_frequency_statement(user_id, terms)).all()) if terms else {}
+        return build_user_stats(
+            user_id,
+            db.scalars(statements["totals"]).first(),
+            db.execute(statements["top_terms"]).all(),
+            db.execute(statements["buckets"]).all(),
+            recent_rows,
+            document_frequency,
+        )
+
+    def get_distinctive_terms(self, db: Session, article: Article, limit: int = 5) -> dict:
+        """
+        TF-IDF distinctive terms of any saved article against its user's library,
+        from the article's frequent words and the maintained term aggregates.
+        """
+        words = [word for word, _ in normalize_frequent_words(article.frequent_words)]
+        document_frequency = (
+            dict(db.execute(document_frequency_statement(article.user_id, words)).all()) if words else {}
+        )
+        article_count = db.scalar(article_count_statement(article.user_id)) or 0
+        return article_distinctive_terms(article.id, article.wikipedia_title, article.word_count,
+                                         article.frequent_words, document_frequency, article_count, limit)
+
+    def rebuild_user_stats(self, db: Session) -> None:
+        """Recomputes every user's aggregates from the articles, e.g. after writes that bypassed this class."""
+        for model in (UserArticleStats, UserTermStats, UserStatBucket):
+            db.query(model).delete()
+        delta = StatsDelta()
+        for row in db.execute(select(*COUNTED_COLUMNS).execution_options(yield_per=1000)):
+            delta.add(row)
+        self._apply_stats(db, delta)
+        db.commit()
 
 article_crud = CRUDArticle()
\ No newline at end of file
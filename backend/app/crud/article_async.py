@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.article import (
+    articles_page_statement,
+    bulk_upsert_statements,
+    search_statement,
+    split_page,
+    split_search_page,
+)
+from app.crud.article_stats import (
+    StatsDelta,
+    article_count_statement,
+    article_distinctive_terms,
+    build_user_stats,
+    document_frequency_statement,
+    existing_articles_statements,
+    lock_users_statements,
+    recent_terms,
+    stats_statements,
+    user_stats_statements,
+)
+from app.database.models import Article, normalize_frequent_words
+from app.schemas.article import ArticleCreate, ArticleUpdate
+
+
+class AsyncCRUDArticle:
+    """CRUDArticle over an AsyncSession, so queries and commits never block the event loop."""
+
+    async def _apply_stats(self, db: AsyncSession, delta: StatsDelta) -> None:
+        for stmt in stats_statements(db.bind.dialect.name, delta):
+            await db.execute(stmt)
+
+    async def create_article(self, db: AsyncSession, article: ArticleCreate) -> Article:
+        return (await self.bulk_upsert_articles(db, [article]))[0]
+
+    async def bulk_upsert_articles(self, db: AsyncSession, articles: List[ArticleCreate]) -> List[Article]:
+        keys, statements = bulk_upsert_statements(db.bind.dialect.name, articles)
+        delta = StatsDelta()
+        for stmt in lock_users_statements(db.bind.dialect.name, (user_id for user_id, _ in keys)):
+            await db.execute(stmt)
+        for stmt in existing_articles_statements(keys):
+            for row in await db.execute(stmt):
+                delta.remove(row)
+        saved = {}
+        for stmt in statements:
+            for db_article in await db.scalars(stmt, execution_options={"populate_existing": True}):
+                saved[(db_article.user_id, db_article.wikipedia_title)] = db_article
+        for db_article in saved.values():
+            delta.add(db_article)
+        await self._apply_stats(db, delta)
+        await db.commit()
+        return [saved[key] for key in keys]
+
+    async def get_articles_page(
+        self,
+        db: AsyncSession,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        user_id: Optional[int] = None,
+        title_prefix: Optional[str] = None,
+        sentiment_label: Optional[str] = None,
+        word: Optional[str] = None,
+    ) -> Tuple[List[Article], Optional[str]]:
+        stmt = articles_page_statement(
+            db.bind.dialect.name, limit=limit, cursor=cursor, user_id=user_id,
+            title_prefix=title_prefix, sentiment_label=sentiment_label, word=word,
+        )
+        return split_page(list(await db.scalars(stmt)), limit)
+
+    async def search_articles(
+        self,
+        db: AsyncSession,
+        text: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> Tuple[List[Tuple[Article, float, str]], Optional[str]]:
+        stmt = search_statement(db.bind.dialect.name, text, limit=limit, cursor=cursor, user_id=user_id)
+        return split_search_page((await db.execute(stmt)).all(), limit)
+
+    async def get_saved_titles(self, db: AsyncSession, limit: int, url_prefix: Optional[str] = None) -> List[str]:
+        """Distinct saved Wikipedia titles, most recently saved first, optionally only those under ``url_prefix``."""
+        stmt = select(Article.wikipedia_title)
+        if url_prefix is not None:
+            stmt = stmt.where(Article.wikipedia_url.startswith(url_prefix, autoescape=True))
+        stmt = (
+            stmt.group_by(Article.wikipedia_title)
+            .order_by(func.max(Article.saved_at).desc())
+            .limit(limit)
+        )
+        return list(await db.scalars(stmt))
+
+    async def get_article(self, db: AsyncSession, article_id: int) -> Optional[Article]:
+        return await db.get(Article, article_id)
+
+    async def get_articles_by_ids(self, db: AsyncSession, article_ids: List[int]) -> List[Article]:
+        """The articles with these ids that still exist, in the order given."""
+        found = {a.id: a for a in await db.scalars(select(Article).where(Article.id.in_(article_ids)))}
+        return [found[article_id] for article_id in article_ids if article_id in found]
+
+    async def count_articles(self, db: AsyncSession) -> int:
+        return await db.scalar(select(func.count()).select_from(Article))
+
+    async def similarity_signature(self, db: AsyncSession) -> tuple:
+        """(article count, newest saved_at): changes whenever an article is saved or deleted."""
+        return tuple((await db.execute(select(func.count(), func.max(Article.saved_at)).select_from(Article))).one())
+
+    async def iter_similarity_rows(self, db: AsyncSession, batch_size: int = 1000,
+                                   saved_since: Optional[datetime] = None) -> AsyncIterator[list]:
+        """Batches of the columns the similarity index is built from: every saved article, or those saved since."""
+        stmt = select(Article.id, Article.user_id, Article.wikipedia_title, Article.processed_summary,
+                      Article.frequent_words).execution_options(yield_per=batch_size)
+        if saved_since is not None:
+            stmt = stmt.where(Article.saved_at >= saved_since)
+        result = await db.stream(stmt)
+        async for batch in result.partitions(batch_size):
+            yield batch
+
+    async def update_article(self, db: AsyncSession, article_id: int,
+                             article_update: ArticleUpdate) -> Optional[Article]:
+        db_article = await db.get(Article, article_id)
+        if db_article:
+            for key, value in article_update.model_dump(exclude_unset=True).items():
+                setattr(db_article, key, value)
+            await db.commit()
+            await db.refresh(db_article)
+        return db_article
+
+    async def delete_article(self, db: AsyncSession, article_id: int) -> Optional[Article]:
+        # Locked, so a concurrent delete of the same article finds it gone instead of uncounting it again.
+        for stmt in lock_users_statements(db.bind.dialect.name, []):
+            await db.execute(stmt)
+        db_article = await db.get(Article, article_id, with_for_update=True)
+        if db_article:
+            delta = StatsDelta()
+            delta.remove(db_article)
+            await db.delete(db_article)
+            await self._apply_stats(db, delta)
+            await db.commit()
+        return db_article
+
+    async def get_user_stats(self, db: AsyncSession, user_id: int, top: int = 20, recent: int = 20) -> dict:
+        statements = user_stats_statements(user_id, top, recent)
+        recent_rows = (await db.execute(statements["recent"])).all()
+        terms = recent_terms(recent_rows)
+        document_frequency = (
+            dict((await db.execute(document_frequency_statement(user_id, terms))).all()) if terms else {}
+        )
+        return build_user_stats(
+            user_id,
+            (await db.scalars(statements["totals"])).first(),
+            (await db.execute(statements["top_terms"])).all(),
+            (await db.execute(statements["buckets"])).all(),
+            recent_rows,
+            document_frequency,
+        )
+
+    async def get_distinctive_terms(self, db: AsyncSession, article: Article, limit: int = 5) -> dict:
+        words = [word for word, _ in normalize_frequent_words(article.frequent_words)]
+        document_frequency = (
+            dict((await db.execute(document_frequency_statement(article.user_id, words))).all()) if words else {}
+        )
+        article_count = await db.scalar(article_count_statement(article.user_id)) or 0
+        return article_distinctive_terms(article.id, article.wikipedia_title, article.word_count,
+                                         article.frequent_words, document_frequency, article_count, limit)
+
+
+async_article_crud = AsyncCRUDArticle()
@@ -0,0 +1,323 @@
+"""
+Per-user aggregates over saved articles (UserArticleStats, UserTermStats,
+UserStatBucket), kept in step with the articles table.
+
+Every write in CRUDArticle / AsyncCRUDArticle collects what it adds and
+removes in a StatsDelta and applies it with stats_statements in the same
+transaction, as additive upserts. The stats endpoint then reads a handful of
+small rows however many articles a user has saved.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, false, func, select, tuple_, update
+
+from app.database.models import Article, UserArticleStats, UserStatBucket, UserTermStats, normalize_frequent_words
+
+# Rows per statement, as in app.crud.article.BULK_CHUNK_SIZE.
+CHUNK_SIZE = 500
+# First key of the Postgres advisory locks taken by lock_users_statements, so they
+# cannot collide with advisory locks taken for anything else.
+USER_STATS_LOCK = 0x57534154
+
+# Word counts are bucketed on a log scale, 8 buckets per doubling, so
+# percentiles read from the histogram are within about 4.5% of the real value.
+WORD_COUNT_BUCKETS_PER_OCTAVE = 8
+POLARITY_BUCKET_WIDTH = 0.2
+PERCENTILES = (50, 90, 99)
+
+SENTIMENT_LABEL = "sentiment_label"
+POLARITY = "polarity"
+WORD_COUNT = "word_count"
+UNLABELLED = "sin_etiqueta"
+
+
+def word_count_bucket(word_count: int) -> int:
+    if word_count <= 0:
+        return -1
+    return math.floor(math.log2(word_count) * WORD_COUNT_BUCKETS_PER_OCTAVE)
+
+
+def word_count_bucket_value(bucket: int) -> int:
+    """Representative word count of a bucket: its geometric middle."""
+    if bucket < 0:
+        return 0
+    return round(2 ** ((bucket + 0.5) / WORD_COUNT_BUCKETS_PER_OCTAVE))
+
+
+def polarity_bucket(polarity: float) -> int:
+    """Index of the POLARITY_BUCKET_WIDTH wide range of [-1, 1] holding ``polarity``."""
+    buckets = round(2 / POLARITY_BUCKET_WIDTH)
+    return min(max(math.floor((polarity + 1) / POLARITY_BUCKET_WIDTH), 0), buckets - 1)
+
+
+@dataclass
+class StatsDelta:
+    """Changes to the aggregates of some users, built up with add() and remove()."""
+    # user_id -> [articles, words, scored articles, polarity sum, subjectivity sum]
+    users: Dict[int, list] = field(default_factory=lambda: defaultdict(lambda: [0, 0, 0, 0.0, 0.0]))
+    # (user_id, term) -> [occurrences, articles]
+    terms: Dict[Tuple[int, str], list] = field(default_factory=lambda: defaultdict(lambda: [0, 0]))
+    # (user_id, kind, bucket) -> articles
+    buckets: Dict[Tuple[int, str, str], int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, article, sign: int = 1) -> None:
+        """Counts an Article, ArticleCreate or row with the same attributes (sign=-1 uncounts it)."""
+        user_id = article.user_id
+        totals = self.users[user_id]
+        totals[0] += sign
+        totals[1] += sign * (article.word_count or 0)
+        polarity, subjectivity = article.sentiment_polarity, article.sentiment_subjectivity
+        if polarity is not None:
+            totals[2] += sign
+            totals[3] += sign * polarity
+            totals[4] += sign * (subjectivity or 0.0)
+            self.buckets[(user_id, POLARITY, str(polarity_bucket(polarity)))] += sign
+        self.buckets[(user_id, SENTIMENT_LABEL, article.sentiment_label or UNLABELLED)] += sign
+        self.buckets[(user_id, WORD_COUNT, str(word_count_bucket(article.word_count or 0)))] += sign
+        seen = set()
+        for word, count in normalize_frequent_words(article.frequent_words):
+            term = self.terms[(user_id, word)]
+            term[0] += sign * count
+            if word not in seen:
+                term[1] += sign
+                seen.add(word)
+
+    def remove(self, article) -> None:
+        self.add(article, sign=-1)
+
+    def __bool__(self) -> bool:
+        return bool(self.users)
+
+
+def dialect_insert(dialect: str):
+    """
+    The dialect's ``insert`` (the one with ``on_conflict_do_update``). The
+    dialect modules are imported here, on first write, so startup only loads
+    the one the configured database uses.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _chunks(rows: list) -> Iterable[list]:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+
+def stats_statements(dialect: str, delta: StatsDelta) -> list:
+    """
+    INSERT ... ON CONFLICT DO UPDATE statements adding ``delta`` to the
+    aggregates, then DELETEs of the terms and buckets no article counts any
+    more. Rows are sorted by key so concurrent writers lock them in the same
+    order.
+    """
+    insert = dialect_insert(dialect)
+    statements = []
+
+    users = [
+        {"user_id": user_id, "article_count": v[0], "total_words": v[1],
+         "scored_count": v[2], "polarity_sum": v[3], "subjectivity_sum": v[4]}
+        for user_id, v in sorted(delta.users.items())
+    ]
+    terms = [
+        {"user_id": user_id, "term": term, "occurrences": v[0], "article_count": v[1]}
+        for (user_id, term), v in sorted(delta.terms.items()) if v != [0, 0]
+    ]
+    buckets = [
+        {"user_id": user_id, "kind": kind, "bucket": bucket, "count": count}
+        for (user_id, kind, bucket), count in sorted(delta.buckets.items()) if count
+    ]
+    for model, rows, keys in (
+        (UserArticleStats, users, ["user_id"]),
+        (UserTermStats, terms, ["user_id", "term"]),
+        (UserStatBucket, buckets, ["user_id", "kind", "bucket"]),
+    ):
+        for chunk in _chunks(rows):
+            stmt = insert(model).values(chunk)
+            added = [name for name in chunk[0] if name not in keys]
+            statements.append(stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in added},
+            ))
+
+    user_ids = [row["user_id"] for row in users]
+    if user_ids:
+        statements.append(delete(UserTermStats).where(
+            UserTermStats.user_id.in_(user_ids), UserTermStats.article_count <= 0,
+        ))
+        statements.append(delete(UserStatBucket).where(
+            UserStatBucket.user_id.in_(user_ids), UserStatBucket.count <= 0,
+        ))
+        statements.append(delete(UserArticleStats).where(
+            UserArticleStats.user_id.in_(user_ids), UserArticleStats.article_count <= 0,
+        ))
+    return statements
+
+
+# Columns StatsDelta.add reads.
+COUNTED_COLUMNS = (
+    Article.user_id, Article.word_count, Article.frequent_words,
+    Article.sentiment_polarity, Article.sentiment_subjectivity, Article.sentiment_label,
+)
+
+
+def lock_users_statements(dialect: str, user_ids: Iterable[int]) -> list:
+    """
+    Statements that serialise the saves of these users until the end of the
+    transaction; run them before existing_articles_statements. Without them,
+    two concurrent saves of the same title both read the same old row (or
+    both find none) and uncount it once but count the new values twice.
+    Postgres takes an advisory lock per user, in order, which also covers
+    titles saved for the first time, where there is no row to lock yet.
+    SQLite has a single writer, so a write that changes nothing takes its
+    database lock before the read instead; with no users, that is all that
+    is taken (deletes lock the row they read).
+    """
+    if dialect == "postgresql":
+        return [select(func.pg_advisory_xact_lock(USER_STATS_LOCK, user_id)) for user_id in sorted(set(user_ids))]
+    return [update(UserArticleStats).where(false()).values(user_id=UserArticleStats.user_id)]
+
+
+def existing_articles_statements(keys: Sequence[Tuple[int, str]]) -> list:
+    """SELECTs of the counted columns of the saved articles with these (user_id, title) keys."""
+    return [
+        select(*COUNTED_COLUMNS).where(tuple_(Article.user_id, Article.wikipedia_title).in_(chunk))
+        for chunk in _chunks(list(keys))
+    ]
+
+
+def user_stats_statements(user_id: int, top: int, recent: int) -> dict:
+    """The reads behind build_user_stats, except the document frequencies of the recent articles' terms."""
+    return {
+        "totals": select(UserArticleStats).where(UserArticleStats.user_id == user_id),
+        "top_terms": select(UserTermStats.term, UserTermStats.occurrences, UserTermStats.article_count)
+        .where(UserTermStats.user_id == user_id)
+        .order_by(UserTermStats.occurrences.desc(), UserTermStats.term)
+        .limit(top),
+        "buckets": select(UserStatBucket.kind, UserStatBucket.bucket, UserStatBucket.count)
+        .where(UserStatBucket.user_id == user_id),
+        "recent": select(Article.id, Article.wikipedia_title, Article.word_count, Article.frequent_words)
+        .where(Article.user_id == user_id)
+        .order_by(Article.saved_at.desc(), Article.id.desc())
+        .limit(recent),
+    }
+
+
+def article_count_statement(user_id: int):
+    return select(UserArticleStats.article_count).where(UserArticleStats.user_id == user_id)
+
+
+def document_frequency_statement(user_id: int, terms: Iterable[str]):
+    return select(UserTermStats.term, UserTermStats.article_count).where(
+        UserTermStats.user_id == user_id, UserTermStats.term.in_(sorted(set(terms))),
+    )
+
+
+def _percentiles(histogram: Dict[int, int], total: int) -> Dict[str, int]:
+    result = {}
+    if not total:
+        return result
+    ordered = sorted(histogram.items())
+    for p in PERCENTILES:
+        rank = max(1, math.ceil(p / 100 * total))
+        seen = 0
+        for bucket, count in ordered:
+            seen += count
+            if seen >= rank:
+                result[f"p{p}"] = word_count_bucket_value(bucket)
+                break
+    return result
+
+
+def distinctive_terms(frequent_words, word_count: int, document_frequency: Dict[str, int],
+                      article_count: int, limit: int = 5) -> List[dict]:
+    """
+    The article's frequent words ranked by TF-IDF against the user's library:
+    tf = count / word_count, idf = ln(N / df). Words every saved article has
+    score 0 and are left out.
+    """
+    scored = []
+    for word, count in normalize_frequent_words(frequent_words):
+        df = document_frequency.get(word, 0)
+        if not df or not word_count:
+            continue
+        score = count / word_count * math.log(article_count / df)
+        if score > 0:
+            scored.append({"term": word, "score": round(score, 6)})
+    scored.sort(key=lambda item: (-item["score"], item["term"]))
+    return scored[:limit]
+
+
+def article_distinctive_terms(article_id: int, title: str, word_count: int, frequent_words,
+                              document_frequency: Dict[str, int], article_count: int, limit: int = 5) -> dict:
+    """One entry of ``distinctive_terms``: an article and its distinctive_terms."""
+    return {
+        "article_id": article_id,
+        "wikipedia_title": title,
+        "terms": distinctive_terms(frequent_words, word_count, document_frequency, article_count, limit),
+    }
+
+
+def build_user_stats(user_id: int, totals: Optional[UserArticleStats], top_terms: list, buckets: list,
+                     recent: list, document_frequency: Dict[str, int]) -> dict:
+    """
+    The stats endpoint's response from the rows read by user_stats_statements.
+
+    Distinctive terms are only listed for the ``recent`` newest articles, on
+    purpose: they need each article's frequent words, so listing them all
+    would read every saved article. Any other article's come from the
+    per-article lookup (CRUDArticle.get_distinctive_terms), which reads that
+    article and the maintained term aggregates only.
+    """
+    article_count = totals.article_count if totals else 0
+    labels: Dict[str, int] = {}
+    polarity: Dict[int, int] = {}
+    word_counts: Dict[int, int] = {}
+    for kind, bucket, count in buckets:
+        if kind == SENTIMENT_LABEL:
+            labels[bucket] = count
+        elif kind == POLARITY:
+            polarity[int(bucket)] = count
+        elif kind == WORD_COUNT:
+            word_counts[int(bucket)] = count
+
+    scored = totals.scored_count if totals else 0
+    return {
+        "user_id": user_id,
+        "article_count": article_count,
+        "top_terms": [
+            {"term": term, "occurrences": occurrences, "articles": articles}
+            for term, occurrences, articles in top_terms
+        ],
+        "sentiment": {
+            "labels": labels,
+            "polarity_histogram": [
+                {
+                    "min": round(-1 + i * POLARITY_BUCKET_WIDTH, 2),
+                    "max": round(-1 + (i + 1) * POLARITY_BUCKET_WIDTH, 2),
+                    "count": count,
+                }
+                for i, count in sorted(polarity.items())
+            ],
+            "mean_polarity": round(totals.polarity_sum / scored, 4) if scored else None,
+            "mean_subjectivity": round(totals.subjectivity_sum / scored, 4) if scored else None,
+        },
+        "word_count": {
+            "total": totals.total_words if totals else 0,
+            "mean": round(totals.total_words / article_count, 1) if article_count else None,
+            **_percentiles(word_counts, article_count),
+        },
+        "distinctive_terms": [
+            article_distinctive_terms(*row, document_frequency, article_count) for row in recent
+        ],
+    }
+
+
+def recent_terms(recent: list) -> List[str]:
+    return [word for *_, frequent_words in recent for word, _ in normalize_frequent_words(frequent_words)]
@@ -1,32 +1,179 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from sqlalchemy.ext.declarative import declarative_base
+import json
+from sqlalchemy import DDL, Column, Integer, String, Float, DateTime, Index, UniqueConstraint, JSON, event
+from sqlalchemy.types import TypeDecorator
 import datetime
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from app.database.session import Base
 
-import os
-if os.getenv("DATABASE_URL") and "postgresql" in os.getenv("DATABASE_URL"):
-    JSON_COLUMN_TYPE = JSONB
-else: 
-    JSON_COLUMN_TYPE = SQLiteJSON
+
+class FrequentWords(TypeDecorator):
+    """
+    ``[[word, count], ...]`` stored as JSONB on Postgres and JSON elsewhere.
+
+    Values are normalised when written, so rows read back already match the
+    API schema. Legacy shapes (a JSON-encoded string, a bare list of words)
+    are accepted on write and counted as 0, as the old read path did.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            # Imported here so a SQLite deployment never loads the Postgres dialect.
+            from sqlalchemy.dialects.postgresql import JSONB
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(JSON())
+
+    def process_bind_param(self, value, dialect):
+        return normalize_frequent_words(value)
+
+
+def normalize_frequent_words(value) -> list:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(value, (list, tuple)):
+        return []
+    words = []
+    for item in value:
+        if isinstance(item, str):
+            words.append([item, 0])
+        elif isinstance(item, (list, tuple)) and len(item) == 2 and isinstance(item[0], str):
+            words.append([item[0], int(item[1])])
+        else:
+            return []
+    return words
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        # A user saves a given Wikipedia article once; re-saving updates it in place.
+        UniqueConstraint("user_id", "wikipedia_title", name="uq_articles_user_id_wikipedia_title"),
+        # Keyset pagination of the saved-articles listing, with and without filters.
+        Index("ix_articles_saved_at_id", "saved_at", "id"),
+        Index("ix_articles_user_id_saved_at_id", "user_id", "saved_at", "id"),
+        Index("ix_articles_user_id_sentiment_label_saved_at_id", "user_id", "sentiment_label", "saved_at", "id"),
+        # Postgres-specific indexes are in INDEX_DDL below: postgresql_* index
+        # options would load the Postgres dialect whatever the database.
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     wikipedia_title = Column(String, index=True, nullable=False)
     wikipedia_url = Column(String, nullable=False)
     processed_summary = Column(String, nullable=False)
     word_count = Column(Integer, nullable=False)
-    frequent_words = Column(JSON_COLUMN_TYPE, nullable=False) 
+    frequent_words = Column(FrequentWords, nullable=False)
     sentiment_polarity = Column(Float, nullable=True)
     sentiment_subjectivity = Column(Float, nullable=True)
     sentiment_label = Column(String, nullable=True)
     user_id = Column(Integer, index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc), nullable=True)
     personal_notes = Column(String, nullable=True)
-    saved_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc), nullable=True)
+    saved_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc), nullable=False)
 
     def __repr__(self):
-        return f"<Article(title='{self.wikipedia_title}')>"
\ No newline at end of file
+        return f"<Article(title='{self.wikipedia_title}')>"
+
+
+# Running per-user aggregates over saved articles, kept up to date by the CRUD
+# layer (app.crud.article_stats) so the stats endpoint never scans articles.
+class UserArticleStats(Base):
+    __tablename__ = "user_article_stats"
+
+    user_id = Column(Integer, primary_key=True)
+    article_count = Column(Integer, nullable=False, default=0)
+    total_words = Column(Integer, nullable=False, default=0)
+    # Articles with sentiment scores, and the sums of those scores.
+    scored_count = Column(Integer, nullable=False, default=0)
+    polarity_sum = Column(Float, nullable=False, default=0.0)
+    subjectivity_sum = Column(Float, nullable=False, default=0.0)
+
+
+class UserTermStats(Base):
+    __tablename__ = "user_term_stats"
+    __table_args__ = (
+        Index("ix_user_term_stats_user_id_occurrences", "user_id", "occurrences"),
+    )
+
+    user_id = Column(Integer, primary_key=True)
+    term = Column(String, primary_key=True)
+    # Sum of the term's counts in frequent_words, and how many articles have it there.
+    occurrences = Column(Integer, nullable=False, default=0)
+    article_count = Column(Integer, nullable=False, default=0)
+
+
+class UserStatBucket(Base):
+    """Histogram bucket: articles per sentiment label, polarity range or word-count range."""
+    __tablename__ = "user_stat_buckets"
+
+    user_id = Column(Integer, primary_key=True)
+    kind = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# Full-text search over title, summary and notes. Postgres keeps a generated
+# tsvector column (Spanish configuration) with a GIN index; SQLite keeps an
+# external-content FTS5 table in sync through triggers. Either way inserts,
+# upserts and note updates reindex the row inside the same transaction.
+SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('spanish', coalesce(wikipedia_title, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(processed_summary, '')), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(personal_notes, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_vector ON articles USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            wikipedia_title, processed_summary, personal_notes,
+            content='articles', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES (new.id, new.wikipedia_title, new.processed_summary, new.personal_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES ('delete', old.id, old.wikipedia_title, old.processed_summary, old.personal_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES ('delete', old.id, old.wikipedia_title, old.processed_summary, old.personal_notes);
+            INSERT INTO articles_fts(rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES (new.id, new.wikipedia_title, new.processed_summary, new.personal_notes);
+        END
+        """,
+    ],
+}
+
+# Indexes with Postgres operator classes, matching migrations 0003 and 0004.
+INDEX_DDL = {
+    "postgresql": [
+        # Lets Postgres serve title-prefix LIKE filters from an index under any collation.
+        "CREATE INDEX IF NOT EXISTS ix_articles_wikipedia_title_pattern"
+        " ON articles (wikipedia_title text_pattern_ops)",
+        # Containment lookups (frequent_words @> '[["palabra"]]') for the by-word listing.
+        "CREATE INDEX IF NOT EXISTS ix_articles_frequent_words"
+        " ON articles USING gin (frequent_words jsonb_path_ops)",
+    ],
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS ix_articles_wikipedia_title_pattern ON articles (wikipedia_title)",
+    ],
+}
+
+for _dialect, _statements in (*SEARCH_DDL.items(), *INDEX_DDL.items()):
+    for _statement in _statements:
+        event.listen(Article.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Article.__table__, "before_drop", DDL("DROP TABLE IF EXISTS articles_fts").execute_if(dialect="sqlite"))
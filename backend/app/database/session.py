@@ -1,14 +1,153 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Dict
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (asyncpg, aiosqlite)."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+class _CheckoutTimer:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.engine_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool class and sizing, pre-ping and statement timeout from settings, for either engine."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory databases keep their single-connection pools.
+        return options
+    options["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    if backend == "sqlite":
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+_engines: Dict[str, object] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    The blocking engine, created on first use: building it loads the
+    database driver, which importing the app should not pay for.
+    """
+    with _engines_lock:
+        if "sync" not in _engines:
+            _engines["sync"] = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+        return _engines["sync"]
+
+
+def get_async_engine() -> AsyncEngine:
+    with _engines_lock:
+        if "async" not in _engines:
+            url = async_database_url(settings.DATABASE_URL)
+            _engines["async"] = create_async_engine(url, **engine_options(url, is_async=True))
+        return _engines["async"]
+
+
+@lru_cache(maxsize=None)
+def _session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache(maxsize=None)
+def _async_session_factory() -> async_sessionmaker:
+    # Objects stay usable after commit, as response models read them once the session is done.
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def SessionLocal() -> Session:
+    return _session_factory()()
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    return _async_session_factory()()
+
+
+def engine_pools() -> Dict[str, object]:
+    """The connection pools of the engines created so far, by engine label."""
+    with _engines_lock:
+        engines = dict(_engines)
+    pools = {}
+    if "sync" in engines:
+        pools["sync"] = engines["sync"].pool
+    if "async" in engines:
+        pools["async"] = engines["async"].sync_engine.pool
+    return pools
+
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections of the engines created so far."""
+    with _engines_lock:
+        engines = dict(_engines)
+    if "async" in engines:
+        await engines["async"].dispose()
+    if "sync" in engines:
+        engines["sync"].dispose()
+
+
+def __getattr__(name: str):
+    # ``engine`` and ``async_engine`` used to be built at import time; keep them importable.
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,14 +1,102 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.http_cache import encoded_bodies
+from app.core.metrics import CacheStatsCollector, MetricsMiddleware, PoolStatsCollector, UpstreamStatsCollector
 from app.api.v1.api import api_router
-from app.database.session import engine
-from app.database.models import Base
+from app.database.session import AsyncSessionLocal, dispose_engines, engine_pools, get_async_engine
+from app.services.analysis import analysis_pool
+from app.services.cache import article_cache
+from app.services.mediawiki import close_async_mediawiki_clients
+from app.services.upstream import upstream_stats
+from app.services.warmup import warmup_workers
+from app.services.wikipedia_registry import wikipedia_services
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the first retry of a failed warm-up; doubles on every failure up to the maximum.
+WARM_UP_RETRY_DELAY = 1.0
+WARM_UP_RETRY_MAX_DELAY = 60.0
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Loads what the first requests would otherwise pay for, after the server
+    is already listening: the analysis workers and sentiment lexicons, the
+    similarity index (and numpy), a database connection and the Wikipedia
+    clients of every language. /readyz reports ready once it has succeeded;
+    a failed attempt is retried with backoff, and /readyz reports its error
+    meanwhile.
+    """
+    delay = WARM_UP_RETRY_DELAY
+    while True:
+        step = "analysis workers"
+        try:
+            await run_in_threadpool(analysis_pool.start)
+            step = "similarity index"
+            from app.services.similarity import load_similarity_index, similarity_index
+
+            await load_similarity_index(similarity_index, AsyncSessionLocal)
+            step = "database"
+            async with get_async_engine().connect() as connection:
+                await connection.exec_driver_sql("SELECT 1")
+            step = "wikipedia clients"
+            for lang in settings.WIKIPEDIA_LANGUAGES:
+                wikipedia_services.get(lang)
+        except Exception as exc:
+            app.state.warm_up_error = f"{step}: {type(exc).__name__}"
+            logger.exception("startup warm-up failed at %s; retrying in %.0f s", step, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARM_UP_RETRY_MAX_DELAY)
+            continue
+        app.state.warm_up_error = None
+        app.state.ready = True
+        return
+
+
+async def refresh_similarity_index(interval: float) -> None:
+    """Keeps this worker's similar-articles index in step with the other workers' writes."""
+    from app.services.similarity import refresh_similarity_index_every, similarity_index
+
+    await refresh_similarity_index_every(similarity_index, AsyncSessionLocal, interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.warm_up_error = None
+    tasks = [asyncio.create_task(warm_up(app))]
+    if settings.SIMILARITY_REFRESH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(refresh_similarity_index(settings.SIMILARITY_REFRESH_INTERVAL)))
+    if settings.WARMUP_ENABLED:
+        warmup_workers.start()
+    yield
+    app.state.ready = False
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await warmup_workers.stop()
+    from app.services.similarity import similarity_index
+
+    await run_in_threadpool(similarity_index.close)
+    await close_async_mediawiki_clients()
+    await dispose_engines()
+    await run_in_threadpool(analysis_pool.shutdown)
 
 app = FastAPI(
     title="API del analizador de contenido de Wikipedia",
     description="API para buscar y analizar contenido de Wikipedia.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,10 +105,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
 )
+# Outermost, so request durations include CORS handling and compression.
+app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
+REGISTRY.register(CacheStatsCollector("article_cache", article_cache.stats))
+REGISTRY.register(CacheStatsCollector("encoded_body_cache", encoded_bodies.stats))
+REGISTRY.register(PoolStatsCollector(engine_pools))
+REGISTRY.register(UpstreamStatsCollector(upstream_stats))
 
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
-    return {"message": "¡Bienvenido a la API del analizador de contenido de Wikipedia!"}
\ No newline at end of file
+    return {"message": "¡Bienvenido a la API del analizador de contenido de Wikipedia!"}
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: 503 until the startup warm-up has succeeded, with the last error while it is retried."""
+    if not getattr(app.state, "ready", False):
+        error = getattr(app.state, "warm_up_error", None)
+        body = {"status": "starting", "error": error} if error else {"status": "starting"}
+        return JSONResponse(body, status_code=503)
+    return {"status": "ready"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
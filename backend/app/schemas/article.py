@@ -1,7 +1,7 @@
 from pydantic import BaseModel, HttpUrl, Field
 from datetime import datetime
 from typing import Optional
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
 class ArticleCreate(BaseModel):
     wikipedia_title: str
@@ -15,6 +15,9 @@ class ArticleCreate(BaseModel):
     sentiment_label: Optional[str] = None
     user_id: int
     
+class ArticleBulkCreate(BaseModel):
+    articles: List[ArticleCreate] = Field(..., min_length=1, max_length=1000)
+
 class ArticleUpdate(BaseModel):
     personal_notes: Optional[str] = None
 
@@ -24,4 +27,52 @@ class ArticleInDB(ArticleCreate):
     saved_at: datetime | None = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ArticleSearchResult(ArticleInDB):
+    rank: float
+    snippet: str
+
+class SimilarArticle(ArticleInDB):
+    similarity: float
+
+class TermStats(BaseModel):
+    term: str
+    occurrences: int
+    articles: int
+
+class PolarityBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+class SentimentDistribution(BaseModel):
+    labels: Dict[str, int]
+    polarity_histogram: List[PolarityBucket]
+    mean_polarity: Optional[float] = None
+    mean_subjectivity: Optional[float] = None
+
+class WordCountStats(BaseModel):
+    total: int
+    mean: Optional[float] = None
+    # Approximate: read from a log-scale histogram, within about 4.5%.
+    p50: Optional[int] = None
+    p90: Optional[int] = None
+    p99: Optional[int] = None
+
+class DistinctiveTerm(BaseModel):
+    term: str
+    score: float
+
+class ArticleDistinctiveTerms(BaseModel):
+    article_id: int
+    wikipedia_title: str
+    terms: List[DistinctiveTerm]
+
+class UserArticleStatsResponse(BaseModel):
+    user_id: int
+    article_count: int
+    top_terms: List[TermStats]
+    sentiment: SentimentDistribution
+    word_count: WordCountStats
+    distinctive_terms: List[ArticleDistinctiveTerms]
@@ -1,5 +1,8 @@
-from typing import List, Optional, Tuple
-from pydantic import BaseModel, HttpUrl
+from typing import List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field, HttpUrl
+
+# Keys of app.services.sentiment.SENTIMENT_BACKENDS.
+SentimentBackendName = Literal["textblob", "lexicon_es"]
 
 class WikipediaSearchArticle(BaseModel):
     title: str
@@ -18,4 +21,27 @@ class WikipediaArticleDetail(BaseModel):
     sentiment_polarity: float 
     sentiment_subjectivity: float 
     sentiment_label: str
-   
\ No newline at end of file
+    revision_id: Optional[int] = None
+
+class WikipediaArticleAnalysis(BaseModel):
+    title: str
+    url: str
+    revision_id: Optional[int] = None
+    word_count: int
+    frequent_words: List[Tuple[str, int]]
+    sentiment_polarity: float
+    sentiment_subjectivity: float
+    sentiment_label: str
+
+class BatchAnalysisRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1, max_length=1000)
+    sentiment: Optional[SentimentBackendName] = Field(
+        None, description="Analizador de sentimiento (por defecto, el configurado en SENTIMENT_BACKEND)"
+    )
+
+class BatchAnalysisResult(BaseModel):
+    title: str
+    status: Literal["ok", "error"]
+    analysis: Optional[WikipediaArticleAnalysis] = None
+    error: Optional[Literal["not_found", "disambiguation", "unavailable", "upstream_error"]] = None
+    detail: Optional[str] = None
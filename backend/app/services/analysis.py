@@ -0,0 +1,257 @@
+import asyncio
+import heapq
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import observe_stages
+from app.services.sentiment import SENTIMENT_BACKENDS, TOKEN_RE, get_sentiment_backend
+from app.services.wikitext import strip_wikitext
+
+STOPWORDS = {
+    'el', 'la', 'y', 'para', 'son', 'esto', 'eso', 'desde', 'con',
+    'fue', 'fueron', 'tener', 'tiene', 'tenía', 'no', 'pero', 'tú',
+    'tu', 'su', 'sus', 'acerca', 'cual', 'será', 'han sido', 'ellos', 'allí',
+    'cuando', 'qué', 'quién', 'cómo', 'también', 'uno', 'dos', 'puede',
+    'todos', 'más', 'algunos', 'cualquier', 'cada', 'la mayoría'
+}
+
+ENGLISH_STOPWORDS = {
+    'the', 'and', 'for', 'are', 'was', 'were', 'this', 'that', 'with', 'from',
+    'have', 'has', 'had', 'not', 'but', 'you', 'your', 'his', 'her', 'its',
+    'their', 'they', 'about', 'which', 'when', 'who', 'what', 'how', 'also',
+    'one', 'two', 'can', 'all', 'more', 'some', 'any', 'each', 'most', 'been',
+    'into', 'than', 'other', 'such', 'after', 'there', 'these', 'may', 'would',
+}
+
+# Stopwords per wiki language; languages without a list keep every word.
+STOPWORDS_BY_LANG: Dict[str, Set[str]] = {'es': STOPWORDS, 'en': ENGLISH_STOPWORDS}
+
+
+@dataclass
+class ContentAnalysis:
+    word_count: int
+    frequent_words: List[Tuple[str, int]]
+    sentiment_polarity: float
+    sentiment_subjectivity: float
+    sentiment_label: str
+    # Seconds spent per stage (tokenize, count, sentiment); measured in the worker, observed by the caller.
+    timings: Dict[str, float] = field(default_factory=dict, compare=False)
+
+
+# Bump whenever analyze_content's output for the same text changes; it is part of the article ETags.
+ANALYSIS_VERSION = 1
+
+WORD_RE = re.compile(r'\b[a-zA-Záéíóúñ]{3,}\b')
+
+
+def iter_chunks(content: str, chunk_size: int) -> Iterator[str]:
+    """
+    Splits text into chunks of about ``chunk_size`` characters without cutting words.
+
+    Cuts prefer a line break (so sentences stay whole for sentiment) and fall
+    back to any whitespace; a chunk with no whitespace at all is cut hard.
+    """
+    start, length = 0, len(content)
+    while start < length:
+        end = start + chunk_size
+        if end < length:
+            cut = content.rfind("\n", start, end)
+            if cut <= start:
+                cut = max(content.rfind(" ", start, end), content.rfind("\t", start, end))
+            if cut > start:
+                end = cut
+        yield content[start:end]
+        start = end
+
+
+def analyze_content(content: str, top_n: Optional[int] = None, chunk_size: Optional[int] = None,
+                    sentiment: Optional[str] = None, lang: str = "es") -> ContentAnalysis:
+    """
+    Word count, most frequent words and sentiment of an article's plain text.
+
+    Makes a single pass over the text in chunks, so only one chunk is ever
+    lowercased or tokenised at a time; word counts go straight into a dict
+    and the top ``top_n`` words are picked with a heap. Sentiment is the
+    per-chunk score of the ``sentiment`` backend (SENTIMENT_BACKEND by
+    default) weighted by the number of assessed words, which equals the
+    backend's mean over the whole text. Stopwords are those of the wiki
+    language ``lang``. Time spent tokenising, counting and scoring sentiment
+    is returned in ``timings``.
+    """
+    top_n = settings.ANALYSIS_TOP_WORDS if top_n is None else top_n
+    chunk_size = chunk_size or settings.ANALYSIS_CHUNK_SIZE
+    backend = get_sentiment_backend(sentiment)
+    stopwords = STOPWORDS_BY_LANG.get(lang, set())
+
+    word_count = 0
+    counts: Dict[str, int] = {}
+    polarity_sum = subjectivity_sum = 0.0
+    assessed = 0
+    tokenize_seconds = count_seconds = sentiment_seconds = 0.0
+    clock = time.perf_counter
+
+    for chunk in iter_chunks(content, chunk_size):
+        started = clock()
+        if backend.uses_tokens:
+            # Short tokens (no, ni, muy...) matter to the scorer but are not counted as words.
+            tokens = TOKEN_RE.findall(chunk.lower())
+            words = [token for token in tokens if len(token) >= 3]
+        else:
+            tokens = words = WORD_RE.findall(chunk.lower())
+        tokenized = clock()
+        word_count += len(words)
+        for word in words:
+            if word not in stopwords:
+                counts[word] = counts.get(word, 0) + 1
+        counted = clock()
+
+        score = backend.score(chunk, tokens)
+        polarity_sum += score.polarity * score.assessed
+        subjectivity_sum += score.subjectivity * score.assessed
+        assessed += score.assessed
+
+        tokenize_seconds += tokenized - started
+        count_seconds += counted - tokenized
+        sentiment_seconds += clock() - counted
+
+    started = clock()
+    # nlargest keeps first-seen order among ties, like Counter.most_common.
+    frequent_words = heapq.nlargest(top_n, counts.items(), key=itemgetter(1))
+    count_seconds += clock() - started
+    sentiment_polarity = polarity_sum / assessed if assessed else 0.0
+    sentiment_subjectivity = subjectivity_sum / assessed if assessed else 0.0
+
+    sentiment_label = "neutral"
+    if sentiment_polarity > 0.1:
+        sentiment_label = "positivo"
+    elif sentiment_polarity < -0.1:
+        sentiment_label = "negativo"
+
+    return ContentAnalysis(
+        word_count=word_count,
+        frequent_words=frequent_words,
+        sentiment_polarity=sentiment_polarity,
+        sentiment_subjectivity=sentiment_subjectivity,
+        sentiment_label=sentiment_label,
+        timings={"tokenize": tokenize_seconds, "count": count_seconds, "sentiment": sentiment_seconds},
+    )
+
+
+def strip_and_analyze_wikitext(wikitext: str, sentiment: Optional[str] = None,
+                               lang: str = "es") -> Tuple[str, ContentAnalysis]:
+    """Raw wikitext stripped to plain text, and analyze_content of that text."""
+    started = time.perf_counter()
+    content = strip_wikitext(wikitext)
+    stripped = time.perf_counter() - started
+    analysis = analyze_content(content, sentiment=sentiment, lang=lang)
+    # Markup stripping is reported as part of tokenising.
+    analysis.timings["tokenize"] += stripped
+    return content, analysis
+
+
+def analyze_wikitext(wikitext: str, sentiment: Optional[str] = None, lang: str = "es") -> ContentAnalysis:
+    """analyze_content for raw wikitext, stripped to plain text in the same worker."""
+    return strip_and_analyze_wikitext(wikitext, sentiment=sentiment, lang=lang)[1]
+
+
+def warm_worker() -> None:
+    """Process initializer: load the sentiment lexicons before the first real request lands."""
+    for name in SENTIMENT_BACKENDS:
+        get_sentiment_backend(name).score_batch(["warm up"])
+
+
+def _ping() -> None:
+    pass
+
+
+class AnalysisPoolSaturated(Exception):
+    """Raised instead of queueing when every worker is busy and the pending queue is full."""
+
+
+class AnalysisPool:
+    """
+    Runs analyze_content in a pool of warm worker processes.
+
+    At most ``max_pending`` analyses are queued or running at once; beyond
+    that submit() fails fast with AnalysisPoolSaturated so callers can shed
+    load instead of piling up requests. With ``workers=0`` analyses run in
+    the calling thread, as before.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending) if workers else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking a process that already runs the event loop and threads is unsafe.
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=warm_worker,
+                )
+            return self._executor
+
+    def start(self) -> None:
+        """Spawns and warms every worker up front."""
+        if not self.workers:
+            warm_worker()
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, content: str, analyzer: Callable[[str], ContentAnalysis] = analyze_content) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise AnalysisPoolSaturated()
+        try:
+            future = self._get_executor().submit(analyzer, content)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def analyze(self, content: str, analyzer: Callable[[str], ContentAnalysis] = analyze_content) -> ContentAnalysis:
+        if not self.workers:
+            analysis = analyzer(content)
+        else:
+            analysis = self.submit(content, analyzer).result()
+        observe_stages(analysis.timings)
+        return analysis
+
+    async def analyze_async(self, content: str,
+                            analyzer: Callable[[str], ContentAnalysis] = analyze_content) -> ContentAnalysis:
+        if not self.workers:
+            analysis = await run_in_threadpool(analyzer, content)
+        else:
+            analysis = await asyncio.wrap_future(self.submit(content, analyzer))
+        observe_stages(analysis.timings)
+        return analysis
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+analysis_pool = AnalysisPool(
+    workers=settings.ANALYSIS_WORKERS,
+    max_pending=settings.ANALYSIS_MAX_PENDING or max(1, settings.ANALYSIS_WORKERS) * 4,
+)
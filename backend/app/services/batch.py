@@ -0,0 +1,172 @@
+import asyncio
+from functools import partial
+from typing import AsyncIterator, List, Optional, Union
+
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.schemas.wikipedia import BatchAnalysisResult, WikipediaArticleAnalysis, WikipediaArticleDetail
+from app.services.analysis import AnalysisPoolSaturated, ContentAnalysis, analysis_pool, analyze_wikitext
+from app.services.cache import ArticleCache, article_cache
+from app.services.mediawiki import (
+    MAX_TITLES_PER_QUERY,
+    AsyncMediaWikiClient,
+    build_batch_content_params,
+    default_lang,
+    get_async_mediawiki_client,
+    map_requested_pages,
+    normalize_title,
+    page_wikitext,
+)
+from app.services.sentiment import sentiment_cache_key
+from app.services.upstream import UpstreamUnavailable
+
+
+def _ok(requested: str, title: str, url: str, revision_id: Optional[int],
+        analysis: Union[ContentAnalysis, WikipediaArticleDetail]) -> BatchAnalysisResult:
+    return BatchAnalysisResult(
+        title=requested,
+        status="ok",
+        analysis=WikipediaArticleAnalysis(
+            title=title,
+            url=url,
+            revision_id=revision_id,
+            word_count=analysis.word_count,
+            frequent_words=analysis.frequent_words,
+            sentiment_polarity=analysis.sentiment_polarity,
+            sentiment_subjectivity=analysis.sentiment_subjectivity,
+            sentiment_label=analysis.sentiment_label,
+        ),
+    )
+
+
+def _error(requested: str, error: str, detail: str) -> BatchAnalysisResult:
+    return BatchAnalysisResult(title=requested, status="error", error=error, detail=detail)
+
+
+def batch_cache_key(title: str, sentiment: str) -> str:
+    """
+    Article cache key of a batch analysis. Batches analyse the page's wikitext,
+    not the plain-text extract GET /article uses, so their word counts differ
+    slightly and they are cached apart from (and never served as) full articles.
+    """
+    return f"{sentiment_cache_key(normalize_title(title), sentiment)}#source=wikitext"
+
+
+def _cached_analysis(title: str, url: str, revision_id: Optional[int],
+                     analysis: ContentAnalysis) -> WikipediaArticleDetail:
+    # Only the analysis is kept: the batch never returns content or references.
+    return WikipediaArticleDetail.model_construct(
+        title=title, summary="", full_url=url, content="", references=[], url=url,
+        word_count=analysis.word_count, frequent_words=analysis.frequent_words,
+        sentiment_polarity=analysis.sentiment_polarity,
+        sentiment_subjectivity=analysis.sentiment_subjectivity,
+        sentiment_label=analysis.sentiment_label, revision_id=revision_id,
+    )
+
+
+class BatchArticleAnalyzer:
+    """
+    Analyses many titles at once.
+
+    Titles already fresh in the article cache are answered first. The rest are
+    fetched 50 per request as wikitext and analysed in parallel, and each
+    result is yielded as soon as it is ready and cached (see batch_cache_key).
+    Failures are reported per title and never abort the batch; a title left
+    without a result is reported as an error too.
+    """
+
+    def __init__(self, client: Optional[AsyncMediaWikiClient] = None, cache: Optional[ArticleCache] = None,
+                 lang: Optional[str] = None):
+        self.lang = lang or (client.lang if client else default_lang())
+        self.client = client or get_async_mediawiki_client(self.lang)
+        self.cache = cache or article_cache
+
+    async def analyze(self, titles: List[str], sentiment: Optional[str] = None) -> AsyncIterator[BatchAnalysisResult]:
+        sentiment = sentiment or settings.SENTIMENT_BACKEND
+        analyzer = partial(analyze_wikitext, sentiment=sentiment, lang=self.lang)
+        to_fetch = []
+        for title in dict.fromkeys(t.strip() for t in titles if t.strip()):
+            cached = self.cache.get(self.lang, batch_cache_key(title, sentiment))
+            if cached:
+                yield _ok(title, cached.title, cached.url, cached.revision_id, cached)
+            else:
+                to_fetch.append(title)
+
+        results: asyncio.Queue = asyncio.Queue()
+        fetch_slots = asyncio.Semaphore(settings.BATCH_FETCH_CONCURRENCY)
+        analysis_slots = asyncio.Semaphore(settings.BATCH_ANALYSIS_CONCURRENCY)
+
+        async def analyze_page(requested: str, page: dict) -> None:
+            async with analysis_slots:
+                try:
+                    analysis = await analysis_pool.analyze_async(page_wikitext(page) or "", analyzer)
+                except AnalysisPoolSaturated:
+                    await results.put(_error(requested, "unavailable", "El servicio de análisis está saturado."))
+                    return
+                except Exception:
+                    await results.put(_error(requested, "unavailable", "No se pudo analizar el artículo."))
+                    return
+            revisions = page.get("revisions") or [{}]
+            revision_id = revisions[0].get("revid", page.get("lastrevid"))
+            url = page.get("fullurl", "")
+            self.cache.put(self.lang, batch_cache_key(requested, sentiment),
+                           _cached_analysis(page["title"], url, revision_id, analysis))
+            await results.put(_ok(requested, page["title"], url, revision_id, analysis))
+
+        async def fetch(batch: List[str]) -> None:
+            try:
+                await fetch_batch(batch)
+            finally:
+                # Marks the batch as finished however it ended, so the stream below never waits on it.
+                results.put_nowait(None)
+
+        async def fetch_batch(batch: List[str]) -> None:
+            async with fetch_slots:
+                try:
+                    with stage_timer("fetch"):
+                        data = await self.client.query_all(build_batch_content_params(batch))
+                except UpstreamUnavailable:
+                    for requested in batch:
+                        stale = self.cache.get_stale(self.lang, batch_cache_key(requested, sentiment))
+                        if stale:
+                            await results.put(_ok(requested, stale.title, stale.url, stale.revision_id, stale))
+                        else:
+                            await results.put(_error(requested, "unavailable", "Wikipedia no está disponible en este momento."))
+                    return
+                except Exception:
+                    for requested in batch:
+                        await results.put(_error(requested, "upstream_error", "No se pudo consultar Wikipedia."))
+                    return
+
+            analyses = []
+            for requested, page in map_requested_pages(batch, data).items():
+                if page is None:
+                    await results.put(_error(requested, "not_found", f"Artículo '{requested}' no encontrado."))
+                elif "disambiguation" in page.get("pageprops", {}):
+                    await results.put(_error(
+                        requested, "disambiguation",
+                        f"'{requested}' es una página de desambiguación. Proporcione un título más específico.",
+                    ))
+                else:
+                    analyses.append(analyze_page(requested, page))
+            await asyncio.gather(*analyses, return_exceptions=True)
+
+        workers = [
+            asyncio.create_task(fetch(to_fetch[i:i + MAX_TITLES_PER_QUERY]))
+            for i in range(0, len(to_fetch), MAX_TITLES_PER_QUERY)
+        ]
+        missing = dict.fromkeys(to_fetch)
+        try:
+            finished = 0
+            while finished < len(workers):
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                    continue
+                missing.pop(result.title, None)
+                yield result
+            for requested in missing:
+                yield _error(requested, "upstream_error", "No se pudo obtener el análisis del artículo.")
+        finally:
+            for worker in workers:
+                worker.cancel()
@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.wikipedia import WikipediaArticleDetail
+from app.services.analysis import ANALYSIS_VERSION
+
+CacheKey = Tuple[str, str]
+
+
+@dataclass
+class CacheEntry:
+    article: WikipediaArticleDetail
+    revision_id: Optional[int]
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+def analysis_key() -> str:
+    """What an analysis depends on besides the page revision: the analysis code and the top-words setting."""
+    return f"v{ANALYSIS_VERSION}:top{settings.ANALYSIS_TOP_WORDS}"
+
+
+class SQLiteArticleStore:
+    """
+    Persistent tier: analysed articles keyed by language, title and page revision.
+    Rows written under another ``analysis`` key (an older ANALYSIS_VERSION or
+    another ANALYSIS_TOP_WORDS) are never served, and are replaced as the
+    pages are analysed again.
+    """
+
+    def __init__(self, path: str, analysis: Optional[str] = None):
+        self.analysis = analysis or analysis_key()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS article_cache ("
+                " lang TEXT NOT NULL, title TEXT NOT NULL, revision_id INTEGER NOT NULL,"
+                " payload TEXT NOT NULL, stored_at REAL NOT NULL, analysis TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (lang, title, revision_id))"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(article_cache)")]
+            if "analysis" not in columns:
+                # Written before the key existed, so never served.
+                self._conn.execute("ALTER TABLE article_cache ADD COLUMN analysis TEXT NOT NULL DEFAULT ''")
+
+    def get(self, lang: str, title: str, revision_id: int) -> Optional[WikipediaArticleDetail]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM article_cache WHERE lang = ? AND title = ? AND revision_id = ? AND analysis = ?",
+                (lang, title, revision_id, self.analysis),
+            ).fetchone()
+        return WikipediaArticleDetail.model_validate_json(row[0]) if row else None
+
+    def put(self, lang: str, title: str, revision_id: int, article: WikipediaArticleDetail) -> None:
+        with self._lock, self._conn:
+            # Older revisions can never be served again, only the latest one is kept.
+            self._conn.execute(
+                "DELETE FROM article_cache WHERE lang = ? AND title = ? AND revision_id != ?",
+                (lang, title, revision_id),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO article_cache (lang, title, revision_id, payload, stored_at, analysis)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (lang, title, revision_id, article.model_dump_json(), time.time(), self.analysis),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ArticleCache:
+    """
+    Two-tier cache for analysed articles.
+
+    The in-process tier is an LRU bounded by ``maxsize``. Entries older than
+    ``ttl`` are not served directly but stay around so they can be revalidated
+    against the page's current ``lastrevid`` instead of being refetched. The
+    optional persistent tier survives restarts and is looked up by revision.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, persistent: Optional[SQLiteArticleStore] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persistent = persistent
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.stale_served = 0
+
+    def get(self, lang: str, title: str) -> Optional[WikipediaArticleDetail]:
+        """Returns the article only if it is still within its TTL."""
+        key = (lang, title)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.stored_at > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.article
+
+    def has_stale(self, lang: str, title: str) -> bool:
+        with self._lock:
+            return (lang, title) in self._entries
+
+    def get_stale(self, lang: str, title: str) -> Optional[WikipediaArticleDetail]:
+        """Returns the article whatever its age; a fallback for when Wikipedia cannot be reached."""
+        with self._lock:
+            entry = self._entries.get((lang, title))
+            if entry is None:
+                return None
+            self.stale_served += 1
+            return entry.article
+
+    def get_revision(self, lang: str, title: str, revision_id: int) -> Optional[WikipediaArticleDetail]:
+        """Serves an expired entry (or the persistent tier) when the page has not changed since."""
+        key = (lang, title)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.revision_id == revision_id:
+                entry.stored_at = time.monotonic()
+                self._entries.move_to_end(key)
+                self.revalidations += 1
+                return entry.article
+
+        if self.persistent is None:
+            return None
+        article = self.persistent.get(lang, title, revision_id)
+        if article is not None:
+            self.persistent_hits += 1
+            self._store(key, CacheEntry(article, revision_id))
+        return article
+
+    def put(self, lang: str, title: str, article: WikipediaArticleDetail) -> None:
+        self._store((lang, title), CacheEntry(article, article.revision_id))
+        if self.persistent is not None and article.revision_id is not None:
+            self.persistent.put(lang, title, article.revision_id, article)
+
+    def _store(self, key: CacheKey, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "persistent_hits": self.persistent_hits,
+                "evictions": self.evictions,
+                "stale_served": self.stale_served,
+            }
+
+
+article_cache = ArticleCache(
+    maxsize=settings.ARTICLE_CACHE_SIZE,
+    ttl=settings.ARTICLE_CACHE_TTL,
+    persistent=SQLiteArticleStore(settings.ARTICLE_CACHE_PATH) if settings.ARTICLE_CACHE_PATH else None,
+)
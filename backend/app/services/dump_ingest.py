@@ -0,0 +1,403 @@
+"""
+Offline analysis of a Wikipedia XML dump (``eswiki-*-pages-articles.xml.bz2``).
+
+Streams the dump with an iterative XML parser, clearing every page once it
+has been read, so memory stays flat however large the dump is. Articles
+(main namespace, no redirects or disambiguation pages) are stripped to plain
+text and analysed with the same wikitext analysis as the batch endpoint
+(app.services.analysis), in a pool of worker processes, and written in
+batches to the ``articles`` table, a JSONL file or a directory of Parquet
+files.
+
+After each batch is written a checkpoint records how far into the dump the
+run got, as a count of <page> elements; running the same command again
+resumes from there. Resuming still reads the dump from the start, so it is
+O(dump): the pages before the checkpoint are parsed but not analysed or
+written. A byte offset would not help much, since a .bz2 stream cannot be
+seeked without decompressing everything before the offset anyway.
+
+    python -m app.services.dump_ingest eswiki-latest-pages-articles.xml.bz2 --jsonl articles.jsonl
+    python -m app.services.dump_ingest eswiki-latest-pages-articles.xml.bz2 --database --user-id 1
+    python -m app.services.dump_ingest eswiki-latest-pages-articles.xml.bz2 --parquet out/ --limit 50000
+"""
+import argparse
+import bz2
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from xml.etree.ElementTree import iterparse
+
+from app.services.analysis import strip_and_analyze_wikitext, warm_worker
+from app.services.sentiment import SENTIMENT_BACKENDS
+from app.services.mediawiki import page_intro
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for --parquet
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+_DISAMBIGUATION = re.compile(r'\{\{\s*(?:desambiguaci[oó]n|des|disambig)\s*[|}]', re.IGNORECASE)
+
+
+@dataclass
+class DumpPage:
+    position: int
+    title: str
+    pageid: int
+    revision_id: Optional[int]
+    wikitext: str
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element, name: str) -> Optional[str]:
+    for child in element:
+        if _local(child.tag) == name:
+            return child.text
+    return None
+
+
+def _child(element, name: str):
+    for child in element:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def open_dump(path: str):
+    """The dump as a binary stream, decompressing .bz2 files on the fly."""
+    return bz2.open(path, "rb") if path.endswith(".bz2") else open(path, "rb")
+
+
+def iter_dump_pages(stream, skip: int = 0) -> Iterator[Tuple[int, Optional[DumpPage]]]:
+    """
+    Yields ``(position, page)`` for every <page> in the dump, ``page`` being
+    None for pages that are not articles. ``position`` counts every <page>
+    from 1, and the first ``skip`` are parsed but passed over without being
+    read.
+    """
+    context = iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    position = 0
+    for event, element in context:
+        if event != "end" or _local(element.tag) != "page":
+            continue
+        position += 1
+        page = None
+        if position > skip:
+            revision = _child(element, "revision")
+            text = _child_text(revision, "text") if revision is not None else None
+            if (_child_text(element, "ns") == "0" and _child(element, "redirect") is None
+                    and text and not _DISAMBIGUATION.search(text)):
+                revision_id = _child_text(revision, "id")
+                page = DumpPage(
+                    position=position,
+                    title=_child_text(element, "title"),
+                    pageid=int(_child_text(element, "id")),
+                    revision_id=int(revision_id) if revision_id else None,
+                    wikitext=text,
+                )
+        # Drop what has been read so far, including the page just handled.
+        root.clear()
+        yield position, page
+
+
+def page_url(lang: str, title: str) -> str:
+    return f"https://{lang}.wikipedia.org/wiki/" + quote(title.replace(" ", "_"))
+
+
+def analyze_dump_pages(pages: List[DumpPage], lang: str = "es", sentiment: Optional[str] = None) -> List[dict]:
+    """Runs in a worker: the same wikitext analysis as the batch endpoint."""
+    records = []
+    for page in pages:
+        content, analysis = strip_and_analyze_wikitext(page.wikitext, sentiment=sentiment, lang=lang)
+        records.append({
+            "title": page.title,
+            "pageid": page.pageid,
+            "revision_id": page.revision_id,
+            "url": page_url(lang, page.title),
+            "summary": page_intro(content),
+            "word_count": analysis.word_count,
+            "frequent_words": [list(item) for item in analysis.frequent_words],
+            "sentiment_polarity": analysis.sentiment_polarity,
+            "sentiment_subjectivity": analysis.sentiment_subjectivity,
+            "sentiment_label": analysis.sentiment_label,
+        })
+    return records
+
+
+@dataclass
+class Checkpoint:
+    dump: str
+    position: int = 0
+    written: int = 0
+    # Size of the output file at the checkpoint, so a resumed run can drop half-written batches.
+    output_size: Optional[int] = None
+    finished: bool = False
+
+    @classmethod
+    def load(cls, path: str, dump: str) -> "Checkpoint":
+        if not os.path.exists(path):
+            return cls(dump=os.path.basename(dump))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dump") != os.path.basename(dump):
+            raise SystemExit(f"{path} belongs to {data.get('dump')}, not {dump}; remove it to start over.")
+        return cls(**data)
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+class JsonlSink:
+    """One JSON object per line, appended; on resume the file is cut back to the checkpoint."""
+
+    def __init__(self, path: str, resume_size: Optional[int] = None):
+        self.path = path
+        self._file = open(path, "ab")
+        if resume_size is not None:
+            self._file.truncate(resume_size)
+        else:
+            self._file.truncate(0)
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, records: List[dict], position: int) -> None:
+        self._file.write(b"".join(
+            json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records
+        ))
+
+    def commit(self) -> Optional[int]:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """A Parquet file per batch, named after the batch's last dump position, so reruns overwrite them."""
+
+    def __init__(self, directory: str):
+        if pyarrow is None:
+            raise SystemExit("--parquet needs pyarrow: poetry install -E parquet")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, records: List[dict], position: int) -> None:
+        if not records:
+            return
+        rows = [
+            dict(record, frequent_words=[{"word": w, "count": c} for w, c in record["frequent_words"]])
+            for record in records
+        ]
+        path = os.path.join(self.directory, f"part-{position:010d}.parquet")
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+
+    def commit(self) -> Optional[int]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class DatabaseSink:
+    """Upserts each batch into the articles table for ``user_id``; re-writing a batch is harmless."""
+
+    def __init__(self, user_id: int, session_factory: Optional[Callable] = None):
+        from app.database.session import SessionLocal
+
+        self.user_id = user_id
+        self.session_factory = session_factory or SessionLocal
+
+    def write(self, records: List[dict], position: int) -> None:
+        from app.crud.article import article_crud
+        from app.schemas.article import ArticleCreate
+
+        articles = [
+            ArticleCreate(
+                wikipedia_title=record["title"],
+                wikipedia_url=record["url"],
+                processed_summary=record["summary"],
+                word_count=record["word_count"],
+                frequent_words=record["frequent_words"],
+                sentiment_polarity=record["sentiment_polarity"],
+                sentiment_subjectivity=record["sentiment_subjectivity"],
+                sentiment_label=record["sentiment_label"],
+                user_id=self.user_id,
+            )
+            for record in records
+        ]
+        if articles:
+            with self.session_factory() as db:
+                article_crud.bulk_upsert_articles(db, articles)
+
+    def commit(self) -> Optional[int]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class DumpIngestion:
+    """
+    Reads pages, analyses them ``batch_size`` at a time on ``workers``
+    processes (0 analyses inline) and writes the batches in dump order,
+    saving a checkpoint after each one. At most ``max_pending`` batches are
+    in flight, which bounds memory while keeping every worker busy.
+    """
+
+    def __init__(self, dump: str, sink, checkpoint_path: str, checkpoint: Checkpoint,
+                 workers: int = 0, batch_size: int = 200, max_pending: Optional[int] = None,
+                 limit: Optional[int] = None, lang: str = "es", progress_interval: float = 10.0,
+                 sentiment: Optional[str] = None):
+        self.dump = dump
+        self.sink = sink
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending or max(1, workers) * 2
+        self.limit = limit
+        self.lang = lang
+        self.sentiment = sentiment
+        self.progress_interval = progress_interval
+        self.analysed = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+
+    def _batches(self, stream) -> Iterator[Tuple[int, List[DumpPage]]]:
+        batch: List[DumpPage] = []
+        position = self.checkpoint.position
+        for position, page in iter_dump_pages(stream, skip=self.checkpoint.position):
+            if page is not None:
+                batch.append(page)
+                self.analysed += 1
+            if len(batch) >= self.batch_size:
+                yield position, batch
+                batch = []
+            if self.limit is not None and self.analysed >= self.limit:
+                break
+        yield position, batch
+
+    def _flush(self, position: int, records: List[dict]) -> None:
+        self.sink.write(records, position)
+        self.checkpoint.output_size = self.sink.commit()
+        self.checkpoint.position = position
+        self.checkpoint.written += len(records)
+        self.checkpoint.save(self.checkpoint_path)
+        self._report()
+
+    def _report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        elapsed = max(now - self._started, 1e-9)
+        logger.info(
+            "dump position %d, %d articles written in total, %.1f articles/s this run",
+            self.checkpoint.position, self.checkpoint.written, self.analysed / elapsed,
+        )
+
+    def run(self) -> Checkpoint:
+        if self.checkpoint.finished:
+            logger.info("%s was already fully ingested", self.dump)
+            return self.checkpoint
+        if self.checkpoint.position:
+            logger.info("resuming after dump position %d", self.checkpoint.position)
+
+        executor = None
+        if self.workers:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_worker,
+            )
+        pending: Deque[Tuple[int, Future]] = deque()
+        try:
+            with open_dump(self.dump) as stream:
+                for position, batch in self._batches(stream):
+                    if executor is None:
+                        self._flush(position, analyze_dump_pages(batch, self.lang, self.sentiment))
+                        continue
+                    pending.append((position, executor.submit(analyze_dump_pages, batch, self.lang, self.sentiment)))
+                    while len(pending) >= self.max_pending:
+                        done_position, future = pending.popleft()
+                        self._flush(done_position, future.result())
+            while pending:
+                done_position, future = pending.popleft()
+                self._flush(done_position, future.result())
+            self.checkpoint.finished = self.limit is None
+            self.checkpoint.save(self.checkpoint_path)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.sink.close()
+        self._report(force=True)
+        return self.checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dump", help="Path to a pages-articles XML dump, .bz2 or uncompressed")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--jsonl", metavar="PATH", help="Write one JSON object per article to PATH")
+    output.add_argument("--parquet", metavar="DIR", help="Write Parquet files into DIR (needs pyarrow)")
+    output.add_argument("--database", action="store_true", help="Upsert into the articles table (DATABASE_URL)")
+    parser.add_argument("--user-id", type=int, default=None, help="Owner of the saved articles, with --database")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Analysis processes; 0 runs inline")
+    parser.add_argument("--batch-size", type=int, default=200, help="Articles per analysis task and per write")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many articles")
+    parser.add_argument("--lang", default="es", help="Wiki language, for article URLs and stopwords")
+    parser.add_argument("--sentiment", choices=sorted(SENTIMENT_BACKENDS), default=None,
+                        help="Sentiment backend (default: SENTIMENT_BACKEND)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: next to the output)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.database and args.user_id is None:
+        parser.error("--database needs --user-id")
+    checkpoint_path = args.checkpoint or (
+        f"{args.jsonl or args.parquet.rstrip('/')}.checkpoint.json" if not args.database
+        else f"{os.path.basename(args.dump)}.user-{args.user_id}.checkpoint.json"
+    )
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint.load(checkpoint_path, args.dump)
+
+    if args.jsonl:
+        sink = JsonlSink(args.jsonl, resume_size=checkpoint.output_size if checkpoint.position else None)
+    elif args.parquet:
+        sink = ParquetSink(args.parquet)
+    else:
+        sink = DatabaseSink(args.user_id)
+
+    DumpIngestion(
+        args.dump, sink, checkpoint_path, checkpoint,
+        workers=args.workers, batch_size=args.batch_size, limit=args.limit, lang=args.lang,
+        progress_interval=args.progress_interval, sentiment=args.sentiment,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
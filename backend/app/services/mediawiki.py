@@ -0,0 +1,420 @@
+import asyncio
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import upstream_call
+from app.services.upstream import UpstreamGovernor, get_upstream_governor
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+# MediaWiki caps multi-title queries at 50 titles for regular clients.
+MAX_TITLES_PER_QUERY = 50
+
+
+@dataclass
+class ResolvedTitle:
+    title: str
+    pageid: Optional[int] = None
+    url: Optional[str] = None
+    revision_id: Optional[int] = None
+
+
+def default_lang() -> str:
+    """The first of WIKIPEDIA_LANGUAGES."""
+    return settings.WIKIPEDIA_LANGUAGES[0] if settings.WIKIPEDIA_LANGUAGES else "es"
+
+
+def normalize_title(title: str) -> str:
+    """Applies MediaWiki's title normalization so equivalent spellings share cache entries."""
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def normalize_query(query: str) -> str:
+    """Search is case-insensitive upstream, so queries differing only in case or spacing are the same."""
+    return " ".join(query.lower().split())
+
+
+def build_resolve_params(titles: List[str]) -> dict:
+    return {
+        "titles": "|".join(titles),
+        "prop": "info|pageprops",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        "redirects": 1,
+    }
+
+
+def build_search_params(query: str, limit: int) -> dict:
+    """Searches and resolves the hits to pageid/URL in the same request."""
+    return {
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": limit,
+        "prop": "info|pageprops",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+    }
+
+
+def build_title_search_params(query: str, limit: int) -> dict:
+    """Only the titles of the search hits, like wikipedia.search()."""
+    return {"list": "search", "srsearch": query, "srlimit": limit, "srprop": ""}
+
+
+def parse_search_response(data: dict) -> List[ResolvedTitle]:
+    pages = sorted(data.get("query", {}).get("pages", []), key=lambda page: page.get("index", 0))
+    results = []
+    for page in pages:
+        if "disambiguation" in page.get("pageprops", {}):
+            results.append(ResolvedTitle(title=page["title"]))
+        else:
+            results.append(ResolvedTitle(title=page["title"], pageid=page.get("pageid"), url=page.get("fullurl")))
+    return results
+
+
+# Optional parts of an article query: the whole plain-text extract, just its intro, the external links.
+# Title, canonical URL, pageid, lastrevid and the disambiguation flag come with every query.
+ARTICLE_PROPS: FrozenSet[str] = frozenset({"extract", "extlinks"})
+
+# WikipediaArticleDetail fields that need one of the optional props; the rest only need info.
+FIELD_PROPS = {
+    "content": "extract",
+    "word_count": "extract",
+    "frequent_words": "extract",
+    "sentiment_polarity": "extract",
+    "sentiment_subjectivity": "extract",
+    "sentiment_label": "extract",
+    "summary": "intro",
+    "references": "extlinks",
+}
+
+
+def article_props(fields: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+    """The optional props needed to fill ``fields`` (every field when None)."""
+    if fields is None:
+        return ARTICLE_PROPS
+    props = {FIELD_PROPS[name] for name in fields if name in FIELD_PROPS}
+    if "extract" in props:
+        # The intro is cut from the whole extract.
+        props.discard("intro")
+    return frozenset(props)
+
+
+def build_page_params(title: str, props: Iterable[str] = ARTICLE_PROPS) -> dict:
+    """
+    One action=query call for everything about an article: info and page
+    props always, plus the extract (or only its intro) and the external
+    links when ``props`` asks for them. Redirects are followed in the same call.
+    """
+    props = set(props)
+    prop = ["info", "pageprops"]
+    params = {"titles": title, "inprop": "url", "ppprop": "disambiguation", "redirects": 1}
+    if props & {"extract", "intro"}:
+        prop.insert(0, "extracts")
+        params["explaintext"] = 1
+        if "extract" not in props:
+            params["exintro"] = 1
+    if "extlinks" in props:
+        prop.append("extlinks")
+        params["ellimit"] = "max"
+    params["prop"] = "|".join(prop)
+    return params
+
+
+def build_suggest_params(title: str) -> dict:
+    """Mirrors wikipedia.page(auto_suggest=True): the spelling suggestion or the best search hit."""
+    return {"list": "search", "srsearch": title, "srlimit": 1, "srinfo": "suggestion"}
+
+
+def parse_suggestion(data: dict) -> Optional[str]:
+    search = data.get("query", {})
+    if search.get("searchinfo", {}).get("suggestion"):
+        return search["searchinfo"]["suggestion"]
+    hits = search.get("search", [])
+    return hits[0]["title"] if hits else None
+
+
+def build_links_params(title: str, limit: int = 5) -> dict:
+    """The first article links of a page, i.e. the options of a disambiguation page."""
+    return {"titles": title, "prop": "links", "plnamespace": 0, "pllimit": limit}
+
+
+def first_page(data: dict) -> Optional[dict]:
+    """Returns the single page of a one-title query, or None when it does not exist."""
+    pages = data.get("query", {}).get("pages", [])
+    if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+        return None
+    return pages[0]
+
+
+def page_intro(content: str) -> str:
+    """Plain-text extracts mark sections with "== Heading ==", the intro is what comes before."""
+    return content.split("\n==", 1)[0].strip()
+
+
+def page_links(page: dict) -> List[str]:
+    return [link["title"] for link in page.get("links", [])]
+
+
+def page_references(page: dict) -> List[str]:
+    references = []
+    for link in page.get("extlinks", []):
+        url = link.get("url", "")
+        references.append("http:" + url if url.startswith("//") else url)
+    return references
+
+
+def build_batch_content_params(titles: List[str]) -> dict:
+    """
+    Wikitext, revision and URL of up to 50 pages in one request.
+
+    Plain-text extracts of whole pages are limited to one title per request,
+    so multi-title fetches read the wikitext of the latest revision instead.
+    """
+    return {
+        "titles": "|".join(titles),
+        "prop": "revisions|info|pageprops",
+        "rvprop": "content|ids",
+        "rvslots": "main",
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        "redirects": 1,
+    }
+
+
+def page_wikitext(page: dict) -> Optional[str]:
+    revisions = page.get("revisions") or []
+    if not revisions:
+        return None
+    return revisions[0].get("slots", {}).get("main", {}).get("content")
+
+
+def map_requested_pages(titles: List[str], data: dict) -> Dict[str, Optional[dict]]:
+    """Maps every requested title to the page it ends up at after normalization and redirects."""
+    query = data.get("query", {})
+    aliases = {}
+    for entry in query.get("normalized", []) + query.get("redirects", []):
+        aliases[entry["from"]] = entry["to"]
+
+    pages = {page["title"]: page for page in query.get("pages", [])}
+
+    mapped = {}
+    for title in titles:
+        target = title
+        seen = set()
+        while target in aliases and target not in seen:
+            seen.add(target)
+            target = aliases[target]
+
+        page = pages.get(target)
+        mapped[title] = None if not page or page.get("missing") or page.get("invalid") else page
+    return mapped
+
+
+def merge_continued_pages(pages: Dict[str, dict], data: dict) -> None:
+    """
+    Adds the pages of one part of a continued query to ``pages`` (by title).
+    Lists, such as the next external links of a page, are appended; other
+    fields are kept from the part that returned them first.
+    """
+    for page in data.get("query", {}).get("pages", []):
+        known = pages.setdefault(page["title"], page)
+        if known is page:
+            continue
+        for key, value in page.items():
+            if isinstance(value, list) and isinstance(known.get(key), list):
+                known[key] = known[key] + value
+            else:
+                known.setdefault(key, value)
+
+
+def parse_resolve_response(titles: List[str], data: dict) -> Dict[str, ResolvedTitle]:
+    resolved = {}
+    for title, page in map_requested_pages(titles, data).items():
+        if page is None:
+            continue
+        if "disambiguation" in page.get("pageprops", {}):
+            continue
+        resolved[title] = ResolvedTitle(
+            title=page["title"],
+            pageid=page.get("pageid"),
+            url=page.get("fullurl"),
+            revision_id=page.get("lastrevid"),
+        )
+    return resolved
+
+
+class MediaWikiClient:
+    """
+    Blocking client for the MediaWiki action API that reuses pooled connections.
+
+    Requests go through the language's UpstreamGovernor, so they may wait,
+    be retried or raise UpstreamUnavailable.
+    """
+
+    def __init__(self, lang: str = "es", timeout: float = settings.WIKIPEDIA_TIMEOUT,
+                 governor: Optional[UpstreamGovernor] = None):
+        # requests loads with the first blocking client rather than with the app.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.lang = lang
+        self.api_url = settings.WIKIPEDIA_API_URL_TEMPLATE.format(lang=lang)
+        self.timeout = timeout
+        self.governor = governor or get_upstream_governor(lang)
+        self.transient_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = settings.WIKIPEDIA_USER_AGENT
+        adapter = HTTPAdapter(pool_maxsize=max(settings.WIKIPEDIA_RESOLVE_WORKERS, 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def query(self, params: dict, timeout: Optional[float] = None) -> dict:
+        request_params = {"action": "query", "format": "json", "formatversion": 2}
+        request_params.update(params)
+        timeout = timeout if timeout is not None else self.timeout
+
+        def send() -> "requests.Response":
+            with upstream_call("sync"):
+                response = self.session.get(self.api_url, params=request_params, timeout=timeout)
+                response.raise_for_status()
+                return response
+
+        return self.governor.call(send, timeout, self.transient_errors).json()
+
+    def query_all(self, params: dict) -> dict:
+        """Follows ``continue`` until the result is complete, merging the pages of every part."""
+        data = self.query(params)
+        query = data.get("query", {})
+        pages = {page["title"]: page for page in query.get("pages", [])}
+        while "continue" in data:
+            data = self.query({**params, **data["continue"]})
+            merge_continued_pages(pages, data)
+        query["pages"] = list(pages.values())
+        return {"query": query}
+
+    def resolve_titles(self, titles: List[str], timeout: Optional[float] = None) -> Dict[str, ResolvedTitle]:
+        """Resolves up to 50 titles to their pageid and canonical URL in a single request."""
+        if not titles:
+            return {}
+        data = self.query(build_resolve_params(titles), timeout=timeout)
+        return parse_resolve_response(titles, data)
+
+    def search_titles(self, query: str, limit: int, timeout: Optional[float] = None) -> List[str]:
+        data = self.query(build_title_search_params(query, limit), timeout=timeout)
+        return [hit["title"] for hit in data.get("query", {}).get("search", [])]
+
+
+class AsyncMediaWikiClient:
+    """
+    asyncio client for the MediaWiki action API on a shared, keep-alive httpx pool.
+
+    Pooled connections belong to the event loop that opened them, so each
+    loop (e.g. a test client) transparently gets its own pool. Requests share
+    the language's UpstreamGovernor with the blocking client.
+    """
+
+    def __init__(self, lang: str = "es", timeout: float = settings.WIKIPEDIA_TIMEOUT,
+                 governor: Optional[UpstreamGovernor] = None):
+        self.lang = lang
+        self.api_url = settings.WIKIPEDIA_API_URL_TEMPLATE.format(lang=lang)
+        self.timeout = timeout
+        self.governor = governor or get_upstream_governor(lang)
+        # One pool per event loop, so e.g. the warm-up loop and the app's loop
+        # can share the client; aclose() closes them all.
+        self._http: Dict[asyncio.AbstractEventLoop, "httpx.AsyncClient"] = {}
+
+    def _get_http_client(self) -> "httpx.AsyncClient":
+        # httpx loads with the first asyncio request rather than with the app.
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        http = self._http.get(loop)
+        if http is None:
+            # A loop closed without aclose() can no longer close its pool's
+            # connections; dropping the pool lets their sockets be collected.
+            for closed in [other for other in self._http if other.is_closed()]:
+                del self._http[closed]
+            http = self._http[loop] = httpx.AsyncClient(
+                headers={"User-Agent": settings.WIKIPEDIA_USER_AGENT},
+                timeout=httpx.Timeout(self.timeout, connect=settings.WIKIPEDIA_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.WIKIPEDIA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.WIKIPEDIA_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.WIKIPEDIA_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return http
+
+    async def query(self, params: dict, timeout: Optional[float] = None) -> dict:
+        import httpx
+
+        request_params = {"action": "query", "format": "json", "formatversion": 2}
+        request_params.update(params)
+
+        async def send() -> "httpx.Response":
+            with upstream_call("async"):
+                response = await self._get_http_client().get(
+                    self.api_url,
+                    params=request_params,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+                response.raise_for_status()
+                return response
+
+        response = await self.governor.call_async(
+            send, timeout if timeout is not None else self.timeout, (httpx.TransportError,)
+        )
+        return response.json()
+
+    async def resolve_titles(self, titles: List[str], timeout: Optional[float] = None) -> Dict[str, ResolvedTitle]:
+        if not titles:
+            return {}
+        data = await self.query(build_resolve_params(titles), timeout=timeout)
+        return parse_resolve_response(titles, data)
+
+    async def query_all(self, params: dict) -> dict:
+        """Follows ``continue`` until the result is complete, merging the pages of every part."""
+        data = await self.query(params)
+        query = data.get("query", {})
+        pages = {page["title"]: page for page in query.get("pages", [])}
+        while "continue" in data:
+            data = await self.query({**params, **data["continue"]})
+            merge_continued_pages(pages, data)
+        query["pages"] = list(pages.values())
+        return {"query": query}
+
+    async def aclose(self) -> None:
+        """Closes the pool of every loop still running, each on its own loop."""
+        current = asyncio.get_running_loop()
+        pools, self._http = self._http, {}
+        for loop, http in pools.items():
+            if loop is current:
+                await http.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(http.aclose(), loop))
+
+
+@lru_cache(maxsize=None)
+def get_mediawiki_client(lang: str = "es") -> MediaWikiClient:
+    return MediaWikiClient(lang)
+
+
+_async_clients: Dict[str, AsyncMediaWikiClient] = {}
+
+
+def get_async_mediawiki_client(lang: str = "es") -> AsyncMediaWikiClient:
+    if lang not in _async_clients:
+        _async_clients[lang] = AsyncMediaWikiClient(lang)
+    return _async_clients[lang]
+
+
+async def close_async_mediawiki_clients() -> None:
+    """Closes the pooled connections of every shared asyncio client."""
+    for client in _async_clients.values():
+        await client.aclose()
@@ -0,0 +1,123 @@
+"""
+Sentiment backends for the article analysis.
+
+A backend scores a piece of text from the text itself and/or the tokens
+analyze_content already extracted from it (lowercased words of any length),
+returning polarity, subjectivity and how many words it assessed, so scores
+of consecutive chunks can be combined into the score of the whole text.
+score_batch scores many documents at once.
+
+- ``textblob``: TextBlob's pattern analyzer (English lexicon), the original
+  behaviour; it works on the text and ignores the tokens.
+- ``lexicon_es``: dictionary lookups of the tokens in a Spanish lexicon,
+  with negation and intensifiers; no parsing, so much faster on long pages.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from app.core.config import settings
+from app.services.sentiment_lexicon_es import INTENSIFIERS, NEGATORS, load_lexicon
+
+TOKEN_RE = re.compile(r'\b[a-zA-Záéíóúñ]+\b')
+
+
+class SentimentScore(NamedTuple):
+    polarity: float
+    subjectivity: float
+    # Words that carried sentiment; the weight of this score when averaging chunks.
+    assessed: int
+
+
+class SentimentBackend(ABC):
+    name: str
+    # Whether score() reads the tokens; analyze_content only extracts short ones for backends that do.
+    uses_tokens = True
+
+    @abstractmethod
+    def score(self, text: str, tokens: Sequence[str]) -> SentimentScore:
+        """Sentiment of ``text``, whose lowercased words are ``tokens``."""
+
+    def score_batch(self, documents: Sequence[str]) -> List[SentimentScore]:
+        return [self.score(document, TOKEN_RE.findall(document.lower())) for document in documents]
+
+
+class TextBlobSentiment(SentimentBackend):
+    name = "textblob"
+    uses_tokens = False
+
+    def score(self, text: str, tokens: Sequence[str]) -> SentimentScore:
+        # The analyzer behind TextBlob(...).sentiment, without building a TextBlob.
+        from textblob.en import sentiment as pattern_sentiment
+
+        result = pattern_sentiment(text)
+        return SentimentScore(result[0], result[1], len(result.assessments))
+
+
+class SpanishLexiconSentiment(SentimentBackend):
+    """
+    Mean polarity and subjectivity of the tokens found in a Spanish lexicon.
+
+    An intensifier (muy, sumamente, poco...) scales the next sentiment word;
+    a negator (no, nunca, sin...) flips and halves the sentiment words within
+    the next ``negation_window`` tokens, as pattern does for English.
+    """
+    name = "lexicon_es"
+
+    def __init__(self, lexicon: Optional[Dict[str, tuple]] = None, negation_window: int = 3):
+        self.lexicon = lexicon if lexicon is not None else load_lexicon()
+        self.negation_window = negation_window
+        self._modifiers = NEGATORS | INTENSIFIERS.keys()
+
+    def score(self, text: str, tokens: Sequence[str]) -> SentimentScore:
+        lexicon, modifiers = self.lexicon, self._modifiers
+        polarity_sum = subjectivity_sum = 0.0
+        assessed = 0
+        negated_until = -1
+        boost, boosted_at = 1.0, -2
+        for i, token in enumerate(tokens):
+            entry = lexicon.get(token)
+            if entry is None:
+                if token in modifiers:
+                    if token in NEGATORS:
+                        negated_until = i + self.negation_window
+                    else:
+                        boost, boosted_at = INTENSIFIERS[token], i
+                continue
+            polarity, subjectivity = entry
+            if boosted_at == i - 1:
+                polarity = max(-1.0, min(1.0, polarity * boost))
+                subjectivity = min(1.0, subjectivity * boost)
+            if i <= negated_until:
+                polarity *= -0.5
+            polarity_sum += polarity
+            subjectivity_sum += subjectivity
+            assessed += 1
+        if not assessed:
+            return SentimentScore(0.0, 0.0, 0)
+        return SentimentScore(polarity_sum / assessed, subjectivity_sum / assessed, assessed)
+
+
+SENTIMENT_BACKENDS = {backend.name: backend for backend in (TextBlobSentiment, SpanishLexiconSentiment)}
+_instances: Dict[str, SentimentBackend] = {}
+
+
+def get_sentiment_backend(name: Optional[str] = None) -> SentimentBackend:
+    """The shared instance of backend ``name`` (SENTIMENT_BACKEND by default), built on first use."""
+    name = name or settings.SENTIMENT_BACKEND
+    backend = _instances.get(name)
+    if backend is None:
+        try:
+            backend = _instances[name] = SENTIMENT_BACKENDS[name]()
+        except KeyError:
+            raise ValueError(f"unknown sentiment backend {name!r}; expected one of {sorted(SENTIMENT_BACKENDS)}")
+    return backend
+
+
+def sentiment_cache_key(key: str, backend: Optional[str] = None) -> str:
+    """
+    Article cache key for an analysis scored with ``backend``. TextBlob
+    analyses keep the plain title key they always had.
+    """
+    name = backend or settings.SENTIMENT_BACKEND
+    return key if name == TextBlobSentiment.name else f"{key}#sentiment={name}"
@@ -0,0 +1,299 @@
+"""
+Spanish sentiment lexicon for app.services.sentiment.SpanishLexiconSentiment.
+
+One lemma per line: ``lemma polarity subjectivity``, polarity in [-1, 1] and
+subjectivity in [0, 1], in the spirit of the pattern lexicon TextBlob uses
+for English. Lemmas are written without inflection; expand_forms adds the
+feminine and plural forms, so ``bueno`` also covers buena, buenos, buenas.
+"""
+from typing import Dict, Iterator, Tuple
+
+LEMMAS = """
+abundante 0.3 0.4
+aburrido -0.5 0.8
+aceptable 0.2 0.5
+acertado 0.5 0.5
+adecuado 0.3 0.4
+admirable 0.7 0.8
+admiración 0.6 0.7
+adorable 0.7 0.9
+agradable 0.6 0.7
+agresivo -0.5 0.6
+alegre 0.6 0.8
+alegría 0.7 0.8
+amable 0.6 0.7
+amenaza -0.5 0.5
+amistad 0.5 0.5
+amor 0.6 0.7
+amplio 0.2 0.3
+angustia -0.6 0.8
+ansiedad -0.5 0.7
+apasionante 0.7 0.9
+aplauso 0.5 0.6
+asesinato -0.8 0.5
+asombroso 0.7 0.9
+atractivo 0.5 0.7
+atroz -0.9 0.9
+avance 0.4 0.3
+bello 0.7 0.9
+belleza 0.7 0.8
+beneficio 0.5 0.4
+beneficioso 0.5 0.5
+bienestar 0.5 0.5
+brillante 0.7 0.8
+bueno 0.6 0.6
+calamidad -0.8 0.7
+calidad 0.3 0.4
+cálido 0.4 0.6
+caos -0.6 0.6
+catástrofe -0.8 0.7
+catastrófico -0.8 0.8
+célebre 0.4 0.5
+celebración 0.5 0.5
+claro 0.2 0.4
+cómodo 0.4 0.6
+conflicto -0.5 0.4
+confuso -0.4 0.7
+contaminación -0.5 0.4
+correcto 0.3 0.4
+corrupción -0.7 0.5
+corrupto -0.7 0.7
+cruel -0.8 0.9
+crueldad -0.8 0.8
+crisis -0.5 0.4
+culpa -0.4 0.6
+daño -0.6 0.5
+débil -0.3 0.5
+decadencia -0.5 0.5
+decepción -0.6 0.8
+decepcionante -0.6 0.9
+defecto -0.4 0.5
+delicioso 0.7 0.9
+derrota -0.5 0.4
+desastre -0.7 0.7
+desastroso -0.8 0.8
+desafortunado -0.5 0.7
+desagradable -0.6 0.8
+descubrimiento 0.4 0.3
+desgracia -0.6 0.7
+desigualdad -0.5 0.5
+destacado 0.5 0.5
+destrucción -0.7 0.5
+destructivo -0.7 0.6
+difícil -0.3 0.5
+dificultad -0.3 0.4
+digno 0.4 0.5
+discriminación -0.6 0.5
+disfrutar 0.6 0.7
+divertido 0.6 0.8
+doloroso -0.6 0.8
+dolor -0.6 0.7
+dramático -0.3 0.7
+eficaz 0.5 0.4
+eficiente 0.5 0.4
+elegante 0.6 0.8
+emocionante 0.6 0.9
+encantador 0.7 0.9
+enemigo -0.4 0.4
+enfermedad -0.5 0.3
+enorme 0.2 0.5
+entusiasmo 0.6 0.8
+épico 0.6 0.8
+error -0.4 0.4
+escándalo -0.6 0.6
+espantoso -0.8 0.9
+espectacular 0.7 0.8
+espléndido 0.8 0.9
+estable 0.3 0.3
+estupendo 0.8 0.9
+éxito 0.6 0.5
+exitoso 0.6 0.6
+excelente 0.9 0.9
+excepcional 0.8 0.8
+extraordinario 0.7 0.8
+fabuloso 0.8 0.9
+fácil 0.3 0.5
+falso -0.4 0.6
+famoso 0.4 0.5
+fantástico 0.8 0.9
+favorable 0.5 0.5
+favorito 0.5 0.8
+feliz 0.7 0.9
+felicidad 0.7 0.8
+feo -0.5 0.8
+fértil 0.3 0.3
+fiel 0.4 0.5
+fracaso -0.6 0.6
+fraude -0.7 0.5
+fuerte 0.2 0.4
+genial 0.8 0.9
+generoso 0.6 0.7
+glorioso 0.7 0.8
+gracioso 0.5 0.8
+grandioso 0.7 0.8
+grato 0.6 0.7
+grave -0.5 0.5
+guerra -0.6 0.3
+hambre -0.5 0.4
+hermoso 0.7 0.9
+héroe 0.5 0.5
+heroico 0.6 0.7
+horrible -0.8 0.9
+horror -0.8 0.8
+hostil -0.6 0.7
+ideal 0.6 0.7
+ilegal -0.5 0.4
+impactante 0.3 0.8
+importante 0.3 0.5
+imposible -0.4 0.6
+impresionante 0.7 0.8
+incapaz -0.4 0.6
+incendio -0.5 0.3
+incómodo -0.4 0.7
+increíble 0.6 0.9
+influyente 0.4 0.5
+injusticia -0.7 0.7
+injusto -0.6 0.8
+innovador 0.5 0.5
+inquietante -0.5 0.8
+insoportable -0.8 0.9
+inteligente 0.6 0.7
+interesante 0.5 0.7
+inútil -0.6 0.7
+invasión -0.5 0.3
+inválido -0.3 0.4
+justo 0.4 0.5
+lamentable -0.6 0.8
+leal 0.5 0.6
+legendario 0.5 0.6
+lento -0.2 0.5
+libertad 0.5 0.5
+limpio 0.3 0.5
+lindo 0.6 0.8
+lujoso 0.5 0.6
+magnífico 0.8 0.9
+malo -0.6 0.7
+maravilla 0.8 0.8
+maravilloso 0.8 0.9
+masacre -0.9 0.6
+matanza -0.8 0.6
+mediocre -0.4 0.8
+mejor 0.5 0.5
+mejora 0.4 0.4
+miedo -0.5 0.7
+miseria -0.6 0.6
+moderno 0.2 0.4
+molesto -0.4 0.7
+muerte -0.6 0.3
+notable 0.5 0.6
+nocivo -0.6 0.6
+odio -0.7 0.8
+ofensivo -0.5 0.7
+orgullo 0.5 0.7
+paz 0.5 0.4
+peligro -0.5 0.5
+peligroso -0.6 0.6
+peor -0.6 0.6
+perfecto 0.8 0.8
+perjudicial -0.6 0.6
+pésimo -0.9 0.9
+placer 0.6 0.8
+pobre -0.3 0.5
+pobreza -0.5 0.4
+polémico -0.3 0.6
+popular 0.4 0.5
+positivo 0.5 0.5
+negativo -0.5 0.5
+precioso 0.7 0.9
+premio 0.5 0.4
+prestigioso 0.5 0.6
+problema -0.4 0.4
+problemático -0.5 0.6
+próspero 0.6 0.6
+prosperidad 0.6 0.5
+protesta -0.2 0.4
+querido 0.5 0.7
+raro -0.1 0.6
+rechazo -0.4 0.5
+relevante 0.3 0.5
+represión -0.6 0.5
+respeto 0.5 0.5
+ridículo -0.6 0.9
+rico 0.4 0.5
+riesgo -0.4 0.4
+robo -0.6 0.4
+sabio 0.5 0.6
+sano 0.4 0.5
+seguro 0.3 0.4
+sencillo 0.2 0.5
+sensacional 0.8 0.9
+simpático 0.6 0.8
+sólido 0.3 0.4
+sorprendente 0.4 0.8
+sublime 0.8 0.9
+sucio -0.4 0.6
+sufrimiento -0.6 0.7
+tensión -0.3 0.5
+terrible -0.8 0.9
+terror -0.7 0.7
+torpe -0.4 0.7
+tortura -0.8 0.6
+trágico -0.7 0.8
+tragedia -0.7 0.7
+tranquilo 0.4 0.6
+traición -0.7 0.7
+triste -0.6 0.8
+tristeza -0.6 0.8
+triunfo 0.6 0.5
+útil 0.5 0.5
+valiente 0.6 0.7
+valioso 0.6 0.6
+valor 0.3 0.4
+ventaja 0.4 0.4
+vergüenza -0.5 0.7
+victoria 0.5 0.4
+violencia -0.7 0.5
+violento -0.7 0.7
+vulnerable -0.3 0.5
+"""
+
+# Words that turn the polarity of the next few sentiment words around.
+NEGATORS = frozenset({"no", "nunca", "jamás", "tampoco", "ni", "sin", "nada", "ningún", "ninguno", "ninguna"})
+
+# Words that scale the sentiment word right after them.
+INTENSIFIERS: Dict[str, float] = {
+    "muy": 1.3, "sumamente": 1.5, "extremadamente": 1.5, "increíblemente": 1.4, "realmente": 1.2,
+    "bastante": 1.15, "tan": 1.2, "altamente": 1.3, "totalmente": 1.3, "completamente": 1.3,
+    "poco": 0.5, "algo": 0.7, "apenas": 0.5, "ligeramente": 0.6,
+}
+
+
+def expand_forms(lemma: str) -> Iterator[str]:
+    """The lemma and its regular feminine and plural forms."""
+    yield lemma
+    if lemma.endswith("o"):
+        stem = lemma[:-1]
+        yield from (stem + "a", stem + "os", stem + "as")
+    elif lemma.endswith(("a", "e", "é")):
+        yield lemma + "s"
+    elif lemma.endswith("z"):
+        yield lemma[:-1] + "ces"
+    elif lemma.endswith("ón"):
+        yield lemma[:-2] + "ones"
+    else:
+        yield lemma + "es"
+
+
+def load_lexicon() -> Dict[str, Tuple[float, float]]:
+    """word -> (polarity, subjectivity) for every form of every lemma; explicit lemmas win over derived forms."""
+    lexicon: Dict[str, Tuple[float, float]] = {}
+    lemmas = {}
+    for line in LEMMAS.strip().splitlines():
+        lemma, polarity, subjectivity = line.split()
+        lemmas[lemma] = (float(polarity), float(subjectivity))
+    for lemma, entry in lemmas.items():
+        for form in expand_forms(lemma):
+            if form not in lemmas:
+                lexicon.setdefault(form, entry)
+    lexicon.update(lemmas)
+    return lexicon
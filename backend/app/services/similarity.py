@@ -0,0 +1,376 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import zlib
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.file_lock import try_lock
+from app.services.analysis import STOPWORDS, WORD_RE
+
+logger = logging.getLogger(__name__)
+
+# Bump when article_terms or the hashing change; persisted indexes of another version are rebuilt.
+INDEX_VERSION = 1
+INITIAL_CAPACITY = 1024
+# Refreshes also re-read rows saved this long before the newest one they saw, so a
+# transaction that committed late with an older saved_at is not missed.
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+
+def article_terms(title: str, summary: str, frequent_words: Iterable) -> Dict[str, int]:
+    """
+    Term counts of a saved article: the words of its title and summary,
+    tokenised like analyze_content, plus its frequent words with their
+    counts from the full text.
+    """
+    counts: Dict[str, int] = {}
+    for word in WORD_RE.findall(f"{title}\n{summary}".lower()):
+        if word not in STOPWORDS:
+            counts[word] = counts.get(word, 0) + 1
+    for word, count in frequent_words or []:
+        counts[word] = counts.get(word, 0) + int(count)
+    return counts
+
+
+def hashed_vector(counts: Dict[str, int], dimensions: int) -> np.ndarray:
+    """
+    Signed feature hashing of sublinear term frequencies (1 + ln count).
+    CRC32 is stable across processes, unlike hash(); its top bit picks the
+    sign so colliding terms tend to cancel out instead of adding up.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, count in counts.items():
+        if count <= 0:
+            continue
+        digest = zlib.crc32(term.encode("utf-8"))
+        sign = -1.0 if digest & 0x80000000 else 1.0
+        vector[digest % dimensions] += sign * (1.0 + math.log(count))
+    return vector
+
+
+class SimilarityIndex:
+    """
+    "More like this" over saved articles: one hashed term-frequency vector
+    per article in a dense float32 matrix, ranked by TF-IDF cosine similarity.
+
+    IDF comes from per-dimension document frequencies kept up to date as
+    articles are added and removed, and is applied at query time, so a
+    query is two vectorised passes over the candidate rows and no stored
+    vector ever needs recomputing. Rows of removed articles are reused.
+
+    With ``path`` the matrix lives in .npy files under that directory,
+    memory-mapped, so it is reopened at startup instead of rebuilt; a
+    ``dirty`` flag in meta.json marks an index that was not closed cleanly
+    and must be rebuilt from the database. Only one process writes those
+    files: ``open`` takes an exclusive lock on the directory, and the other
+    uvicorn workers that find it held keep an in-memory index rebuilt from
+    the database instead. Each worker only applies its own writes directly;
+    ``refresh_similarity_index`` picks up the others' from the database.
+    """
+
+    def __init__(self, dimensions: int, path: str = ""):
+        self.dimensions = dimensions
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_file = None
+        # (article count, newest saved_at) of the database when the index last caught up with it.
+        self.synced: Optional[tuple] = None
+        self._reset(INITIAL_CAPACITY)
+
+    def _reset(self, capacity: int) -> None:
+        self._vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._users = np.full(capacity, -1, dtype=np.int64)
+        self._df = np.zeros(self.dimensions, dtype=np.int64)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self.needs_rebuild = False
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _write_meta(self, dirty: bool) -> None:
+        meta = {"version": INDEX_VERSION, "dimensions": self.dimensions, "size": self._size, "dirty": dirty}
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _map(self, capacity: int, copy_from: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> None:
+        """Creates the memory-mapped arrays with ``capacity`` rows, copying the current rows over."""
+        arrays = []
+        for name, dtype, shape, fill in (
+            ("vectors.npy", np.float32, (capacity, self.dimensions), 0),
+            ("ids.npy", np.int64, (capacity,), -1),
+            ("users.npy", np.int64, (capacity,), -1),
+        ):
+            tmp = self._file(name + ".tmp")
+            array = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+            array[:] = fill
+            arrays.append((name, tmp, array))
+        for (name, tmp, array), old in zip(arrays, copy_from or ()):
+            array[:self._size] = old[:self._size]
+        for name, tmp, array in arrays:
+            array.flush()
+            os.replace(tmp, self._file(name))
+        self._vectors, self._ids, self._users = (array for _, _, array in arrays)
+
+    def _claim_files(self) -> bool:
+        """Takes the directory's lock, held until ``close``; False if another process holds it."""
+        if self._lock_file is None:
+            self._lock_file = try_lock(self._file("lock"))
+        return self._lock_file is not None
+
+    def open(self) -> None:
+        """
+        Maps the persisted index, or starts an empty one (flagged for rebuild
+        if it was unusable). When another process owns the files, the index
+        stays in memory and is flagged for rebuild.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if not self._claim_files():
+                logger.info("similar-articles index files at %s are owned by another process; "
+                            "keeping this one in memory", self.path)
+                self.path = ""
+                self.needs_rebuild = True
+                return
+            meta = None
+            if os.path.exists(self._file("meta.json")):
+                with open(self._file("meta.json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+            usable = meta is not None and not meta.get("dirty") and meta.get("version") == INDEX_VERSION \
+                and meta.get("dimensions") == self.dimensions
+            if usable:
+                self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+                self._ids = np.load(self._file("ids.npy"), mmap_mode="r+")
+                self._users = np.load(self._file("users.npy"), mmap_mode="r+")
+                self._df = np.load(self._file("df.npy"))
+                self._size = meta["size"]
+                ids = self._ids[:self._size]
+                self._rows = {int(article_id): row for row, article_id in enumerate(ids) if article_id >= 0}
+                self._free = [row for row in range(self._size) if ids[row] < 0]
+                self.needs_rebuild = False
+            else:
+                self._reset(INITIAL_CAPACITY)
+                self._map(INITIAL_CAPACITY)
+                self.needs_rebuild = True
+            # Until close() runs, the files may not match what this process holds in memory.
+            self._write_meta(dirty=True)
+
+    def _mapped(self) -> bool:
+        return isinstance(self._vectors, np.memmap)
+
+    def flush(self, dirty: bool = True) -> None:
+        with self._lock:
+            if not self._mapped():
+                return
+            for array in (self._vectors, self._ids, self._users):
+                array.flush()
+            np.save(self._file("df.npy"), self._df)
+            self._write_meta(dirty=dirty)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush(dirty=False)
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def clear(self) -> None:
+        with self._lock:
+            mapped = self._mapped()
+            self._reset(INITIAL_CAPACITY)
+            if mapped:
+                self._map(INITIAL_CAPACITY)
+
+    def _grow(self) -> None:
+        capacity = len(self._ids) * 2
+        if self._mapped():
+            self._map(capacity, copy_from=(self._vectors, self._ids, self._users))
+            return
+        for name in ("_vectors", "_ids", "_users"):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], 0 if name == "_vectors" else -1, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add(self, article_id: int, user_id: int, counts: Dict[str, int]) -> None:
+        """Indexes an article, replacing its previous vector if it was already indexed."""
+        vector = hashed_vector(counts, self.dimensions)
+        with self._lock:
+            self.remove(article_id)
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self._ids):
+                    self._grow()
+                row = self._size
+                self._size += 1
+            self._vectors[row] = vector
+            self._ids[row] = article_id
+            self._users[row] = user_id
+            self._df += vector != 0
+            self._rows[article_id] = row
+
+    def add_article(self, article) -> None:
+        self.add(article.id, article.user_id,
+                 article_terms(article.wikipedia_title, article.processed_summary, article.frequent_words))
+
+    def add_articles(self, articles: Iterable) -> None:
+        with self._lock:
+            for article in articles:
+                self.add_article(article)
+
+    def remove(self, article_id: int) -> bool:
+        with self._lock:
+            row = self._rows.pop(article_id, None)
+            if row is None:
+                return False
+            self._df -= self._vectors[row] != 0
+            self._vectors[row] = 0
+            self._ids[row] = -1
+            self._users[row] = -1
+            self._free.append(row)
+            return True
+
+    def __contains__(self, article_id: int) -> bool:
+        return article_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def similar(self, article_id: int, k: int = 10, user_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        The ``k`` indexed articles most similar to ``article_id`` as (id, cosine)
+        pairs, best first, optionally only among ``user_id``'s articles.
+        """
+        with self._lock:
+            row = self._rows.get(article_id)
+            if row is None or k <= 0:
+                return []
+            n = self._size
+            live = self._ids[:n] >= 0
+            if user_id is not None:
+                live &= self._users[:n] == user_id
+            live[row] = False
+            rows = np.flatnonzero(live)
+            if not len(rows):
+                return []
+            idf = np.log((1.0 + len(self._rows)) / (1.0 + self._df)).astype(np.float32) + 1.0
+            weights = idf * idf
+            query = self._vectors[row] * weights
+            query_norm = float(np.sqrt(query @ self._vectors[row]))
+            if query_norm == 0:
+                return []
+            if len(rows) * 2 > n:
+                # Most rows are candidates: scoring them all beats copying them out.
+                vectors, ids = self._vectors[:n], np.array(self._ids[:n])
+            else:
+                # Only the user's rows are scored, so a query costs as much as their library.
+                vectors, ids, live = self._vectors[rows], np.array(self._ids[rows]), None
+            norms = np.sqrt(np.einsum("ij,ij,j->i", vectors, vectors, weights))
+            dots = vectors @ query
+        valid = norms > 0 if live is None else live & (norms > 0)
+        scores = np.where(valid, dots / np.where(norms > 0, norms, 1.0) / query_norm, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), round(float(scores[i]), 6)) for i in top]
+
+    def rebuild(self, batches: Iterable[Iterable]) -> None:
+        """Reindexes from scratch from batches of saved articles (or rows with the same attributes)."""
+        with self._lock:
+            self.clear()
+            for batch in batches:
+                self.add_articles(batch)
+            self.needs_rebuild = False
+            self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "articles": len(self._rows),
+            "rows": self._size,
+            "capacity": len(self._ids),
+            "dimensions": self.dimensions,
+            "bytes": int(self._vectors.nbytes),
+            "persistent": bool(self.path),
+        }
+
+
+async def load_similarity_index(index: SimilarityIndex, session_factory) -> None:
+    """
+    Opens the persisted index and rebuilds it from the saved articles when it
+    is missing, was not closed cleanly, is owned by another process or does
+    not hold as many articles as the database (e.g. rows written by the dump
+    ingestion).
+    """
+    from app.crud.article_async import async_article_crud
+
+    await run_in_threadpool(index.open)
+    try:
+        async with session_factory() as db:
+            synced = await async_article_crud.similarity_signature(db)
+            if not index.needs_rebuild and synced[0] == len(index):
+                index.synced = synced
+                return
+            batches = [batch async for batch in async_article_crud.iter_similarity_rows(db)]
+    except SQLAlchemyError:
+        # The API still serves everything else; similar articles fill in as articles are saved.
+        logger.exception("could not load the similar-articles index from the database")
+        return
+    await run_in_threadpool(index.rebuild, batches)
+    index.synced = synced
+    logger.info("similar-articles index rebuilt with %d articles", len(index))
+
+
+async def refresh_similarity_index(index: SimilarityIndex, session_factory) -> None:
+    """
+    Catches the index up with articles saved or deleted by other workers.
+    Nothing is read while the article count and newest saved_at are
+    unchanged; otherwise the articles saved since the last refresh are
+    (re)indexed, and the index is rebuilt only if its size still differs
+    from the database, i.e. after deletions.
+    """
+    from app.crud.article_async import async_article_crud
+
+    async with session_factory() as db:
+        synced = await async_article_crud.similarity_signature(db)
+        if synced == index.synced:
+            return
+        if index.synced is not None and index.synced[1] is not None:
+            saved_since = index.synced[1] - REFRESH_OVERLAP
+            rows = [row async for batch in async_article_crud.iter_similarity_rows(db, saved_since=saved_since)
+                    for row in batch]
+            await run_in_threadpool(index.add_articles, rows)
+        if len(index) != synced[0]:
+            batches = [batch async for batch in async_article_crud.iter_similarity_rows(db)]
+            await run_in_threadpool(index.rebuild, batches)
+    index.synced = synced
+
+
+async def refresh_similarity_index_every(index: SimilarityIndex, session_factory, interval: float) -> None:
+    """Runs ``refresh_similarity_index`` every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_similarity_index(index, session_factory)
+        except SQLAlchemyError:
+            logger.exception("could not refresh the similar-articles index")
+
+
+similarity_index = SimilarityIndex(dimensions=settings.SIMILARITY_DIMENSIONS, path=settings.SIMILARITY_INDEX_PATH)
@@ -0,0 +1,442 @@
+"""
+Governance of the requests sent to Wikipedia.
+
+Every MediaWiki call of a language goes through that language's
+UpstreamGovernor, which layers, in order:
+
+- a circuit breaker: after ``breaker_threshold`` failed calls in a row it
+  rejects calls outright for ``breaker_cooldown`` seconds, then lets a
+  single probe through to decide whether to close again;
+- a token bucket spacing calls at ``rate`` per second with bursts of
+  ``burst``;
+- an adaptive (AIMD) concurrency limit: each successful call raises the
+  limit by 1/limit, so by about one per round of calls, and a throttled or
+  failed call (including a 5xx other than 501/505, retried or not) halves
+  it, at most once per second;
+- retries of throttled (429), overloaded (502/503/504) and timed out calls
+  with exponential backoff and full jitter, never sooner than the
+  response's Retry-After.
+
+When a call cannot be made or keeps failing, UpstreamUnavailable is raised
+instead of the error looking like an empty answer; services turn it into a
+stale cached result or a 503 with Retry-After.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+# 5xx answers that blame the request rather than the server, so not failures.
+REQUEST_FAULT_STATUS = frozenset({501, 505})
+# Each client passes its HTTP library's connection and timeout errors, so this module imports neither library.
+Errors = Tuple[Type[BaseException], ...]
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class UpstreamUnavailable(Exception):
+    """Wikipedia is throttling or failing, so the call was not made or gave up."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Wikipedia is unavailable ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """The Retry-After of a failed response, in seconds (delta or HTTP date)."""
+    response = getattr(exc, "response", None)
+    value = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(exc: BaseException, transient: Errors = ()) -> bool:
+    """Whether a failed call says Wikipedia is overloaded or unreachable, rather than answering."""
+    status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS
+    return isinstance(exc, transient)
+
+
+def is_server_failure(exc: BaseException, transient: Errors = ()) -> bool:
+    """Whether a failed call counts against Wikipedia's health: transient errors and other 5xx answers."""
+    status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    if status_code is not None and 500 <= status_code < 600 and status_code not in REQUEST_FAULT_STATUS:
+        return True
+    return is_transient(exc, transient)
+
+
+class TokenBucket:
+    """Up to ``burst`` calls at once, refilled at ``rate`` per second (no limit when rate <= 0)."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token, possibly one not refilled yet; returns how long to wait until it is."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self) -> None:
+        """Gives back a token reserved by a call that will not be made."""
+        if self.rate > 0:
+            with self._lock:
+                self._tokens = min(self.burst, self._tokens + 1)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class _Waiter:
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake: Callable[[], None]):
+        self.granted = False
+        self.wake = wake
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit shared by threads and event loops. Calls beyond
+    the limit wait in FIFO order; a released slot is handed straight to the
+    oldest waiter.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float = 0.5,
+                 decrease_interval: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Takes a free slot (returns None) or queues a waiter; call with the lock held."""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return None
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """After a timed out wait: True if the slot was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def acquire(self, timeout: float) -> bool:
+        event = threading.Event()
+        with self._lock:
+            waiter = self._try_acquire(event.set)
+        if waiter is None:
+            return True
+        return event.wait(timeout) or self._abandon(waiter)
+
+    async def acquire_async(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self._lock:
+            waiter = self._try_acquire(wake)
+        if waiter is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(waiter)
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release(None)
+            raise
+
+    def release(self, succeeded: Optional[bool]) -> None:
+        """Frees a slot; ``succeeded`` grows the limit, False shrinks it, None leaves it alone."""
+        wake = []
+        with self._lock:
+            now = time.monotonic()
+            if succeeded:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif succeeded is False and now - self._last_decrease >= self.decrease_interval:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._last_decrease = now
+            self.in_flight -= 1
+            while self._waiters and self.in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self.in_flight += 1
+                wake.append(waiter.wake)
+        for callback in wake:
+            callback()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Admits a call or raises; True when the call is the half-open probe."""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            raise UpstreamUnavailable("circuit_open", retry_after=max(1.0, remaining))
+
+    def abandon_probe(self) -> None:
+        """Lets another call probe when the probe ended without reaching Wikipedia."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def record(self, succeeded: bool) -> None:
+        with self._lock:
+            if succeeded:
+                self.state = CLOSED
+                self.failures = 0
+                self._probing = False
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(1.0, self._opened_at + self.cooldown - time.monotonic())
+
+
+class UpstreamGovernor:
+    """Rate limit, adaptive concurrency, retries and circuit breaker for one wiki's API."""
+
+    def __init__(self, rate: float, burst: float, initial_limit: int, min_limit: int, max_limit: int,
+                 retries: int, queue_timeout: float, retry_backoff: float, retry_max_wait: float,
+                 breaker_threshold: int, breaker_cooldown: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = AdaptiveLimit(initial_limit, min_limit, max_limit)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.retries = retries
+        self.queue_timeout = queue_timeout
+        self.retry_backoff = retry_backoff
+        self.retry_max_wait = retry_max_wait
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0, "rejected": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _reject(self, reason: str, retry_after: float) -> UpstreamUnavailable:
+        self._count("rejected")
+        return UpstreamUnavailable(reason, retry_after)
+
+    def _admit_delay(self, deadline: float) -> Tuple[float, bool]:
+        """
+        Checks the breaker and takes a rate-limit token; returns how long to
+        wait for it and whether the call is the breaker's half-open probe.
+        """
+        try:
+            probe = self.breaker.before_call()
+        except UpstreamUnavailable:
+            self._count("rejected")
+            raise
+        delay = self.bucket.reserve()
+        if time.monotonic() + delay > deadline:
+            self.bucket.refund()
+            if probe:
+                self.breaker.abandon_probe()
+            raise self._reject("rate_limited", max(1.0, delay))
+        return delay, probe
+
+    def _outcome(self, exc: Optional[BaseException], transient: Errors = ()) -> bool:
+        """Records a finished call; False when it failed, whether or not it is worth retrying."""
+        if exc is not None and is_server_failure(exc, transient):
+            self._count("throttled" if getattr(getattr(exc, "response", None), "status_code", None) == 429
+                        else "failures")
+            self.breaker.record(False)
+            return False
+        # Any other answer, even a 404, means Wikipedia is up.
+        self.breaker.record(True)
+        return True
+
+    def _retry_delay(self, attempt: int, exc: BaseException, deadline: float) -> float:
+        """How long to wait before retrying, or raises when the call should give up."""
+        retry_after = retry_after_seconds(exc)
+        delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if attempt >= self.retries or delay > self.retry_max_wait or time.monotonic() + delay > deadline:
+            reason = "throttled" if getattr(getattr(exc, "response", None), "status_code", None) == 429 else "failing"
+            raise UpstreamUnavailable(reason, retry_after=max(1.0, retry_after or 0.0)) from exc
+        self._count("retries")
+        return delay
+
+    def call(self, send: Callable[[], T], timeout: float, transient: Errors = ()) -> T:
+        """Runs the blocking ``send`` under governance; ``timeout`` bounds waiting and retrying."""
+        deadline = time.monotonic() + timeout + self.queue_timeout
+        attempt = 0
+        while True:
+            delay, probe = self._admit_delay(deadline)
+            try:
+                time.sleep(delay)
+                if not self.limit.acquire(min(self.queue_timeout, max(0.0, deadline - time.monotonic()))):
+                    raise self._reject("concurrency_limited", 1.0)
+            except BaseException:
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            self._count("calls")
+            try:
+                result = send()
+            except Exception as exc:
+                self.limit.release(self._outcome(exc, transient))
+                if not is_transient(exc, transient):
+                    raise
+                time.sleep(self._retry_delay(attempt, exc, deadline))
+                attempt += 1
+                continue
+            except BaseException:
+                self.limit.release(None)
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            self.limit.release(self._outcome(None))
+            return result
+
+    async def call_async(self, send: Callable[[], Awaitable[T]], timeout: float, transient: Errors = ()) -> T:
+        """call() for coroutines; waits never block the event loop."""
+        deadline = time.monotonic() + timeout + self.queue_timeout
+        attempt = 0
+        while True:
+            delay, probe = self._admit_delay(deadline)
+            try:
+                await asyncio.sleep(delay)
+                if not await self.limit.acquire_async(min(self.queue_timeout, max(0.0, deadline - time.monotonic()))):
+                    raise self._reject("concurrency_limited", 1.0)
+            except BaseException:
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            self._count("calls")
+            try:
+                result = await send()
+            except asyncio.CancelledError:
+                self.limit.release(None)
+                if probe:
+                    self.breaker.abandon_probe()
+                raise
+            except Exception as exc:
+                self.limit.release(self._outcome(exc, transient))
+                if not is_transient(exc, transient):
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, exc, deadline))
+                attempt += 1
+                continue
+            self.limit.release(self._outcome(None))
+            return result
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "breaker_opened": self.breaker.opened,
+            "concurrency_limit": round(self.limit.limit, 2),
+            "in_flight": self.limit.in_flight,
+            "queued": self.limit.queued,
+            "tokens": round(self.bucket.tokens, 2),
+            **counters,
+        }
+
+
+def build_governor() -> UpstreamGovernor:
+    return UpstreamGovernor(
+        rate=settings.WIKIPEDIA_RATE,
+        burst=settings.WIKIPEDIA_BURST,
+        initial_limit=settings.WIKIPEDIA_CONCURRENCY_INITIAL,
+        min_limit=settings.WIKIPEDIA_CONCURRENCY_MIN,
+        max_limit=settings.WIKIPEDIA_MAX_CONNECTIONS,
+        retries=settings.WIKIPEDIA_RETRIES,
+        queue_timeout=settings.WIKIPEDIA_QUEUE_TIMEOUT,
+        retry_backoff=settings.WIKIPEDIA_RETRY_BACKOFF,
+        retry_max_wait=settings.WIKIPEDIA_RETRY_MAX_WAIT,
+        breaker_threshold=settings.WIKIPEDIA_BREAKER_THRESHOLD,
+        breaker_cooldown=settings.WIKIPEDIA_BREAKER_COOLDOWN,
+    )
+
+
+_governors: Dict[str, UpstreamGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_upstream_governor(lang: str) -> UpstreamGovernor:
+    """The governor of a wiki language, shared by its blocking and asyncio clients."""
+    with _governors_lock:
+        if lang not in _governors:
+            _governors[lang] = build_governor()
+        return _governors[lang]
+
+
+def upstream_stats() -> Dict[str, Dict[str, float]]:
+    with _governors_lock:
+        governors = dict(_governors)
+    return {lang: governor.stats() for lang, governor in governors.items()}
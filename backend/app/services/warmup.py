@@ -0,0 +1,288 @@
+"""
+Background warm-up of the article cache.
+
+Every ``WARMUP_INTERVAL`` seconds one worker per language in
+``WIKIPEDIA_LANGUAGES`` takes the titles users have saved from that wiki
+plus its ``WARMUP_HOT_TITLES``, looks up their current revisions 50 at a
+time and re-analyses only the pages whose revision is not already cached,
+so user requests for them are cache hits.
+
+Runs inside the API process (``WARMUP_ENABLED=true``) or as its own process:
+    python -m app.services.warmup            # loop forever
+    python -m app.services.warmup --once     # a single cycle, then exit
+A separate process only helps the API through the persistent cache tier, so
+set ARTICLE_CACHE_PATH to the same file for both. Only one process runs the
+warm-up at a time, whichever first takes the ``WARMUP_LOCK_PATH`` lock, so
+several uvicorn workers with WARMUP_ENABLED do not multiply upstream traffic.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import IO, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.file_lock import try_lock
+from app.crud.article_async import async_article_crud
+from app.database.session import AsyncSessionLocal
+from app.services.cache import ArticleCache, article_cache
+from app.services.mediawiki import MAX_TITLES_PER_QUERY, close_async_mediawiki_clients, default_lang, normalize_title
+from app.services.sentiment import sentiment_cache_key
+from app.services.upstream import UpstreamUnavailable
+from app.services.wikipedia_async import AsyncWikipediaService
+
+logger = logging.getLogger(__name__)
+
+TitleSource = Callable[[int, str], Awaitable[List[str]]]
+
+
+async def saved_titles(limit: int, lang: str) -> List[str]:
+    """
+    Titles stored in the articles table from the ``lang`` wiki, most recently
+    saved first. Saved articles only record their URL, which is on the same
+    host as the wiki's API.
+    """
+    api_url = urlsplit(settings.WIKIPEDIA_API_URL_TEMPLATE.format(lang=lang))
+    async with AsyncSessionLocal() as db:
+        return await async_article_crud.get_saved_titles(
+            db, limit, url_prefix=f"{api_url.scheme}://{api_url.netloc}/",
+        )
+
+
+def hot_titles(lang: str) -> List[str]:
+    """
+    The WARMUP_HOT_TITLES of a language: those prefixed with it (``en:Python``),
+    plus the unprefixed ones for the default language.
+    """
+    titles = []
+    for entry in settings.WARMUP_HOT_TITLES.split(","):
+        prefix, _, title = entry.partition(":")
+        if title.strip() and prefix.strip().lower() in settings.WIKIPEDIA_LANGUAGES:
+            entry_lang, entry = prefix.strip().lower(), title
+        else:
+            entry_lang = default_lang()
+        if entry.strip() and entry_lang == lang:
+            titles.append(entry.strip())
+    return titles
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart (no limit when rate <= 0)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(self._next, loop.time()) + self.interval
+
+
+class WarmupWorker:
+    """Periodically re-analyses saved and hot titles whose revision is not cached yet."""
+
+    def __init__(
+        self,
+        service: Optional[AsyncWikipediaService] = None,
+        cache: Optional[ArticleCache] = None,
+        lang: Optional[str] = None,
+        titles_source: Optional[TitleSource] = None,
+        hot: Optional[List[str]] = None,
+        rate: float = settings.WARMUP_RATE,
+        concurrency: int = settings.WARMUP_CONCURRENCY,
+        interval: float = settings.WARMUP_INTERVAL,
+        max_titles: int = settings.WARMUP_MAX_TITLES,
+    ):
+        self.cache = cache or article_cache
+        self.service = service or AsyncWikipediaService(cache=self.cache, lang=lang)
+        self.titles_source = titles_source or saved_titles
+        self.hot = hot
+        self.rate = rate
+        self.concurrency = concurrency
+        self.interval = interval
+        self.max_titles = max_titles
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, float] = {
+            "cycles": 0,
+            "titles": 0,
+            "refreshed": 0,
+            "unchanged": 0,
+            "not_found": 0,
+            "failed": 0,
+            "last_cycle_seconds": 0.0,
+            "last_cycle_finished_at": 0.0,
+        }
+
+    async def _titles(self) -> List[str]:
+        titles = list(self.hot if self.hot is not None else hot_titles(self.service.lang))
+        try:
+            titles += await self.titles_source(self.max_titles, self.service.lang)
+        except Exception:
+            logger.exception("warm-up: could not read saved titles")
+        return list(dict.fromkeys(normalize_title(t) for t in titles if t.strip()))[:self.max_titles]
+
+    async def run_once(self) -> Dict[str, int]:
+        """One pass over every title; returns what happened to them."""
+        started = time.monotonic()
+        limiter = RateLimiter(self.rate)
+        slots = asyncio.Semaphore(max(1, self.concurrency))
+        cycle = {"titles": 0, "refreshed": 0, "unchanged": 0, "not_found": 0, "failed": 0}
+        lang = self.service.lang
+
+        async def refresh(title: str) -> None:
+            async with slots:
+                await limiter.acquire()
+                try:
+                    article = await self.service.refresh_article_details(title)
+                except (HTTPException, UpstreamUnavailable):
+                    # Disambiguation pages, the analysis pool shedding load or Wikipedia throttling us.
+                    cycle["failed"] += 1
+                    return
+                cycle["refreshed" if article else "not_found"] += 1
+
+        titles = await self._titles()
+        cycle["titles"] = len(titles)
+        for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+            batch = titles[start:start + MAX_TITLES_PER_QUERY]
+            await limiter.acquire()
+            try:
+                resolved = await self.service.client.resolve_titles(batch)
+            except Exception:
+                cycle["failed"] += len(batch)
+                continue
+
+            stale = []
+            for title in batch:
+                current = resolved.get(title)
+                if current is None:
+                    cycle["not_found"] += 1
+                elif current.revision_id is not None and \
+                        self.cache.get_revision(lang, sentiment_cache_key(title), current.revision_id):
+                    cycle["unchanged"] += 1
+                else:
+                    stale.append(title)
+            await asyncio.gather(*(refresh(title) for title in stale))
+
+        for key, value in cycle.items():
+            self.metrics[key] += value
+        self.metrics["cycles"] += 1
+        self.metrics["last_cycle_seconds"] = round(time.monotonic() - started, 3)
+        self.metrics["last_cycle_finished_at"] = time.time()
+        logger.info("warm-up cycle: %s", cycle)
+        return cycle
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("warm-up cycle failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Runs the worker as a task on the current event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever(), name=f"article-warmup-{self.service.lang}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.metrics, "running": int(self._task is not None and not self._task.done())}
+
+
+class WarmupWorkers:
+    """
+    The warm-up workers of every language in WIKIPEDIA_LANGUAGES, built on
+    first use. They only run in the process holding the lock at ``lock_path``.
+    """
+
+    def __init__(self, lock_path: str = ""):
+        self.lock_path = lock_path or os.path.join(tempfile.gettempdir(), "wikipedia-warmup.lock")
+        self._workers: Dict[str, WarmupWorker] = {}
+        self._lock_file: Optional[IO] = None
+
+    def get(self, lang: Optional[str] = None) -> WarmupWorker:
+        lang = lang or default_lang()
+        if lang not in self._workers:
+            self._workers[lang] = WarmupWorker(lang=lang)
+        return self._workers[lang]
+
+    def all(self) -> List[WarmupWorker]:
+        return [self.get(lang) for lang in settings.WIKIPEDIA_LANGUAGES]
+
+    def acquire(self) -> bool:
+        """Takes the warm-up lock; False if another process is already running the warm-up."""
+        if self._lock_file is None:
+            self._lock_file = try_lock(self.lock_path)
+            if self._lock_file is None:
+                logger.info("warm-up: %s is locked, another process runs the warm-up", self.lock_path)
+        return self._lock_file is not None
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def start(self) -> None:
+        """Runs every language's worker on the current event loop, if this process gets the lock."""
+        if self.acquire():
+            for worker in self.all():
+                worker.start()
+
+    async def stop(self) -> None:
+        for worker in self._workers.values():
+            await worker.stop()
+        self.release()
+
+    async def run_once(self) -> Dict[str, Dict[str, int]]:
+        return {worker.service.lang: await worker.run_once() for worker in self.all()}
+
+    async def run_forever(self) -> None:
+        await asyncio.gather(*(worker.run_forever() for worker in self.all()))
+
+
+warmup_workers = WarmupWorkers(settings.WARMUP_LOCK_PATH)
+
+
+async def _main(once: bool) -> None:
+    if not warmup_workers.acquire():
+        return
+    try:
+        if once:
+            await warmup_workers.run_once()
+        else:
+            await warmup_workers.run_forever()
+    finally:
+        warmup_workers.release()
+        await close_async_mediawiki_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.once))
+
+
+if __name__ == "__main__":
+    main()
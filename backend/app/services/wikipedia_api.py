@@ -1,113 +1,267 @@
-import wikipedia
-from typing import List, Optional
-from collections import Counter
-import re
+from functools import partial
+from typing import Dict, FrozenSet, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+import time
 from fastapi import HTTPException
 
-from wikipedia.exceptions import DisambiguationError, PageError
-
 from app.schemas.wikipedia import WikipediaSearchArticle, WikipediaArticleDetail
 from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.analysis import AnalysisPoolSaturated, ContentAnalysis, analysis_pool, analyze_content
+from app.services.cache import ArticleCache, article_cache
+from app.services.mediawiki import (
+    ARTICLE_PROPS,
+    MAX_TITLES_PER_QUERY,
+    MediaWikiClient,
+    ResolvedTitle,
+    article_props,
+    build_links_params,
+    build_page_params,
+    build_suggest_params,
+    default_lang,
+    first_page,
+    get_mediawiki_client,
+    normalize_query,
+    normalize_title,
+    page_intro,
+    page_links,
+    page_references,
+    parse_suggestion,
+)
+from app.services.sentiment import sentiment_cache_key
+from app.services.singleflight import SingleFlight
+from app.services.upstream import UpstreamUnavailable
 
-from textblob import TextBlob
+_resolve_executor = ThreadPoolExecutor(
+    max_workers=settings.WIKIPEDIA_RESOLVE_WORKERS,
+    thread_name_prefix="wikipedia-resolve",
+)
 
 class WikipediaService:
-    def __init__(self):
-        wikipedia.set_lang('es')
+    """
+    Search and analysed articles of one wiki language. Instances are
+    long-lived and safe to share: the language lives in the client's API
+    URL, the stopwords used by the analysis and the cache keys, never in
+    module-level state.
+    """
+
+    def __init__(self, client: Optional[MediaWikiClient] = None, cache: Optional[ArticleCache] = None,
+                 lang: Optional[str] = None):
+        self.lang = lang or (client.lang if client else default_lang())
+        self.client = client or get_mediawiki_client(self.lang)
+        self.cache = cache or article_cache
+        self.flights = SingleFlight()
 
     def search_articles(self, query: str, limit: int = 10) -> List[WikipediaSearchArticle]:
         actual_limit = min(max(1, limit), 50)
-        articles = []
+        return self.flights.do(("search", normalize_query(query), actual_limit), self._search_articles, query, actual_limit)
+
+    def _search_articles(self, query: str, actual_limit: int) -> List[WikipediaSearchArticle]:
+        deadline = time.monotonic() + settings.WIKIPEDIA_SEARCH_DEADLINE
         try:
-            search_results_titles = wikipedia.search(query, results=actual_limit)
-
-            for title in search_results_titles:
-                try:
-                    page = wikipedia.page(title, auto_suggest=False, redirect=True)
-                    articles.append(WikipediaSearchArticle(
-                        title=page.title,
-                        pageid=str(page.pageid) if hasattr(page, 'pageid') else None,
-                        url=page.url if hasattr(page, 'url') else None
-                    ))
-                except DisambiguationError:
-                    articles.append(WikipediaSearchArticle(
-                        title=title,
-                        pageid=None,
-                        url=None
-                    ))
-                except PageError:
-                    articles.append(WikipediaSearchArticle(
-                        title=title,
-                        pageid=None,
-                        url=None
-                    ))
-                except Exception:
-                    articles.append(WikipediaSearchArticle(
-                        title=title,
-                        pageid=None,
-                        url=None
-                    ))
-            return articles
+            search_results_titles = self.client.search_titles(
+                query, actual_limit, timeout=max(0.0, deadline - time.monotonic())
+            )
+        except UpstreamUnavailable as exc:
+            raise upstream_unavailable(exc)
         except Exception:
             return []
 
-    def get_article_details(self, title: str) -> Optional[WikipediaArticleDetail]:
-        page = None
+        resolved = self._resolve_titles(search_results_titles, deadline)
+
+        articles = []
+        for title in search_results_titles:
+            page = resolved.get(title)
+            if page:
+                articles.append(WikipediaSearchArticle(
+                    title=page.title,
+                    pageid=page.pageid,
+                    url=page.url
+                ))
+            else:
+                articles.append(WikipediaSearchArticle(
+                    title=title,
+                    pageid=None,
+                    url=None
+                ))
+        return articles
+
+    def _resolve_titles(self, titles: List[str], deadline: float) -> Dict[str, ResolvedTitle]:
+        """
+        Resolves titles with batched queries run concurrently on the shared pool.
+        Batches that miss the deadline are left out, so callers get partial results.
+        """
+        batch_size = min(max(1, settings.WIKIPEDIA_RESOLVE_BATCH_SIZE), MAX_TITLES_PER_QUERY)
+        batches = [titles[i:i + batch_size] for i in range(0, len(titles), batch_size)]
+
+        remaining = deadline - time.monotonic()
+        if not batches or remaining <= 0:
+            return {}
+
+        futures = [
+            _resolve_executor.submit(self.client.resolve_titles, batch, remaining)
+            for batch in batches
+        ]
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        for future in not_done:
+            future.cancel()
+
+        resolved = {}
+        for future in done:
+            if future.exception() is None:
+                resolved.update(future.result())
+        return resolved
+
+    def get_article_details(self, title: str, sentiment: Optional[str] = None,
+                            fields: Optional[Iterable[str]] = None) -> Optional[WikipediaArticleDetail]:
+        """
+        The analysed article, with sentiment scored by ``sentiment`` (SENTIMENT_BACKEND by default).
+
+        The page is fetched with a single query. When ``fields`` leaves out
+        the text, the analysis or the references, the query skips them too;
+        such partial articles are served but not cached.
+
+        When Wikipedia is throttling or down, an expired cached analysis is
+        served instead; without one the request fails with 503.
+        """
+        sentiment = sentiment or settings.SENTIMENT_BACKEND
+        key = sentiment_cache_key(normalize_title(title), sentiment)
+        cached = self.cache.get(self.lang, key)
+        if cached:
+            return cached
+        props = article_props(fields)
+        try:
+            if props != ARTICLE_PROPS:
+                return self.flights.do(("article", key, props), self._fetch_article_details, title, sentiment, props)
+            return self.flights.do(("article", key), self._load_article_details, title, key, sentiment)
+        except UpstreamUnavailable as exc:
+            stale = self.cache.get_stale(self.lang, key)
+            if stale:
+                return stale
+            raise upstream_unavailable(exc)
+
+    def _load_article_details(self, title: str, key: str, sentiment: str) -> Optional[WikipediaArticleDetail]:
+        # A full fetch already returns lastrevid, so only pay for the lookup when there is something to revalidate.
+        if self.cache.persistent is not None or self.cache.has_stale(self.lang, key):
+            revision_id = self._current_revision(title)
+            if revision_id is not None:
+                cached = self.cache.get_revision(self.lang, key, revision_id)
+                if cached:
+                    return cached
+
+        article = self._fetch_article_details(title, sentiment)
+        if article:
+            self.cache.put(self.lang, key, article)
+        return article
+
+    def _current_revision(self, title: str) -> Optional[int]:
+        """Cheap info-only lookup used to revalidate cached analyses."""
         try:
-            page = wikipedia.page(title, auto_suggest=True, redirect=True)
-        except PageError:
+            resolved = self.client.resolve_titles([title]).get(title)
+        except UpstreamUnavailable:
+            raise
+        except Exception:
             return None
-        except DisambiguationError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"'{title}' es una página de desambiguación. Proporcione un título más específico. Opciones: {e.options[:5]}"
-            )
-        except Exception as e:
+        return resolved.revision_id if resolved else None
+
+    def _fetch_article_details(self, title: str, sentiment: Optional[str] = None,
+                               props: FrozenSet[str] = ARTICLE_PROPS) -> Optional[WikipediaArticleDetail]:
+        try:
+            with stage_timer("fetch"):
+                # query_all: pages with more than 500 external links come in several parts.
+                page = first_page(self.client.query_all(build_page_params(title, props)))
+                if page is None:
+                    suggestion = parse_suggestion(self.client.query(build_suggest_params(title)))
+                    if suggestion:
+                        page = first_page(self.client.query_all(build_page_params(suggestion, props)))
+        except UpstreamUnavailable:
+            raise
+        except Exception:
             return None
 
         if not page:
             return None
 
+        if "disambiguation" in page.get("pageprops", {}):
+            raise disambiguation_error(title, self._disambiguation_options(page["title"]))
+
         try:
-            content = page.content or ""
-            words = re.findall(r'\b[a-zA-Záéíóúñ]{3,}\b', content.lower())
-
-            stopwords = {
-                'el', 'la', 'y', 'para', 'son', 'esto', 'eso', 'desde', 'con',
-                'fue', 'fueron', 'tener', 'tiene', 'tenía', 'no', 'pero', 'tú',
-                'tu', 'su', 'sus', 'acerca', 'cual', 'será', 'han sido', 'ellos', 'allí',
-                'cuando', 'qué', 'quién', 'cómo', 'también', 'uno', 'dos', 'puede',
-                'todos', 'más', 'algunos', 'cualquier', 'cada', 'la mayoría'
-            }
-
-            frequent_word_counts = Counter(w for w in words if w not in stopwords).most_common(10)
-            frequent_words_for_schema = list(frequent_word_counts)
-
-            references = list(page.references) if hasattr(page, 'references') else []
-            page_url = page.url if hasattr(page, 'url') else ""
-
-            blob = TextBlob(content)
-            sentiment_polarity = blob.sentiment.polarity
-            sentiment_subjectivity = blob.sentiment.subjectivity
-
-            sentiment_label = "neutral"
-            if sentiment_polarity > 0.1:
-                sentiment_label = "positivo"
-            elif sentiment_polarity < -0.1:
-                sentiment_label = "negativo"
-
-            return WikipediaArticleDetail(
-                title=page.title,
-                summary=page.summary or "",
-                full_url=page_url,
-                content=content,
-                references=references,
-                url=page_url,
-                word_count=len(words),
-                frequent_words=frequent_words_for_schema,
-                sentiment_polarity=sentiment_polarity,
-                sentiment_subjectivity=sentiment_subjectivity,
-                sentiment_label=sentiment_label
-            )
-        except Exception as e:
+            analysis = None
+            if "extract" in props:
+                analysis = analysis_pool.analyze(
+                    page.get("extract") or "", partial(analyze_content, sentiment=sentiment, lang=self.lang)
+                )
+            return build_page_article(page, props, analysis)
+        except AnalysisPoolSaturated:
+            raise analysis_unavailable()
+        except Exception:
             return None
+
+    def _disambiguation_options(self, title: str) -> List[str]:
+        try:
+            return page_links(first_page(self.client.query(build_links_params(title))) or {})
+        except Exception:
+            return []
+
+def build_article_detail(title: str, summary: str, content: str, references: List[str], page_url: str,
+                         analysis: ContentAnalysis, revision_id: Optional[int] = None) -> WikipediaArticleDetail:
+    # Built from MediaWiki's JSON and our own analysis, already of the right types:
+    # skip validating the whole content and references again.
+    return WikipediaArticleDetail.model_construct(
+        title=title,
+        summary=summary,
+        full_url=page_url,
+        content=content,
+        references=references,
+        url=page_url,
+        word_count=analysis.word_count,
+        frequent_words=analysis.frequent_words,
+        sentiment_polarity=analysis.sentiment_polarity,
+        sentiment_subjectivity=analysis.sentiment_subjectivity,
+        sentiment_label=analysis.sentiment_label,
+        revision_id=revision_id
+    )
+
+
+# Stands in for the analysis of articles fetched without their text.
+_NO_ANALYSIS = ContentAnalysis(
+    word_count=0, frequent_words=[], sentiment_polarity=0.0, sentiment_subjectivity=0.0, sentiment_label="neutral",
+)
+
+
+def build_page_article(page: dict, props: FrozenSet[str],
+                       analysis: Optional[ContentAnalysis] = None) -> WikipediaArticleDetail:
+    """The article in a page of an article query made with ``props``; ``analysis`` is that of its extract."""
+    content = page.get("extract") or ""
+    return build_article_detail(
+        title=page["title"],
+        summary=page_intro(content),
+        content=content if "extract" in props else "",
+        references=page_references(page),
+        page_url=page.get("fullurl", ""),
+        analysis=analysis or _NO_ANALYSIS,
+        revision_id=page.get("lastrevid"),
+    )
+
+
+def disambiguation_error(title: str, options: List[str]) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"'{title}' es una página de desambiguación. Proporcione un título más específico. Opciones: {options[:5]}"
+    )
+
+
+def analysis_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="El servicio de análisis está saturado. Inténtelo de nuevo en unos segundos.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def upstream_unavailable(exc: UpstreamUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Wikipedia no está disponible en este momento. Inténtelo de nuevo más tarde.",
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
@@ -0,0 +1,156 @@
+import asyncio
+from functools import partial
+from typing import FrozenSet, Iterable, List, Optional
+
+from app.schemas.wikipedia import WikipediaSearchArticle, WikipediaArticleDetail
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.analysis import AnalysisPoolSaturated, analysis_pool, analyze_content
+from app.services.cache import ArticleCache, article_cache
+from app.services.mediawiki import (
+    ARTICLE_PROPS,
+    AsyncMediaWikiClient,
+    article_props,
+    build_links_params,
+    build_page_params,
+    build_search_params,
+    build_suggest_params,
+    default_lang,
+    first_page,
+    get_async_mediawiki_client,
+    normalize_query,
+    normalize_title,
+    page_links,
+    parse_search_response,
+    parse_suggestion,
+)
+from app.services.sentiment import sentiment_cache_key
+from app.services.singleflight import AsyncSingleFlight
+from app.services.upstream import UpstreamUnavailable
+from app.services.wikipedia_api import (
+    analysis_unavailable,
+    build_page_article,
+    disambiguation_error,
+    upstream_unavailable,
+)
+
+
+class AsyncWikipediaService:
+    """Same contract as WikipediaService, but every upstream call is awaited on the shared httpx pool."""
+
+    def __init__(self, client: Optional[AsyncMediaWikiClient] = None, cache: Optional[ArticleCache] = None,
+                 lang: Optional[str] = None):
+        self.lang = lang or (client.lang if client else default_lang())
+        self.client = client or get_async_mediawiki_client(self.lang)
+        self.cache = cache or article_cache
+        self.flights = AsyncSingleFlight()
+
+    async def search_articles(self, query: str, limit: int = 10) -> List[WikipediaSearchArticle]:
+        actual_limit = min(max(1, limit), 50)
+        return await self.flights.do(("search", normalize_query(query), actual_limit), self._search_articles, query, actual_limit)
+
+    async def _search_articles(self, query: str, actual_limit: int) -> List[WikipediaSearchArticle]:
+        try:
+            data = await asyncio.wait_for(
+                self.client.query(build_search_params(query, actual_limit)),
+                timeout=settings.WIKIPEDIA_SEARCH_DEADLINE,
+            )
+        except UpstreamUnavailable as exc:
+            raise upstream_unavailable(exc)
+        except Exception:
+            return []
+
+        return [
+            WikipediaSearchArticle(title=hit.title, pageid=hit.pageid, url=hit.url)
+            for hit in parse_search_response(data)
+        ]
+
+    async def get_article_details(self, title: str, sentiment: Optional[str] = None,
+                                  fields: Optional[Iterable[str]] = None) -> Optional[WikipediaArticleDetail]:
+        sentiment = sentiment or settings.SENTIMENT_BACKEND
+        key = sentiment_cache_key(normalize_title(title), sentiment)
+        cached = self.cache.get(self.lang, key)
+        if cached:
+            return cached
+        props = article_props(fields)
+        try:
+            if props != ARTICLE_PROPS:
+                # Partial articles are served but not cached.
+                return await self.flights.do(("article", key, props), self._fetch_article_details, title, sentiment, props)
+            return await self.flights.do(("article", key), self._load_article_details, title, key, sentiment)
+        except UpstreamUnavailable as exc:
+            stale = self.cache.get_stale(self.lang, key)
+            if stale:
+                return stale
+            raise upstream_unavailable(exc)
+
+    async def _load_article_details(self, title: str, key: str, sentiment: str) -> Optional[WikipediaArticleDetail]:
+        # A full fetch already returns lastrevid, so only pay for the lookup when there is something to revalidate.
+        if self.cache.persistent is not None or self.cache.has_stale(self.lang, key):
+            revision_id = await self._current_revision(title)
+            if revision_id is not None:
+                cached = self.cache.get_revision(self.lang, key, revision_id)
+                if cached:
+                    return cached
+
+        return await self._refresh_article_details(title, key, sentiment)
+
+    async def refresh_article_details(self, title: str, sentiment: Optional[str] = None) -> Optional[WikipediaArticleDetail]:
+        """Fetches and analyses the page even if it is cached, and caches the result."""
+        sentiment = sentiment or settings.SENTIMENT_BACKEND
+        key = sentiment_cache_key(normalize_title(title), sentiment)
+        return await self.flights.do(("article", key), self._refresh_article_details, title, key, sentiment)
+
+    async def _refresh_article_details(self, title: str, key: str, sentiment: str) -> Optional[WikipediaArticleDetail]:
+        article = await self._fetch_article_details(title, sentiment)
+        if article:
+            self.cache.put(self.lang, key, article)
+        return article
+
+    async def _current_revision(self, title: str) -> Optional[int]:
+        try:
+            resolved = (await self.client.resolve_titles([title])).get(title)
+        except UpstreamUnavailable:
+            raise
+        except Exception:
+            return None
+        return resolved.revision_id if resolved else None
+
+    async def _fetch_article_details(self, title: str, sentiment: Optional[str] = None,
+                                     props: FrozenSet[str] = ARTICLE_PROPS) -> Optional[WikipediaArticleDetail]:
+        try:
+            with stage_timer("fetch"):
+                # query_all: pages with more than 500 external links come in several parts.
+                page = first_page(await self.client.query_all(build_page_params(title, props)))
+                if page is None:
+                    suggestion = parse_suggestion(await self.client.query(build_suggest_params(title)))
+                    if suggestion:
+                        page = first_page(await self.client.query_all(build_page_params(suggestion, props)))
+        except UpstreamUnavailable:
+            raise
+        except Exception:
+            return None
+
+        if not page:
+            return None
+
+        if "disambiguation" in page.get("pageprops", {}):
+            raise disambiguation_error(title, await self._disambiguation_options(page["title"]))
+
+        try:
+            analysis = None
+            if "extract" in props:
+                analysis = await analysis_pool.analyze_async(
+                    page.get("extract") or "", partial(analyze_content, sentiment=sentiment, lang=self.lang)
+                )
+            return build_page_article(page, props, analysis)
+        except AnalysisPoolSaturated:
+            raise analysis_unavailable()
+        except Exception:
+            return None
+
+    async def _disambiguation_options(self, title: str) -> List[str]:
+        try:
+            return page_links(first_page(await self.client.query(build_links_params(title))) or {})
+        except Exception:
+            return []
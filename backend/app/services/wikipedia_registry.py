@@ -0,0 +1,44 @@
+import threading
+from typing import Dict, Optional, Union
+
+from app.core.config import settings
+from app.services.mediawiki import default_lang
+from app.services.wikipedia_api import WikipediaService
+from app.services.wikipedia_async import AsyncWikipediaService
+
+Service = Union[WikipediaService, AsyncWikipediaService]
+
+
+class WikipediaServices:
+    """
+    Long-lived Wikipedia services, one per wiki language, built on first use.
+
+    Each language gets its own MediaWiki client (and so its own connection
+    pool), request coalescing, stopwords and article cache namespace, so a
+    single worker serves every language in WIKIPEDIA_LANGUAGES at once.
+    """
+
+    def __init__(self):
+        self._services: Dict[str, Service] = {}
+        self._lock = threading.Lock()
+
+    def get(self, lang: Optional[str] = None) -> Service:
+        lang = lang or default_lang()
+        service = self._services.get(lang)
+        if service is None:
+            with self._lock:
+                service = self._services.get(lang)
+                if service is None:
+                    if settings.WIKIPEDIA_BACKEND == "async":
+                        service = AsyncWikipediaService(lang=lang)
+                    else:
+                        service = WikipediaService(lang=lang)
+                    self._services[lang] = service
+        return service
+
+    def clear(self) -> None:
+        with self._lock:
+            self._services.clear()
+
+
+wikipedia_services = WikipediaServices()
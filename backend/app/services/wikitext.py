@@ -0,0 +1,54 @@
+import html
+import re
+
+# Namespaces whose links are media or metadata, not running text (Spanish and English names).
+_NON_TEXT_LINK = re.compile(
+    r'\[\[\s*(?:archivo|file|imagen|image|categoría|category|anexo:?\s*)\s*:[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]',
+    re.IGNORECASE,
+)
+_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_REF = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.DOTALL | re.IGNORECASE)
+_DROPPED_TAGS = re.compile(r'<(gallery|math|syntaxhighlight|source|score|timeline)[^>]*>.*?</\1>',
+                           re.DOTALL | re.IGNORECASE)
+_INNER_TEMPLATE = re.compile(r'\{\{[^{}]*\}\}')
+_TABLE = re.compile(r'^\{\|.*?^\|\}\s*$', re.DOTALL | re.MULTILINE)
+_PIPED_LINK = re.compile(r'\[\[[^\[\]|]*\|([^\[\]]*)\]\]')
+_LINK = re.compile(r'\[\[([^\[\]|]*)\]\]')
+_EXTERNAL_LINK = re.compile(r'\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]')
+_HEADING = re.compile(r'^(={2,6})\s*(.*?)\s*\1\s*$', re.MULTILINE)
+_EMPHASIS = re.compile(r"'{2,5}")
+_TAG = re.compile(r'<[^>]+>')
+_LIST_MARKER = re.compile(r'^[*#:;]+\s*', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+def strip_wikitext(text: str) -> str:
+    """
+    Approximates the plain text MediaWiki's TextExtracts would return for a page.
+
+    Drops comments, references, templates, tables, media and category links;
+    keeps link labels and ``== Heading ==`` lines so section handling matches
+    plain-text extracts.
+    """
+    text = _COMMENT.sub('', text)
+    text = _REF.sub('', text)
+    text = _DROPPED_TAGS.sub('', text)
+
+    # Templates nest, so peel them from the inside out.
+    previous = None
+    while previous != text:
+        previous = text
+        text = _INNER_TEMPLATE.sub('', text)
+
+    text = _TABLE.sub('', text)
+    text = _NON_TEXT_LINK.sub('', text)
+    text = _PIPED_LINK.sub(r'\1', text)
+    text = _LINK.sub(r'\1', text)
+    text = _EXTERNAL_LINK.sub(r'\1', text)
+    text = _HEADING.sub(lambda m: f"\n{m.group(1)} {m.group(2)} {m.group(1)}", text)
+    text = _EMPHASIS.sub('', text)
+    text = _TAG.sub('', text)
+    text = _LIST_MARKER.sub('', text)
+    text = html.unescape(text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return text.strip()
@@ -0,0 +1,76 @@
+"""
+Microbenchmark of the article analysis: the original whole-text pipeline
+against the single-pass chunked engine in app.services.analysis.
+
+Reports wall time and peak traced memory for Spanish articles of increasing
+size, built from the recorded fixtures in benchmarks/fixtures.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analysis --sizes 10000,100000,1000000,5000000
+"""
+import argparse
+import json
+import re
+import time
+import tracemalloc
+from collections import Counter
+
+from textblob import TextBlob
+
+from app.services.analysis import STOPWORDS, analyze_content
+from benchmarks.results import save_results
+from benchmarks.stub_wikipedia import load_fixtures, sized_page
+
+
+def legacy_analyze(content: str):
+    """The pipeline as it was before the chunked engine, kept here as the baseline."""
+    words = re.findall(r'\b[a-zA-Záéíóúñ]{3,}\b', content.lower())
+    frequent = Counter(w for w in words if w not in STOPWORDS).most_common(10)
+    blob = TextBlob(content)
+    return len(words), frequent, blob.sentiment.polarity, blob.sentiment.subjectivity
+
+
+def make_article(size: int) -> str:
+    return sized_page(size, load_fixtures(), pageid=0).content
+
+
+def measure(fn, content: str) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(content)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_mib": round(peak / 2 ** 20, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated article sizes in characters")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/analysis-<commit>.json)")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        content = make_article(size)
+        results.append({
+            "size": size,
+            "legacy": measure(legacy_analyze, content),
+            "streaming": measure(analyze_content, content),
+        })
+
+    if args.save is not None:
+        save_results("analysis", {"sizes": args.sizes}, results, args.save or None)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'chars':>10} {'legacy s':>10} {'legacy MiB':>11} {'stream s':>10} {'stream MiB':>11}")
+    for r in results:
+        print(f"{r['size']:>10} {r['legacy']['seconds']:>10} {r['legacy']['peak_mib']:>11} "
+              f"{r['streaming']['seconds']:>10} {r['streaming']['peak_mib']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark of the sentiment backends in app.services.sentiment: throughput
+of batch scoring and how much the backends agree with each other.
+
+Throughput is measured with score_batch over the paragraphs of the recorded
+fixtures (many short documents) and over whole articles of increasing size
+(few long ones). Agreement compares every backend against TextBlob on the
+paragraphs: the share of documents given the same label and the Pearson
+correlation of the polarities.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sentiment --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import math
+import time
+from typing import List, Sequence
+
+from app.services.sentiment import SENTIMENT_BACKENDS, TextBlobSentiment, get_sentiment_backend
+from benchmarks.results import save_results
+from benchmarks.stub_wikipedia import load_fixtures, sized_page
+
+
+def paragraphs(min_chars: int = 200) -> List[str]:
+    """The paragraphs of the recorded articles long enough to carry some sentiment."""
+    return [
+        paragraph.strip()
+        for page in load_fixtures()
+        for paragraph in page.content.split("\n")
+        if len(paragraph.strip()) >= min_chars
+    ]
+
+
+def label(polarity: float) -> str:
+    # Same thresholds as analyze_content.
+    if polarity > 0.1:
+        return "positivo"
+    if polarity < -0.1:
+        return "negativo"
+    return "neutral"
+
+
+def pearson(xs: Sequence[float], ys: Sequence[float]) -> float:
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    var_y = sum((y - mean_y) ** 2 for y in ys)
+    if not var_x or not var_y:
+        return 0.0
+    return cov / math.sqrt(var_x * var_y)
+
+
+def throughput(backend, documents: List[str], repeat: int) -> dict:
+    chars = sum(len(document) for document in documents)
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        backend.score_batch(documents)
+        best = min(best, time.perf_counter() - started)
+    return {
+        "seconds": round(best, 4),
+        "docs_per_second": round(len(documents) / best, 1),
+        "chars_per_second": round(chars / best, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated article sizes in characters")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best one is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/sentiment-<commit>.json)")
+    args = parser.parse_args()
+
+    docs = paragraphs()
+    fixtures = load_fixtures()
+    pages = {size: sized_page(size, fixtures, pageid=0).content for size in (int(s) for s in args.sizes.split(","))}
+    backends = [get_sentiment_backend(name) for name in SENTIMENT_BACKENDS]
+    for backend in backends:
+        # Lexicons load on first use; keep that out of the measurements.
+        backend.score_batch(["warm up"])
+
+    results = []
+    for backend in backends:
+        results.append({"backend": backend.name, "size": "paragraphs", **throughput(backend, docs, args.repeat)})
+        for size, content in pages.items():
+            results.append({"backend": backend.name, "size": size, **throughput(backend, [content], args.repeat)})
+
+    reference = get_sentiment_backend(TextBlobSentiment.name).score_batch(docs)
+    agreement = []
+    for backend in backends:
+        if backend.name == TextBlobSentiment.name:
+            continue
+        scores = backend.score_batch(docs)
+        same = sum(label(a.polarity) == label(b.polarity) for a, b in zip(scores, reference))
+        agreement.append({
+            "backend": f"{backend.name}~{TextBlobSentiment.name}",
+            "documents": len(docs),
+            "label_agreement": round(same / len(docs), 3),
+            "polarity_correlation": round(pearson([s.polarity for s in scores], [s.polarity for s in reference]), 3),
+        })
+
+    if args.save is not None:
+        save_results("sentiment", {"sizes": args.sizes, "repeat": args.repeat}, results + agreement, args.save or None)
+    if args.json:
+        print(json.dumps(results + agreement, indent=2))
+        return
+    print(f"{'backend':>12} {'chars':>10} {'seconds':>9} {'docs/s':>10} {'chars/s':>12}")
+    for r in results:
+        print(f"{r['backend']:>12} {r['size']:>10} {r['seconds']:>9} {r['docs_per_second']:>10} "
+              f"{r['chars_per_second']:>12}")
+    print()
+    print(f"{'backends':>22} {'documents':>10} {'same label':>11} {'polarity r':>11}")
+    for r in agreement:
+        print(f"{r['backend']:>22} {r['documents']:>10} {r['label_agreement']:>11} {r['polarity_correlation']:>11}")
+
+
+if __name__ == "__main__":
+    main()
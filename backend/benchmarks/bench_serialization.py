@@ -0,0 +1,166 @@
+"""
+Benchmark of the JSON response path of ``GET /wikipedia/article/{title}``
+on small and very large articles.
+
+Each size is measured two ways:
+
+- ``encode:*``: building the article model and encoding it, on its own.
+  ``stdlib`` is the former path (validated model, JSON-mode dump, json
+  module); ``orjson`` is the current one (model_construct, python-mode
+  dump, orjson).
+- ``route:*``: whole requests to the endpoint over ASGI, with the analysed
+  article already in the article cache, so only routing, ETag and body
+  encoding are left. ``cached`` reuses the encoded body kept under the ETag.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --sizes 5000,100000,1000000,5000000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.results import save_results
+from benchmarks.stub_wikipedia import load_fixtures, sized_page
+
+REFERENCES = 300
+
+
+def article_fields(size: int) -> Dict[str, object]:
+    page = sized_page(size, load_fixtures(), pageid=1)
+    url = f"https://es.wikipedia.org/wiki/{page.title.replace(' ', '_')}"
+    return {
+        "title": page.title,
+        "summary": page.content[:1000],
+        "full_url": url,
+        "content": page.content,
+        "references": [f"https://example.org/referencia/{i}" for i in range(REFERENCES)],
+        "url": url,
+        "word_count": len(page.content.split()),
+        "frequent_words": [(f"palabra{i}", 100 - i) for i in range(10)],
+        "sentiment_polarity": 0.05,
+        "sentiment_subjectivity": 0.4,
+        "sentiment_label": "neutral",
+        "revision_id": page.lastrevid,
+    }
+
+
+def best_of(fn: Callable[[], object], calls: int, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def row(operation: str, size: int, seconds: float, body_bytes: int) -> dict:
+    return {
+        "operation": operation,
+        "size": size,
+        "microseconds": round(seconds * 1e6, 1),
+        "mb_per_second": round(body_bytes / seconds / 1e6, 1),
+    }
+
+
+def bench_encoding(size: int, fields: Dict[str, object], calls: int, repeat: int) -> List[dict]:
+    from app.core.http_cache import dumps_json, orjson
+    from app.schemas.wikipedia import WikipediaArticleDetail
+
+    def stdlib() -> bytes:
+        article = WikipediaArticleDetail(**fields)
+        return json.dumps(article.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def fast() -> bytes:
+        return dumps_json(WikipediaArticleDetail.model_construct(**fields).model_dump())
+
+    body = stdlib()
+    assert fast() == body, "both paths must produce the same bytes"
+    results = [row("encode:stdlib", size, best_of(stdlib, calls, repeat), len(body))]
+    if orjson is not None:
+        results.append(row("encode:orjson", size, best_of(fast, calls, repeat), len(body)))
+    return results
+
+
+async def bench_route(size: int, fields: Dict[str, object], calls: int, repeat: int) -> List[dict]:
+    import httpx
+
+    from app.core import http_cache
+    from app.main import app
+    from app.schemas.wikipedia import WikipediaArticleDetail
+    from app.services.cache import article_cache
+    from app.services.mediawiki import normalize_title
+
+    article = WikipediaArticleDetail.model_construct(**fields)
+    article_cache.put("es", normalize_title(article.title), article)
+    path = f"/api/v1/wikipedia/article/{article.title}"
+    headers = {"Accept-Encoding": "identity"}
+    encoder, max_bytes = http_cache.orjson, http_cache.encoded_bodies.max_bytes
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        body = (await client.get(path, params={"sentiment": "textblob"}, headers=headers)).content
+
+        async def measure() -> float:
+            best = math.inf
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for _ in range(calls):
+                    response = await client.get(path, params={"sentiment": "textblob"}, headers=headers)
+                    assert response.status_code == 200
+                best = min(best, (time.perf_counter() - started) / calls)
+            return best
+
+        results = []
+        try:
+            http_cache.encoded_bodies.max_bytes = 0
+            http_cache.encoded_bodies.clear()
+            http_cache.orjson = None
+            results.append(row("route:stdlib", size, await measure(), len(body)))
+            http_cache.orjson = encoder
+            if encoder is not None:
+                results.append(row("route:orjson", size, await measure(), len(body)))
+            http_cache.encoded_bodies.max_bytes = max(max_bytes, 8 * len(body))
+            results.append(row("route:cached", size, await measure(), len(body)))
+        finally:
+            http_cache.orjson = encoder
+            http_cache.encoded_bodies.max_bytes = max_bytes
+            http_cache.encoded_bodies.clear()
+            article_cache.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5000,100000,1000000,5000000", help="Comma separated article sizes in characters")
+    parser.add_argument("--calls", type=int, default=0, help="Calls per measurement (default: scaled to the size)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best one is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/serialization-<commit>.json)")
+    args = parser.parse_args()
+    # The app's settings need this; nothing here touches the database or Wikipedia.
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        calls = args.calls or max(5, min(2000, 20_000_000 // size))
+        fields = article_fields(size)
+        results += bench_encoding(size, fields, calls, args.repeat)
+        results += asyncio.run(bench_route(size, fields, calls, args.repeat))
+
+    if args.save is not None:
+        save_results("serialization", {"sizes": args.sizes, "repeat": args.repeat}, results, args.save or None)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'operation':>14} {'chars':>9} {'µs/call':>11} {'MB/s':>9}")
+    for r in results:
+        print(f"{r['operation']:>14} {r['size']:>9} {r['microseconds']:>11} {r['mb_per_second']:>9}")
+
+
+if __name__ == "__main__":
+    main()
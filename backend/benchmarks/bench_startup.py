@@ -0,0 +1,158 @@
+"""
+Benchmark of the API process's cold start, to keep startup cost in check
+across releases.
+
+Each run is a fresh interpreter that:
+
+- ``import``: imports ``app.main``, as the ASGI server does before listening;
+- ``ready``: then runs the app's lifespan until ``/readyz`` would report
+  ready, i.e. the background warm-up (analysis workers, similarity index,
+  database connection, Wikipedia clients) is done; measured from the start
+  of the import.
+
+Besides those two rows, ``module:*`` rows hold the cumulative import time
+(``python -X importtime``) of the heaviest dependencies the app imports,
+so a regression can be traced to the module that brought it in. Times are
+the median of ``--runs`` processes. The database is a throwaway SQLite file
+and nothing is sent to Wikipedia.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --top 25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.results import save_results
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Imported by the app at startup; each one used to be (or could become) a large share of it.
+TRACKED_MODULES = (
+    "fastapi", "pydantic", "sqlalchemy", "sqlalchemy.ext.asyncio", "prometheus_client",
+    "app.core.config", "app.api.v1.api",
+)
+# Must stay out of the import path; loaded by the warm-up or on first use.
+LAZY_MODULES = ("numpy", "textblob", "requests", "httpx", "aiosqlite", "asyncpg", "psycopg2",
+                "sqlalchemy.dialects.postgresql")
+
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def until_ready():
+    async with app.router.lifespan_context(app):
+        while not app.state.ready:
+            await asyncio.sleep(0.001)
+        return time.perf_counter()
+
+ready = asyncio.run(until_ready()) if {ready} else imported
+print(json.dumps({{
+    "import": imported - started,
+    "ready": ready - started,
+    "loaded": [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe_env(database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "WARMUP_ENABLED": "False",
+    })
+    return env
+
+
+def run_probe(env: Dict[str, str], ready: bool) -> dict:
+    code = PROBE.format(ready=ready, lazy=LAZY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_times(env: Dict[str, str]) -> Dict[str, float]:
+    """Cumulative import time of every module ``import app.main`` loads, in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1e6)
+    return times
+
+
+def row(operation: str, samples: List[float]) -> dict:
+    return {
+        "operation": operation,
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=0, help="Also print the N slowest modules of one import")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/startup.db"
+        env = probe_env(database_url)
+        # Created with the probes' own settings, which this process never loads.
+        subprocess.run(
+            [sys.executable, "-c", "from sqlalchemy import create_engine; from app.database.models import Base; "
+             f"Base.metadata.create_all(create_engine({database_url!r}))"],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+
+        probes = [run_probe(env, ready=True) for _ in range(args.runs)]
+        imports = [run_probe(env, ready=False) for _ in range(args.runs)]
+        module_runs = [import_times(env) for _ in range(args.runs)]
+
+    results = [
+        row("import", [p["import"] for p in imports]),
+        row("ready", [p["ready"] for p in probes]),
+    ]
+    for module in TRACKED_MODULES:
+        samples = [times[module] for times in module_runs if module in times]
+        if samples:
+            results.append(row(f"module:{module}", samples))
+    eagerly_loaded = sorted({name for p in imports for name in p["loaded"]})
+
+    if eagerly_loaded:
+        print(f"imported by app.main but meant to load lazily: {', '.join(eagerly_loaded)}", file=sys.stderr)
+    if args.save is not None:
+        save_results("startup", {"runs": args.runs}, results, args.save or None)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'operation':>32} {'median ms':>10} {'min ms':>8}")
+    for r in results:
+        print(f"{r['operation']:>32} {r['median_ms']:>10} {r['min_ms']:>8}")
+    if args.top:
+        slowest = sorted(module_runs[0].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"\n{'module':>48} {'cumulative ms':>14}")
+        for name, seconds in slowest:
+            print(f"{name:>48} {seconds * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
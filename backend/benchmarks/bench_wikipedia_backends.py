@@ -0,0 +1,107 @@
+"""
+Requests per second of /api/v1/wikipedia/search under concurrent load.
+
+Runs the app in-process against the local fake MediaWiki server (with
+artificial upstream latency) and compares:
+
+  * blocking   - the blocking service called straight from the event loop (pre-async behaviour)
+  * sync       - WIKIPEDIA_BACKEND=sync, blocking service moved to the threadpool
+  * async      - WIKIPEDIA_BACKEND=async, shared httpx pool
+
+Usage (from backend/):
+    python -m benchmarks.bench_wikipedia_backends --requests 200 --concurrency 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.results import save_results
+from tests.fakes.fake_mediawiki import FakeMediaWiki
+
+
+async def _drive(app, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(
+                    f"{settings.API_V1_STR}/wikipedia/search", params={"query": f"python {i}", "limit": 3}
+                )
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - started
+
+
+def run_backend(backend: str, fake: FakeMediaWiki, total: int, concurrency: int) -> dict:
+    from app.api.v1.endpoints import wiki_api_routes
+    from app.main import app
+    from app.services import mediawiki, upstream
+    from app.services.wikipedia_registry import wikipedia_services
+
+    settings.WIKIPEDIA_API_URL_TEMPLATE = fake.api_url
+    settings.WIKIPEDIA_BACKEND = "sync" if backend == "blocking" else backend
+    mediawiki.get_mediawiki_client.cache_clear()
+    mediawiki._async_clients.clear()
+    upstream._governors.clear()
+    wikipedia_services.clear()
+
+    service = wiki_api_routes.get_wikipedia_service()
+
+    original = wiki_api_routes._call_service
+    if backend == "blocking":
+        async def call_on_loop(method, *args, **kwargs):
+            return method(*args, **kwargs)
+        wiki_api_routes._call_service = call_on_loop
+    try:
+        elapsed = asyncio.run(_drive(app, total, concurrency))
+    finally:
+        wiki_api_routes._call_service = original
+
+    return {
+        "backend": backend,
+        "service": type(service).__name__,
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial upstream latency in seconds")
+    parser.add_argument("--backends", default="blocking,sync,async")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/wikipedia_backends-<commit>.json)")
+    args = parser.parse_args()
+
+    with FakeMediaWiki(latency=args.latency) as fake:
+        results = [
+            run_backend(backend, fake, args.requests, args.concurrency)
+            for backend in args.backends.split(",")
+        ]
+
+    if args.save is not None:
+        params = {"requests": args.requests, "concurrency": args.concurrency, "latency": args.latency}
+        save_results("wikipedia_backends", params, results, args.save or None)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<10} {'req/s':>10} {'seconds':>10}")
+    for result in results:
+        print(f"{result['backend']:<10} {result['requests_per_second']:>10} {result['seconds']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares two saved benchmark result files, e.g. from two commits.
+
+Rows are matched on their identifying fields (endpoint, dialect, size, ...)
+and every timing is compared. Throughputs (``*_per_second``) regress when
+they drop, everything else when it grows. Exits with status 1 when any
+metric regressed by more than ``--threshold``.
+
+Usage (from backend/):
+    python -m benchmarks.compare benchmarks/results/load-<old>.json benchmarks/results/load-<new>.json
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+KEY_FIELDS = ("endpoint", "operation", "dialect", "backend", "size", "rows")
+
+
+def _rows(document: dict) -> Dict[Tuple, dict]:
+    rows = {}
+    for row in document["results"]:
+        key = tuple((field, row[field]) for field in KEY_FIELDS if field in row)
+        rows[key] = row
+    return rows
+
+
+def _metrics(row: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for name, value in row.items():
+        if name in KEY_FIELDS:
+            continue
+        if isinstance(value, dict):
+            yield from _metrics(value, f"{prefix}{name}.")
+        elif isinstance(value, float):
+            yield prefix + name, value
+
+
+def compare(base: dict, new: dict, threshold: float):
+    """Yields (row, metric, base value, new value, relative change, regressed) for every shared metric."""
+    new_rows = _rows(new)
+    for key, base_row in _rows(base).items():
+        new_row = new_rows.get(key)
+        if new_row is None:
+            continue
+        new_metrics = dict(_metrics(new_row))
+        for metric, before in _metrics(base_row):
+            after = new_metrics.get(metric)
+            if after is None or not before:
+                continue
+            change = (after - before) / before
+            worse = -change if metric.endswith("_per_second") else change
+            label = " ".join(f"{field}={value}" for field, value in key)
+            yield label, metric, before, after, change, worse > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base {base['environment'].get('commit')}  new {new['environment'].get('commit')}")
+
+    regressions = 0
+    for label, metric, before, after, change, regressed in compare(base, new, args.threshold):
+        regressions += regressed
+        flag = "REGRESSION" if regressed else ""
+        print(f"{label:<40} {metric:<24} {before:>12.4f} {after:>12.4f} {change:>+8.1%} {flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Load driver: throughput and p50/p95/p99 latency for each API endpoint.
+
+By default the app runs in-process on a throwaway SQLite database, talking
+to the stub MediaWiki server (benchmarks/stub_wikipedia.py) with artificial
+upstream latency, so runs are reproducible and never touch Wikipedia. With
+``--base-url`` it drives an already running server instead (start it
+against the stub with WIKIPEDIA_API_URL_TEMPLATE).
+
+Endpoints run one after the other, each with ``--requests`` requests at
+most ``--concurrency`` at a time. ``--cold`` disables the article cache
+(in-process only), so every article request fetches and analyses again.
+
+Usage (from backend/):
+    python -m benchmarks.load --requests 200 --concurrency 20 --latency 0.02 --save
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --endpoints search,article
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.results import percentiles, save_results
+from benchmarks.stub_wikipedia import DEFAULT_SIZES, bench_pages, stub_mediawiki
+
+API = "/api/v1"
+SEARCH_TERMS = ["historia", "ciudad", "python", "río", "revolución", "literatura", "energía", "cultura"]
+
+# (method, path, request kwargs) for the i-th request of an endpoint.
+RequestFactory = Callable[[int, List[str]], Tuple[str, str, dict]]
+
+
+def _saved_article(i: int, titles: List[str]) -> dict:
+    title = titles[i % len(titles)]
+    return {
+        "wikipedia_title": f"{title} #{i}",
+        "wikipedia_url": "https://es.wikipedia.org/wiki/" + title.replace(" ", "_"),
+        "processed_summary": "La historia de la ciudad y su cultura, resumida para la prueba de carga.",
+        "word_count": 1000 + i,
+        "frequent_words": [["historia", 12], ["ciudad", 9], ["cultura", 4]],
+        "sentiment_polarity": 0.1,
+        "sentiment_subjectivity": 0.4,
+        "sentiment_label": "neutral",
+        "user_id": 1 + i % 10,
+    }
+
+
+ENDPOINTS: Dict[str, RequestFactory] = {
+    "search": lambda i, titles: (
+        "GET", f"{API}/wikipedia/search", {"params": {"query": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": 5}},
+    ),
+    "article": lambda i, titles: ("GET", f"{API}/wikipedia/article/{titles[i % len(titles)]}", {}),
+    "article_stats": lambda i, titles: (
+        "GET", f"{API}/wikipedia/article/{titles[i % len(titles)]}",
+        {"params": {"fields": "title,word_count,frequent_words,sentiment_label"}},
+    ),
+    "batch": lambda i, titles: ("POST", f"{API}/wikipedia/articles:batch", {"json": {"titles": titles}}),
+    "save": lambda i, titles: ("POST", f"{API}/articles/", {"json": _saved_article(i, titles)}),
+    "saved_list": lambda i, titles: ("GET", f"{API}/articles/", {"params": {"limit": 20, "user_id": 1 + i % 10}}),
+    "saved_search": lambda i, titles: (
+        "GET", f"{API}/articles/search", {"params": {"q": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": 20}},
+    ),
+    "saved_stats": lambda i, titles: ("GET", f"{API}/articles/stats", {"params": {"user_id": 1 + i % 10}}),
+}
+
+
+async def drive(client: httpx.AsyncClient, endpoint: str, titles: List[str], total: int, concurrency: int) -> dict:
+    factory = ENDPOINTS[endpoint]
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        method, url, kwargs = factory(i, titles)
+        async with slots:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                await response.aread()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        "endpoint": endpoint,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        **percentiles(latencies),
+    }
+
+
+async def run_load(client: httpx.AsyncClient, endpoints: List[str], titles: List[str],
+                   total: int, concurrency: int) -> List[dict]:
+    return [await drive(client, endpoint, titles, total, concurrency) for endpoint in endpoints]
+
+
+def in_process_client(stub_url: str, backend: str, cold: bool) -> httpx.AsyncClient:
+    """The app wired to the stub and to the database DATABASE_URL points at, served over ASGI."""
+    from app.api.v1.endpoints import wiki_api_routes
+    from app.core.config import settings
+    from app.database.models import Base
+    from app.database.session import engine
+    from app.main import app
+    from app.services import mediawiki, upstream
+    from app.services.cache import article_cache
+    from app.services.wikipedia_registry import wikipedia_services
+
+    settings.WIKIPEDIA_API_URL_TEMPLATE = stub_url
+    settings.WIKIPEDIA_BACKEND = backend
+    mediawiki.get_mediawiki_client.cache_clear()
+    mediawiki._async_clients.clear()
+    upstream._governors.clear()
+    wikipedia_services.clear()
+    wiki_api_routes.get_wikipedia_service()
+    article_cache.clear()
+    if cold:
+        article_cache.maxsize = 0
+    Base.metadata.create_all(bind=engine)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma separated, run in this order")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub upstream latency in seconds")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Sizes of the synthetic stub articles, in characters")
+    parser.add_argument("--backend", choices=("sync", "async"), default="async", help="In-process WIKIPEDIA_BACKEND")
+    parser.add_argument("--cold", action="store_true", help="Disable the article cache (in-process only)")
+    parser.add_argument("--base-url", default=None, help="Drive a running server instead of the in-process app")
+    parser.add_argument("--database-url", default=None, help="In-process database (default: a temporary SQLite file)")
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="Save results as JSON (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    titles = [page.title for page in bench_pages(sizes)]
+
+    db_path: Optional[str] = None
+    if args.base_url is None:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        else:
+            fd, db_path = tempfile.mkstemp(suffix=".db")
+            os.close(fd)
+            os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    async def run(stub_url: Optional[str]) -> List[dict]:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        else:
+            client = in_process_client(stub_url, args.backend, args.cold)
+        async with client:
+            return await run_load(client, endpoints, titles, args.requests, args.concurrency)
+
+    try:
+        if args.base_url:
+            results = asyncio.run(run(None))
+        else:
+            with stub_mediawiki(args.latency, sizes) as stub:
+                results = asyncio.run(run(stub.api_url))
+    finally:
+        if db_path:
+            os.remove(db_path)
+
+    print(f"{'endpoint':<14} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for r in results:
+        print(f"{r['endpoint']:<14} {r['requests_per_second']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['errors']:>7}")
+    if args.save is not None:
+        params = {k: v for k, v in vars(args).items() if k not in ("save", "database_url")}
+        save_results("load", params, results, args.save or None)
+
+
+if __name__ == "__main__":
+    main()
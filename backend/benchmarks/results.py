@@ -0,0 +1,66 @@
+"""
+Saving benchmark results as JSON, with what is needed to compare runs:
+the commit they were taken at, the machine and the benchmark's parameters.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def environment() -> Dict[str, object]:
+    return {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def percentiles(samples: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles, plus mean and max, of samples in seconds, reported in milliseconds."""
+    if not samples:
+        return {**{f"p{p}_ms": 0.0 for p in points}, "mean_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    result = {
+        f"p{p}_ms": round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 3)
+        for p in points
+    }
+    result["mean_ms"] = round(sum(ordered) / len(ordered) * 1000, 3)
+    result["max_ms"] = round(ordered[-1] * 1000, 3)
+    return result
+
+
+def default_output_path(name: str) -> Path:
+    commit = git_revision()["commit"] or "nogit"
+    return RESULTS_DIR / f"{name}-{str(commit)[:12]}.json"
+
+
+def save_results(benchmark: str, params: dict, results: list, output: Optional[str] = None) -> Path:
+    """Writes results to ``output``, or to benchmarks/results/<benchmark>-<commit>.json."""
+    path = Path(output) if output else default_output_path(benchmark)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {"benchmark": benchmark, "environment": environment(), "params": params, "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"results saved to {path}", file=sys.stderr)
+    return path
@@ -0,0 +1,126 @@
+"""
+Stub MediaWiki API for benchmarks.
+
+Serves the Spanish articles recorded in benchmarks/fixtures/eswiki_articles.json
+plus synthetic articles of the requested sizes (built from the same text),
+with optional artificial latency per upstream request. The benchmarks start
+it in-process; to benchmark a real server run it on its own and point the
+API at it:
+
+    python -m benchmarks.stub_wikipedia --port 8081 --latency 0.05 --sizes 2000,20000,200000
+    WIKIPEDIA_API_URL_TEMPLATE=http://127.0.0.1:8081/w/api.php uvicorn app.main:app
+
+``--record`` refreshes the fixtures from es.wikipedia.org (or whatever
+WIKIPEDIA_API_URL_TEMPLATE points at).
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from tests.fakes.fake_mediawiki import FakeMediaWiki, FakePage
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures" / "eswiki_articles.json"
+DEFAULT_SIZES = (2_000, 20_000, 200_000)
+
+
+def load_fixtures(path: Path = FIXTURES_PATH) -> List[FakePage]:
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    return [
+        FakePage(
+            title=record["title"],
+            pageid=record["pageid"],
+            lastrevid=record["lastrevid"],
+            content=record["extract"],
+            extlinks=record.get("extlinks", []),
+        )
+        for record in records
+    ]
+
+
+def sized_title(size: int) -> str:
+    return f"Artículo de {size} caracteres"
+
+
+def sized_page(size: int, fixtures: Sequence[FakePage], pageid: int) -> FakePage:
+    """A page of about ``size`` characters made of the recorded articles, in turn."""
+    parts, length, i = [], 0, 0
+    while length < size:
+        text = fixtures[i % len(fixtures)].content
+        parts.append(text)
+        length += len(text)
+        i += 1
+    content = "\n\n\n== Continuación ==\n".join(parts)
+    if len(content) > size:
+        # Cut at a space so the page does not end in half a word.
+        cut = content.rfind(" ", 0, size)
+        content = content[:cut if cut > 0 else size]
+    return FakePage(title=sized_title(size), pageid=pageid, lastrevid=pageid + 100_000, content=content)
+
+
+def bench_pages(sizes: Iterable[int] = DEFAULT_SIZES, path: Path = FIXTURES_PATH) -> List[FakePage]:
+    fixtures = load_fixtures(path)
+    return fixtures + [sized_page(size, fixtures, 900_000 + i) for i, size in enumerate(sizes)]
+
+
+def stub_mediawiki(latency: float = 0.0, sizes: Iterable[int] = DEFAULT_SIZES, port: int = 0) -> FakeMediaWiki:
+    """FakeMediaWiki loaded with the benchmark pages; start it with ``with`` or ``.start()``."""
+    return FakeMediaWiki(pages=bench_pages(sizes), redirects={"Python": "Python (lenguaje de programación)"},
+                         latency=latency, port=port)
+
+
+def record(titles: Optional[List[str]] = None, path: Path = FIXTURES_PATH) -> None:
+    """Downloads the current extract of every fixture title and rewrites the fixture file."""
+    from app.services.mediawiki import build_page_params, first_page, get_mediawiki_client
+
+    titles = titles or [page.title for page in load_fixtures(path)]
+    client = get_mediawiki_client("es")
+    records = []
+    for title in titles:
+        page = first_page(client.query(build_page_params(title)))
+        if page is None:
+            print(f"skipped {title!r}: not found")
+            continue
+        records.append({
+            "title": page["title"],
+            "pageid": page["pageid"],
+            "lastrevid": page.get("lastrevid", 1),
+            "extract": page.get("extract", ""),
+            "extlinks": [link["url"] for link in page.get("extlinks", [])],
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"recorded {len(records)} articles in {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial latency per request in seconds")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated sizes of the synthetic articles, in characters")
+    parser.add_argument("--record", nargs="*", metavar="TITLE",
+                        help="Refresh the fixtures from Wikipedia (all current titles if none given)")
+    args = parser.parse_args()
+
+    if args.record is not None:
+        record(args.record)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    with stub_mediawiki(args.latency, sizes, args.port) as stub:
+        print(f"stub MediaWiki on {stub.api_url}")
+        for page in stub.pages.values():
+            print(f"  {page.title} ({len(page.content)} chars)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""create articles table
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created before migrations were tracked already have the table.
+    if sa.inspect(op.get_bind()).has_table("articles"):
+        return
+
+    op.create_table(
+        "articles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("wikipedia_title", sa.String(), nullable=False),
+        sa.Column("wikipedia_url", sa.String(), nullable=False),
+        sa.Column("processed_summary", sa.String(), nullable=False),
+        sa.Column("word_count", sa.Integer(), nullable=False),
+        sa.Column("frequent_words", sa.JSON().with_variant(postgresql.JSONB(), "postgresql"), nullable=False),
+        sa.Column("sentiment_polarity", sa.Float(), nullable=True),
+        sa.Column("sentiment_subjectivity", sa.Float(), nullable=True),
+        sa.Column("sentiment_label", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("personal_notes", sa.String(), nullable=True),
+        sa.Column("saved_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_articles_id"), "articles", ["id"], unique=False)
+    op.create_index(op.f("ix_articles_wikipedia_title"), "articles", ["wikipedia_title"], unique=False)
+    op.create_index(op.f("ix_articles_user_id"), "articles", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_articles_user_id"), table_name="articles")
+    op.drop_index(op.f("ix_articles_wikipedia_title"), table_name="articles")
+    op.drop_index(op.f("ix_articles_id"), table_name="articles")
+    op.drop_table("articles")
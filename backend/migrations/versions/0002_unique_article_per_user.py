@@ -0,0 +1,88 @@
+"""unique article per user and title
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _merge_notes(bind, articles) -> None:
+    """
+    Gives the copy that is kept (the highest id) the notes of every copy of
+    its (user_id, wikipedia_title), oldest first, so deleting the others loses none.
+    """
+    duplicated = (
+        sa.select(articles.c.user_id, articles.c.wikipedia_title)
+        .group_by(articles.c.user_id, articles.c.wikipedia_title)
+        .having(sa.func.count() > 1)
+        .subquery()
+    )
+    rows = bind.execute(
+        sa.select(articles.c.id, articles.c.user_id, articles.c.wikipedia_title, articles.c.personal_notes)
+        .join(duplicated, sa.and_(
+            articles.c.user_id == duplicated.c.user_id,
+            articles.c.wikipedia_title == duplicated.c.wikipedia_title,
+        ))
+        .order_by(articles.c.id)
+    ).all()
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.user_id, row.wikipedia_title), []).append(row)
+
+    updates = []
+    for copies in groups.values():
+        notes = []
+        for row in copies:
+            if row.personal_notes and row.personal_notes.strip() and row.personal_notes not in notes:
+                notes.append(row.personal_notes)
+        merged = "\n\n".join(notes) or None
+        if merged != copies[-1].personal_notes:
+            updates.append({"row_id": copies[-1].id, "notes": merged})
+    if updates:
+        bind.execute(
+            articles.update().where(articles.c.id == sa.bindparam("row_id"))
+            .values(personal_notes=sa.bindparam("notes")),
+            updates,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    articles = sa.table(
+        "articles",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("wikipedia_title", sa.String),
+        sa.column("personal_notes", sa.String),
+    )
+    _merge_notes(bind, articles)
+    # Keep the most recently saved copy of every duplicated (user_id, wikipedia_title).
+    op.execute(
+        """
+        DELETE FROM articles
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM articles GROUP BY user_id, wikipedia_title
+        )
+        """
+    )
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.create_unique_constraint("uq_articles_user_id_wikipedia_title", ["user_id", "wikipedia_title"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.drop_constraint("uq_articles_user_id_wikipedia_title", type_="unique")
@@ -0,0 +1,46 @@
+"""saved articles keyset pagination indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination orders by saved_at, so it must never be NULL.
+    op.execute("UPDATE articles SET saved_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE saved_at IS NULL")
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.alter_column("saved_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.create_index("ix_articles_saved_at_id", "articles", ["saved_at", "id"])
+    op.create_index("ix_articles_user_id_saved_at_id", "articles", ["user_id", "saved_at", "id"])
+    op.create_index(
+        "ix_articles_user_id_sentiment_label_saved_at_id", "articles",
+        ["user_id", "sentiment_label", "saved_at", "id"],
+    )
+    op.create_index(
+        "ix_articles_wikipedia_title_pattern", "articles", ["wikipedia_title"],
+        postgresql_ops={"wikipedia_title": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_articles_wikipedia_title_pattern", table_name="articles")
+    op.drop_index("ix_articles_user_id_sentiment_label_saved_at_id", table_name="articles")
+    op.drop_index("ix_articles_user_id_saved_at_id", table_name="articles")
+    op.drop_index("ix_articles_saved_at_id", table_name="articles")
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.alter_column("saved_at", existing_type=sa.DateTime(timezone=True), nullable=True)
@@ -0,0 +1,84 @@
+"""typed frequent_words with GIN index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _normalize(value) -> list:
+    # Same rules as app.database.models.normalize_frequent_words, frozen here
+    # so the migration does not change if the application code does.
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(value, list):
+        return []
+    words = []
+    for item in value:
+        if isinstance(item, str):
+            words.append([item, 0])
+        elif isinstance(item, list) and len(item) == 2 and isinstance(item[0], str):
+            words.append([item[0], int(item[1])])
+        else:
+            return []
+    return words
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Older databases may hold the column as json or text; the GIN index needs jsonb.
+        op.execute("ALTER TABLE articles ALTER COLUMN frequent_words TYPE jsonb USING frequent_words::jsonb")
+
+    # Rewrite legacy rows (JSON-encoded strings, bare lists of words) as [[word, count], ...].
+    articles = sa.table("articles", sa.column("id", sa.Integer), sa.column("frequent_words", sa.JSON))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(articles.c.id, articles.c.frequent_words)
+            .where(articles.c.id > last_id).order_by(articles.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {"row_id": row.id, "words": _normalize(row.frequent_words)}
+            for row in rows if _normalize(row.frequent_words) != row.frequent_words
+        ]
+        if updates:
+            bind.execute(
+                articles.update().where(articles.c.id == sa.bindparam("row_id"))
+                .values(frequent_words=sa.bindparam("words", type_=sa.JSON)),
+                updates,
+            )
+        last_id = rows[-1].id
+
+    if bind.dialect.name == "postgresql":
+        op.create_index(
+            "ix_articles_frequent_words", "articles", ["frequent_words"],
+            postgresql_using="gin", postgresql_ops={"frequent_words": "jsonb_path_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_articles_frequent_words", table_name="articles")
@@ -0,0 +1,82 @@
+"""full-text search over saved articles
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.database.models.SEARCH_DDL at this revision.
+SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('spanish', coalesce(wikipedia_title, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(processed_summary, '')), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(personal_notes, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_articles_search_vector ON articles USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            wikipedia_title, processed_summary, personal_notes,
+            content='articles', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES (new.id, new.wikipedia_title, new.processed_summary, new.personal_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES ('delete', old.id, old.wikipedia_title, old.processed_summary, old.personal_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES ('delete', old.id, old.wikipedia_title, old.processed_summary, old.personal_notes);
+            INSERT INTO articles_fts(rowid, wikipedia_title, processed_summary, personal_notes)
+            VALUES (new.id, new.wikipedia_title, new.processed_summary, new.personal_notes);
+        END
+        """,
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for statement in SEARCH_DDL.get(dialect, []):
+        op.execute(statement)
+    if dialect == "sqlite":
+        # Index the rows that existed before the triggers.
+        op.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_articles_search_vector")
+        op.execute("ALTER TABLE articles DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("articles_fts_insert", "articles_fts_delete", "articles_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS articles_fts")
@@ -0,0 +1,124 @@
+"""per-user saved article aggregates
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import math
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+# Same bucketing as app.crud.article_stats at this revision, frozen here.
+def _word_count_bucket(word_count: int) -> int:
+    return math.floor(math.log2(word_count) * 8) if word_count > 0 else -1
+
+
+def _polarity_bucket(polarity: float) -> int:
+    return min(max(math.floor((polarity + 1) / 0.2), 0), 9)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    user_stats = op.create_table(
+        "user_article_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("article_count", sa.Integer(), nullable=False),
+        sa.Column("total_words", sa.Integer(), nullable=False),
+        sa.Column("scored_count", sa.Integer(), nullable=False),
+        sa.Column("polarity_sum", sa.Float(), nullable=False),
+        sa.Column("subjectivity_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    term_stats = op.create_table(
+        "user_term_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("term", sa.String(), nullable=False),
+        sa.Column("occurrences", sa.Integer(), nullable=False),
+        sa.Column("article_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "term"),
+    )
+    op.create_index("ix_user_term_stats_user_id_occurrences", "user_term_stats", ["user_id", "occurrences"])
+    buckets_table = op.create_table(
+        "user_stat_buckets",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "kind", "bucket"),
+    )
+
+    # Aggregate the articles saved so far; frequent_words is normalised since 0004.
+    bind = op.get_bind()
+    articles = sa.table(
+        "articles", sa.column("id", sa.Integer), sa.column("user_id", sa.Integer),
+        sa.column("word_count", sa.Integer), sa.column("frequent_words", sa.JSON),
+        sa.column("sentiment_polarity", sa.Float), sa.column("sentiment_subjectivity", sa.Float),
+        sa.column("sentiment_label", sa.String),
+    )
+    users = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+    terms = defaultdict(lambda: [0, 0])
+    buckets = defaultdict(int)
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(articles).where(articles.c.id > last_id).order_by(articles.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            totals = users[row.user_id]
+            totals[0] += 1
+            totals[1] += row.word_count or 0
+            if row.sentiment_polarity is not None:
+                totals[2] += 1
+                totals[3] += row.sentiment_polarity
+                totals[4] += row.sentiment_subjectivity or 0.0
+                buckets[(row.user_id, "polarity", str(_polarity_bucket(row.sentiment_polarity)))] += 1
+            buckets[(row.user_id, "sentiment_label", row.sentiment_label or "sin_etiqueta")] += 1
+            buckets[(row.user_id, "word_count", str(_word_count_bucket(row.word_count or 0)))] += 1
+            seen = set()
+            for word, count in row.frequent_words or []:
+                terms[(row.user_id, word)][0] += count
+                if word not in seen:
+                    terms[(row.user_id, word)][1] += 1
+                    seen.add(word)
+        last_id = rows[-1].id
+
+    if users:
+        op.bulk_insert(user_stats, [
+            {"user_id": user_id, "article_count": v[0], "total_words": v[1],
+             "scored_count": v[2], "polarity_sum": v[3], "subjectivity_sum": v[4]}
+            for user_id, v in users.items()
+        ])
+    if terms:
+        op.bulk_insert(term_stats, [
+            {"user_id": user_id, "term": term, "occurrences": v[0], "article_count": v[1]}
+            for (user_id, term), v in terms.items()
+        ])
+    if buckets:
+        op.bulk_insert(buckets_table, [
+            {"user_id": user_id, "kind": kind, "bucket": bucket, "count": count}
+            for (user_id, kind, bucket), count in buckets.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_stat_buckets")
+    op.drop_index("ix_user_term_stats_user_id_occurrences", table_name="user_term_stats")
+    op.drop_table("user_term_stats")
+    op.drop_table("user_article_stats")
@@ -0,0 +1,221 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.database.session import Base, get_async_db
+from app.services.similarity import (
+    SimilarityIndex,
+    load_similarity_index,
+    refresh_similarity_index,
+    similarity_index,
+)
+
+TEST_DATABASE_URL = "sqlite:///./test_articles.db"
+
+engine = create_engine(TEST_DATABASE_URL)
+# NullPool: TestClient runs each request on its own event loop, so connections must not be reused.
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_articles.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(name="client")
+def client_fixture():
+    Base.metadata.create_all(bind=engine)
+    similarity_index.clear()
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_async_db, None)
+    Base.metadata.drop_all(bind=engine)
+
+
+def article_payload(title: str, **overrides) -> dict:
+    payload = {
+        "wikipedia_title": title,
+        "wikipedia_url": "https://es.wikipedia.org/wiki/" + title.replace(" ", "_"),
+        "processed_summary": "Resumen de " + title,
+        "word_count": 10,
+        "frequent_words": [["python", 3]],
+        "sentiment_label": "neutral",
+        "user_id": 1,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_article_lifecycle(client):
+    created = client.post("/api/v1/articles/", json=article_payload("FastAPI", personal_notes="Notas"))
+    assert created.status_code == 201
+    article_id = created.json()["id"]
+
+    assert client.get(f"/api/v1/articles/{article_id}").json()["frequent_words"] == [["python", 3]]
+
+    updated = client.patch(f"/api/v1/articles/{article_id}", json={"personal_notes": "Nuevas notas"})
+    assert updated.status_code == 200
+    assert updated.json()["personal_notes"] == "Nuevas notas"
+
+    assert client.delete(f"/api/v1/articles/{article_id}").status_code == 204
+    assert client.get(f"/api/v1/articles/{article_id}").status_code == 404
+
+
+def test_saving_an_article_twice_updates_it(client):
+    first = client.post("/api/v1/articles/", json=article_payload("FastAPI", personal_notes="Notas"))
+    second = client.post("/api/v1/articles/", json=article_payload("FastAPI", word_count=20))
+
+    assert first.status_code == second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second.json()["word_count"] == 20
+    assert second.json()["personal_notes"] == "Notas"
+    assert len(client.get("/api/v1/articles/", params={"user_id": 1}).json()) == 1
+
+
+def test_bulk_save_and_cursor_listing(client):
+    response = client.post("/api/v1/articles/bulk", json={
+        "articles": [article_payload(f"Artículo {i}") for i in range(5)]
+    })
+    assert response.status_code == 201
+    assert len(response.json()) == 5
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2, "user_id": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/articles/", params=params)
+        assert page.status_code == 200
+        titles += [article["wikipedia_title"] for article in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(titles) == [f"Artículo {i}" for i in range(5)]
+
+    assert client.get("/api/v1/articles/", params={"cursor": "roto"}).status_code == 400
+
+
+def test_search_saved_articles(client):
+    client.post("/api/v1/articles/bulk", json={"articles": [
+        article_payload("Canción del pirata", processed_summary="Poema de José de Espronceda sobre un pirata."),
+        article_payload("Espronceda", processed_summary="José de Espronceda fue un poeta romántico."),
+        article_payload("FastAPI", processed_summary="Un framework web para Python."),
+    ]})
+
+    response = client.get("/api/v1/articles/search", params={"q": "pirata"})
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["wikipedia_title"] for r in results] == ["Canción del pirata"]
+    assert "<mark>" in results[0]["snippet"]
+
+    # Accents are ignored and the title outranks a summary-only match.
+    assert [r["wikipedia_title"] for r in client.get("/api/v1/articles/search", params={"q": "espronceda"}).json()][0] \
+        == "Espronceda"
+    assert client.get("/api/v1/articles/search", params={"q": "cancion"}).json()[0]["wikipedia_title"] \
+        == "Canción del pirata"
+
+    fastapi_id = next(r["id"] for r in client.get("/api/v1/articles/search", params={"q": "python"}).json())
+    client.patch(f"/api/v1/articles/{fastapi_id}", json={"personal_notes": "Revisar la documentación asíncrona"})
+    assert [r["id"] for r in client.get("/api/v1/articles/search", params={"q": "asincrona"}).json()] == [fastapi_id]
+
+    first = client.get("/api/v1/articles/search", params={"q": "espronceda", "limit": 1})
+    second = client.get("/api/v1/articles/search",
+                        params={"q": "espronceda", "limit": 1, "cursor": first.headers["X-Next-Cursor"]})
+    assert first.json()[0]["id"] != second.json()[0]["id"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_get_article_conditional(client):
+    article_id = client.post("/api/v1/articles/", json=article_payload("Python")).json()["id"]
+
+    response = client.get(f"/api/v1/articles/{article_id}")
+    etag = response.headers["ETag"]
+    assert client.get(f"/api/v1/articles/{article_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/api/v1/articles/{article_id}", json={"personal_notes": "Cambio"})
+    changed = client.get(f"/api/v1/articles/{article_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_saved_articles_stats(client):
+    client.post("/api/v1/articles/bulk", json={"articles": [
+        article_payload("Python", frequent_words=[["python", 9], ["lenguaje", 4]], word_count=300,
+                        sentiment_polarity=0.3, sentiment_subjectivity=0.5, sentiment_label="positivo"),
+        article_payload("Serpiente", frequent_words=[["serpiente", 6], ["python", 2]], word_count=100,
+                        sentiment_polarity=-0.1, sentiment_subjectivity=0.2),
+    ]})
+
+    response = client.get("/api/v1/articles/stats", params={"user_id": 1, "top": 2})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["article_count"] == 2
+    assert stats["top_terms"] == [
+        {"term": "python", "occurrences": 11, "articles": 2},
+        {"term": "serpiente", "occurrences": 6, "articles": 1},
+    ]
+    assert stats["sentiment"]["labels"] == {"positivo": 1, "neutral": 1}
+    assert sum(bucket["count"] for bucket in stats["sentiment"]["polarity_histogram"]) == 2
+    assert stats["word_count"]["mean"] == 200.0
+    # "python" is in both articles, so it distinguishes neither.
+    assert {a["wikipedia_title"]: [t["term"] for t in a["terms"]] for a in stats["distinctive_terms"]} == {
+        "Python": ["lenguaje"], "Serpiente": ["serpiente"],
+    }
+
+    # Articles past the ``recent`` newest ones are looked up one at a time, with the same scores.
+    newest_only = client.get("/api/v1/articles/stats", params={"user_id": 1, "recent": 1}).json()
+    assert len(newest_only["distinctive_terms"]) == 1
+    older = next(a for a in stats["distinctive_terms"] if a not in newest_only["distinctive_terms"])
+    assert client.get(f"/api/v1/articles/{older['article_id']}/distinctive-terms").json() == older
+    assert client.get("/api/v1/articles/999/distinctive-terms").status_code == 404
+
+    assert client.get("/api/v1/articles/stats").status_code == 422
+
+
+def test_similar_articles(client):
+    saved = client.post("/api/v1/articles/bulk", json={"articles": [
+        article_payload("Python", processed_summary="Python es un lenguaje de programación.",
+                        frequent_words=[["python", 9], ["lenguaje", 6], ["programación", 5]]),
+        article_payload("Java", processed_summary="Java es un lenguaje de programación.",
+                        frequent_words=[["java", 8], ["lenguaje", 5], ["programación", 4]]),
+        article_payload("Boa", processed_summary="La boa es una serpiente.", frequent_words=[["serpiente", 7]]),
+        article_payload("Ruby", processed_summary="Ruby es un lenguaje de programación.", user_id=2),
+    ]}).json()
+    ids = {article["wikipedia_title"]: article["id"] for article in saved}
+
+    response = client.get(f"/api/v1/articles/{ids['Python']}/similar", params={"k": 2})
+    assert response.status_code == 200
+    similar = response.json()
+    # Only the same user's articles, most similar first.
+    assert [a["wikipedia_title"] for a in similar] == ["Java", "Boa"]
+    assert similar[0]["similarity"] > similar[1]["similarity"]
+
+    client.delete(f"/api/v1/articles/{ids['Java']}")
+    assert [a["wikipedia_title"] for a in client.get(f"/api/v1/articles/{ids['Python']}/similar").json()] == ["Boa"]
+    assert client.get("/api/v1/articles/999/similar").status_code == 404
+
+
+def test_similarity_refresh_picks_up_other_workers_writes(client):
+    saved = client.post("/api/v1/articles/bulk", json={"articles": [
+        article_payload("Python", processed_summary="Python es un lenguaje de programación."),
+        article_payload("Java", processed_summary="Java es un lenguaje de programación."),
+    ]}).json()
+    ids = {article["wikipedia_title"]: article["id"] for article in saved}
+    # Another worker's index: loaded from the database, then only refreshed from it.
+    other = SimilarityIndex(dimensions=similarity_index.dimensions)
+    asyncio.run(load_similarity_index(other, TestingAsyncSessionLocal))
+    assert len(other) == 2
+
+    ruby = client.post("/api/v1/articles/", json=article_payload("Ruby")).json()
+    client.post("/api/v1/articles/", json=article_payload("Java", personal_notes="Otra vez"))
+    asyncio.run(refresh_similarity_index(other, TestingAsyncSessionLocal))
+    assert ruby["id"] in other and len(other) == 3
+
+    client.delete(f"/api/v1/articles/{ids['Java']}")
+    asyncio.run(refresh_similarity_index(other, TestingAsyncSessionLocal))
+    assert ids["Java"] not in other and len(other) == 2
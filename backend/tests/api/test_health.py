@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_healthz_is_up_and_readyz_waits_for_the_warm_up():
+    with TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        deadline = time.monotonic() + 30
+        while client.get("/readyz").status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+    app.state.ready = False
+    response = TestClient(app).get("/readyz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+def test_readyz_reports_a_failed_warm_up_until_a_retry_succeeds(monkeypatch):
+    database_down = True
+    get_async_engine = main.get_async_engine
+
+    def flaky_engine():
+        if database_down:
+            raise ConnectionRefusedError("database is down")
+        return get_async_engine()
+
+    monkeypatch.setattr(main, "get_async_engine", flaky_engine)
+    monkeypatch.setattr(main, "WARM_UP_RETRY_DELAY", 0.01)
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 30
+        while "error" not in client.get("/readyz").json() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "starting", "error": "database: ConnectionRefusedError"}
+
+        database_down = False
+        while client.get("/readyz").status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.get("/readyz").json() == {"status": "ready"}
+
+
+def test_importing_the_app_leaves_heavy_dependencies_unloaded():
+    heavy = ("numpy", "textblob", "requests", "httpx", "aiosqlite", "asyncpg", "sqlalchemy.dialects.postgresql")
+    code = (
+        "import sys, app.main; "
+        f"print(' '.join(name for name in {heavy!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=os.environ.copy(),
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,102 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, stage_timer
+from app.main import app
+from app.services import mediawiki
+from app.services.cache import article_cache
+from app.services.wikipedia_registry import wikipedia_services
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def article_requests():
+    return sum(
+        metric.value for family in REGISTRY.collect() for metric in family.samples
+        if metric.name == "http_request_duration_seconds_count"
+        and metric.labels["route"].endswith("/article/{title}") and metric.labels["status"] == "200"
+    )
+
+
+@pytest.fixture(name="client")
+def client_fixture(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    monkeypatch.setattr(settings, "WIKIPEDIA_BACKEND", "async")
+    monkeypatch.setattr(mediawiki, "_async_clients", {})
+    wikipedia_services.clear()
+    article_cache.clear()
+    with TestClient(app) as client:
+        yield client
+    wikipedia_services.clear()
+    article_cache.clear()
+
+
+def test_article_request_is_measured_by_route_and_stage(client):
+    requests_before = article_requests()
+    stages_before = {
+        stage: sample("article_stage_duration_seconds_count", stage=stage)
+        for stage in ("fetch", "tokenize", "count", "sentiment", "serialize")
+    }
+    upstream_before = sample("wikipedia_upstream_requests_total", client="async")
+
+    assert client.get(f"{settings.API_V1_STR}/wikipedia/article/FastAPI").status_code == 200
+    assert client.get(f"{settings.API_V1_STR}/wikipedia/article/Python").status_code == 200
+
+    assert article_requests() == requests_before + 2
+    for stage, before in stages_before.items():
+        assert sample("article_stage_duration_seconds_count", stage=stage) == before + 2, stage
+    assert sample("wikipedia_upstream_requests_total", client="async") >= upstream_before + 2
+
+
+def test_metrics_endpoint_exposes_cache_and_pool_metrics(client):
+    client.get(f"{settings.API_V1_STR}/wikipedia/article/FastAPI")
+    client.get(f"{settings.API_V1_STR}/wikipedia/article/FastAPI")
+    stats = article_cache.stats()
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert stats["hits"] >= 1
+    assert f"article_cache_hit_ratio {stats['hits'] / (stats['hits'] + stats['misses'])}" in response.text
+    assert "db_pool_checked_out" in response.text
+    assert 'wikipedia_upstream_requests_total{client="async"}' in response.text
+
+
+def test_upstream_errors_are_counted(client, fake_mediawiki):
+    fake_mediawiki.stop()
+    errors_before = sum(
+        metric.value for family in REGISTRY.collect() if family.name == "wikipedia_upstream_errors"
+        for metric in family.samples if metric.name.endswith("_total")
+    )
+
+    # Wikipedia being unreachable is a 503, not a missing article.
+    assert client.get(f"{settings.API_V1_STR}/wikipedia/article/FastAPI").status_code == 503
+
+    errors = sum(
+        metric.value for family in REGISTRY.collect() if family.name == "wikipedia_upstream_errors"
+        for metric in family.samples if metric.name.endswith("_total")
+    )
+    assert errors > errors_before
+
+
+def test_server_timing_header_lists_stages():
+    timed_app = FastAPI()
+    timed_app.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @timed_app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with stage_timer("fetch"):
+            pass
+        return {"id": item_id}
+
+    response = TestClient(timed_app).get("/items/1")
+
+    entries = [entry.strip().split(";")[0] for entry in response.headers["Server-Timing"].split(",")]
+    assert entries == ["fetch", "total"]
+    assert sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}", status="200") == 1
@@ -0,0 +1,109 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.http_cache import EncodedBodyCache, encoded_bodies
+from app.main import app
+from app.services import mediawiki
+from app.services.cache import article_cache
+from app.services.wikipedia_registry import wikipedia_services
+
+ARTICLE_URL = f"{settings.API_V1_STR}/wikipedia/article/FastAPI"
+
+
+@pytest.fixture(name="client")
+def client_fixture(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    monkeypatch.setattr(settings, "WIKIPEDIA_BACKEND", "async")
+    monkeypatch.setattr(mediawiki, "_async_clients", {})
+    wikipedia_services.clear()
+    article_cache.clear()
+    encoded_bodies.clear()
+    with TestClient(app) as client:
+        yield client
+    wikipedia_services.clear()
+    article_cache.clear()
+    encoded_bodies.clear()
+
+
+def test_article_etag_and_not_modified(client):
+    response = client.get(ARTICLE_URL)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    not_modified = client.get(ARTICLE_URL, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    assert client.get(ARTICLE_URL, headers={"If-None-Match": '"otra"'}).status_code == 200
+
+
+def test_article_fields_selection(client):
+    full = client.get(ARTICLE_URL)
+    stats = client.get(ARTICLE_URL, params={"fields": "title,word_count,frequent_words,revision_id"})
+
+    assert stats.status_code == 200
+    assert set(stats.json()) == {"title", "word_count", "frequent_words", "revision_id"}
+    assert stats.json()["word_count"] == full.json()["word_count"]
+    assert stats.headers["ETag"] != full.headers["ETag"]
+
+    assert client.get(ARTICLE_URL, params={"fields": "title,nada"}).status_code == 400
+
+
+def test_unchanged_article_is_served_from_its_encoded_body(client, fake_mediawiki):
+    first = client.get(ARTICLE_URL, headers={"Accept-Encoding": "identity"})
+    hits = encoded_bodies.stats()["hits"]
+    second = client.get(ARTICLE_URL, headers={"Accept-Encoding": "identity"})
+
+    assert encoded_bodies.stats()["hits"] == hits + 1
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert first.json()["title"] == "FastAPI" and first.json()["content"]
+
+    # A new revision has a new ETag, so it is encoded afresh.
+    fake_mediawiki.pages["FastAPI"].lastrevid += 1
+    article_cache.clear()
+    assert client.get(ARTICLE_URL).headers["ETag"] != first.headers["ETag"]
+
+
+def test_encoded_body_cache_is_bounded_by_size():
+    cache = EncodedBodyCache(max_bytes=100)
+    cache.put('"a"', b"x" * 20)
+    cache.put('"b"', b"y" * 20)
+    cache.put('"big"', b"z" * 30)
+    assert cache.get('"big"') is None
+
+    for key in ('"c"', '"d"', '"e"', '"f"'):
+        cache.put(key, b"w" * 20)
+    assert cache.get('"a"') is None and cache.get('"f"') == b"w" * 20
+    assert cache.stats()["bytes"] == 100 and cache.stats()["evictions"] == 1
+
+
+def test_large_responses_are_gzip_compressed_with_their_own_etag(client):
+    plain = client.get(ARTICLE_URL, headers={"Accept-Encoding": "identity"})
+    response = client.get(ARTICLE_URL, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert response.json() == plain.json()
+    # The encoded ETag still revalidates the same entity.
+    assert client.get(ARTICLE_URL, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_article_language_selection(client, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_LANGUAGES", ["es", "en"])
+
+    spanish = client.get(ARTICLE_URL)
+    english = client.get(ARTICLE_URL, params={"lang": "en"})
+
+    assert english.status_code == 200
+    assert english.headers["ETag"] != spanish.headers["ETag"]
+    assert wikipedia_services.get("en") is not wikipedia_services.get("es")
+    assert wikipedia_services.get("en").client.lang == "en"
+    assert article_cache.get("en", "FastAPI") is not None
+    assert client.get(ARTICLE_URL, params={"lang": "xx"}).status_code == 400
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import batch, mediawiki
+from app.services.batch import BatchArticleAnalyzer
+from app.services.cache import ArticleCache
+from app.services.mediawiki import AsyncMediaWikiClient
+
+
+@pytest.fixture(name="client")
+def client_fixture(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    monkeypatch.setattr(mediawiki, "_async_clients", {})
+    monkeypatch.setattr(batch, "article_cache", ArticleCache(maxsize=100, ttl=60))
+    with TestClient(app) as client:
+        yield client
+
+
+def test_batch_streams_one_line_per_title_with_inline_errors(client, fake_mediawiki):
+    titles = ["Python", "FastAPI", "Pitón", "NoExiste", "FastAPI"]
+    response = client.post(f"{settings.API_V1_STR}/wikipedia/articles:batch", json={"titles": titles})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = {line["title"]: line for line in map(json.loads, response.text.splitlines())}
+
+    assert set(results) == {"Python", "FastAPI", "Pitón", "NoExiste"}
+    assert fake_mediawiki.request_count == 1
+
+    python = results["Python"]
+    assert python["status"] == "ok"
+    assert python["analysis"]["title"] == "Python (lenguaje de programación)"
+    assert python["analysis"]["revision_id"] == 5001
+    assert dict(python["analysis"]["frequent_words"])["python"] >= 3
+    assert "ficha" not in dict(python["analysis"]["frequent_words"])
+
+    assert results["Pitón"] == {"title": "Pitón", "status": "error", "error": "disambiguation",
+                                "detail": results["Pitón"]["detail"]}
+    assert results["NoExiste"]["error"] == "not_found"
+
+
+def test_batch_rejects_empty_and_oversized_requests(client):
+    url = f"{settings.API_V1_STR}/wikipedia/articles:batch"
+    assert client.post(url, json={"titles": []}).status_code == 422
+    assert client.post(url, json={"titles": ["a"] * 1001}).status_code == 422
+
+
+def test_batch_results_are_cached_apart_from_full_articles(client, fake_mediawiki):
+    url = f"{settings.API_V1_STR}/wikipedia/articles:batch"
+    first = client.post(url, json={"titles": ["Python", "FastAPI"]}).text.splitlines()
+    requests_sent = fake_mediawiki.request_count
+
+    second = client.post(url, json={"titles": ["FastAPI", "Python"]}).text.splitlines()
+
+    assert fake_mediawiki.request_count == requests_sent
+    assert sorted(map(json.loads, second), key=lambda r: r["title"]) == sorted(map(json.loads, first), key=lambda r: r["title"])
+    assert batch.article_cache.get("es", "Python") is None
+
+
+async def collect(analyzer: BatchArticleAnalyzer, titles):
+    return [result async for result in analyzer.analyze(titles)]
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_titles_left_without_a_result(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    client = AsyncMediaWikiClient("es")
+    analyzer = BatchArticleAnalyzer(client=client, cache=ArticleCache(maxsize=10, ttl=60))
+    map_pages = batch.map_requested_pages
+
+    # Wikipedia's answer omits a requested title.
+    monkeypatch.setattr(batch, "map_requested_pages", lambda titles, data: {
+        title: page for title, page in map_pages(titles, data).items() if title != "FastAPI"
+    })
+    results = await asyncio.wait_for(collect(analyzer, ["Python", "FastAPI"]), timeout=10)
+    assert {r.title: r.status for r in results} == {"Python": "ok", "FastAPI": "error"}
+    assert [r.error for r in results if r.title == "FastAPI"] == ["upstream_error"]
+
+    # A batch fails outside the handled paths.
+    def broken(titles, data):
+        raise RuntimeError("unexpected response")
+
+    monkeypatch.setattr(batch, "map_requested_pages", broken)
+    results = await asyncio.wait_for(collect(analyzer, ["Guido van Rossum", "Pitón"]), timeout=10)
+    assert {r.title: r.error for r in results} == {"Guido van Rossum": "upstream_error", "Pitón": "upstream_error"}
+    await client.aclose()
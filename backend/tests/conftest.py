@@ -0,0 +1,17 @@
+import pytest
+
+from app.services import upstream
+from tests.fakes.fake_mediawiki import FakeMediaWiki
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_governors(monkeypatch):
+    """Every test starts with fresh upstream governors, so no breaker opened by another test is shared."""
+    monkeypatch.setattr(upstream, "_governors", {})
+
+
+@pytest.fixture(name="fake_mediawiki")
+def fake_mediawiki_fixture():
+    """Runs a local fake MediaWiki API for the duration of a test."""
+    with FakeMediaWiki() as fake:
+        yield fake
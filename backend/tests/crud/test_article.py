@@ -7,7 +7,7 @@ from app.database.session import Base, get_db
 from app.database.models import Article
 import app.database.models
 from app.schemas.article import ArticleCreate, ArticleUpdate
-from app.crud.article import CRUDArticle
+from app.crud.article import CRUDArticle, InvalidCursor
 from typing import List, Tuple
 
 TEST_DATABASE_URL = "sqlite:///./test_crud.db"
@@ -89,37 +89,6 @@ def test_get_article(db_session_crud):
     non_existent_article = article_crud.get_article(db_session_crud, 999)
     assert non_existent_article is None
 
-def test_get_articles(db_session_crud):
-    """
-    Test case for retrieving multiple articles with skip and limit parameters.
-    """
-
-    article_crud.create_article(db_session_crud, ArticleCreate(
-        wikipedia_title="Artículo 1", wikipedia_url="http://a1.com", processed_summary="s1", word_count=1,
-        frequent_words=[("word1", 10)], 
-        personal_notes="", user_id=TEST_USER_ID
-    ))
-    article_crud.create_article(db_session_crud, ArticleCreate(
-        wikipedia_title="Artículo 2", wikipedia_url="http://a2.com", processed_summary="s2", word_count=1,
-        frequent_words=[("word2", 20)], 
-        personal_notes="", user_id=TEST_USER_ID
-    ))
-    article_crud.create_article(db_session_crud, ArticleCreate(
-        wikipedia_title="Artículo 3", wikipedia_url="http://a3.com", processed_summary="s3", word_count=1,
-        frequent_words=[("word3", 30)], 
-        personal_notes="", user_id=TEST_USER_ID
-    ))
-
-    articles = article_crud.get_articles(db_session_crud, skip=0, limit=2)
-    assert len(articles) == 2
-    assert articles[0].wikipedia_title == "Artículo 1"
-    assert articles[1].wikipedia_title == "Artículo 2"
-
-    articles_skipped = article_crud.get_articles(db_session_crud, skip=1, limit=2)
-    assert len(articles_skipped) == 2
-    assert articles_skipped[0].wikipedia_title == "Artículo 2"
-    assert articles_skipped[1].wikipedia_title == "Artículo 3"
-
 def test_update_article(db_session_crud):
     """
     Test case for updating an existing article.
@@ -176,4 +145,166 @@ def test_delete_article(db_session_crud):
     assert retrieved_after_delete is None
 
     non_existent_delete = article_crud.delete_article(db_session_crud, 999)
-    assert non_existent_delete is None
\ No newline at end of file
+    assert non_existent_delete is None
+
+def _bulk_article(title: str, word_count: int, notes=None) -> ArticleCreate:
+    return ArticleCreate(
+        wikipedia_title=title, wikipedia_url="http://test.com/" + title.replace(" ", "_"),
+        processed_summary="Resumen de " + title, word_count=word_count,
+        frequent_words=[("palabra", word_count)], personal_notes=notes, user_id=TEST_USER_ID
+    )
+
+def test_bulk_upsert_articles(db_session_crud):
+    """
+    Test case for saving many articles at once.
+    Re-saved titles are updated in place, keep their notes and come back in input order.
+    """
+    first = article_crud.create_article(db_session_crud, _bulk_article("Existente", 1, notes="Mis notas."))
+
+    saved = article_crud.bulk_upsert_articles(db_session_crud, [
+        _bulk_article("Nuevo A", 2),
+        _bulk_article("Existente", 3),
+        _bulk_article("Nuevo B", 4),
+        _bulk_article("Nuevo A", 5),
+    ])
+
+    assert [a.wikipedia_title for a in saved] == ["Nuevo A", "Existente", "Nuevo B"]
+    assert saved[0].word_count == 5
+    assert saved[1].id == first.id
+    assert saved[1].word_count == 3
+    assert saved[1].frequent_words == [["palabra", 3]]
+    assert saved[1].personal_notes == "Mis notas."
+    assert db_session_crud.query(Article).count() == 3
+
+def test_get_articles_page(db_session_crud):
+    """
+    Test case for keyset pagination with filters.
+    Pages are newest first, never overlap and the last one has no cursor.
+    """
+    for i in range(5):
+        article_crud.create_article(db_session_crud, ArticleCreate(
+            wikipedia_title=f"Página {i}", wikipedia_url=f"http://p{i}.com", processed_summary="s", word_count=1,
+            sentiment_label="positivo" if i % 2 else "neutral", user_id=TEST_USER_ID
+        ))
+    article_crud.create_article(db_session_crud, ArticleCreate(
+        wikipedia_title="Otro usuario", wikipedia_url="http://o.com", processed_summary="s", word_count=1,
+        user_id=TEST_USER_ID + 1
+    ))
+
+    first, cursor = article_crud.get_articles_page(db_session_crud, limit=2, user_id=TEST_USER_ID)
+    second, cursor = article_crud.get_articles_page(db_session_crud, limit=2, cursor=cursor, user_id=TEST_USER_ID)
+    third, cursor = article_crud.get_articles_page(db_session_crud, limit=2, cursor=cursor, user_id=TEST_USER_ID)
+    assert [a.wikipedia_title for a in first + second + third] == [f"Página {i}" for i in range(4, -1, -1)]
+    assert cursor is None
+
+    positive, _ = article_crud.get_articles_page(db_session_crud, limit=10, sentiment_label="positivo")
+    assert [a.wikipedia_title for a in positive] == ["Página 3", "Página 1"]
+    prefixed, _ = article_crud.get_articles_page(db_session_crud, limit=10, title_prefix="Otro")
+    assert [a.wikipedia_title for a in prefixed] == ["Otro usuario"]
+
+    with pytest.raises(InvalidCursor):
+        article_crud.get_articles_page(db_session_crud, cursor="no-es-un-cursor")
+
+def test_get_articles_page_by_frequent_word(db_session_crud):
+    """
+    Test case for filtering saved articles by one of their frequent words.
+    Legacy list-of-words values are stored normalised to [word, 0] pairs.
+    """
+    article_crud.create_article(db_session_crud, ArticleCreate(
+        wikipedia_title="Python", wikipedia_url="http://py.com", processed_summary="s", word_count=1,
+        frequent_words=[("python", 9), ("lenguaje", 4)], user_id=TEST_USER_ID
+    ))
+    article_crud.create_article(db_session_crud, ArticleCreate(
+        wikipedia_title="Serpiente", wikipedia_url="http://s.com", processed_summary="s", word_count=1,
+        frequent_words=[("serpiente", 7), ("python", 2)], user_id=TEST_USER_ID
+    ))
+    legacy = Article(
+        wikipedia_title="Legado", wikipedia_url="http://l.com", processed_summary="s", word_count=1,
+        frequent_words='["lenguaje", "antiguo"]', user_id=TEST_USER_ID
+    )
+    db_session_crud.add(legacy)
+    db_session_crud.commit()
+    db_session_crud.expire(legacy)
+
+    assert legacy.frequent_words == [["lenguaje", 0], ["antiguo", 0]]
+    python, _ = article_crud.get_articles_page(db_session_crud, word="Python")
+    assert [a.wikipedia_title for a in python] == ["Serpiente", "Python"]
+    lenguaje, _ = article_crud.get_articles_page(db_session_crud, word="lenguaje")
+    assert [a.wikipedia_title for a in lenguaje] == ["Legado", "Python"]
+    assert article_crud.get_articles_page(db_session_crud, word="ausente") == ([], None)
+
+def _stats_rows(db):
+    from app.database.models import UserArticleStats, UserStatBucket, UserTermStats
+    return (
+        sorted((r.user_id, r.article_count, r.total_words, r.scored_count, round(r.polarity_sum, 6))
+               for r in db.query(UserArticleStats)),
+        sorted((r.user_id, r.term, r.occurrences, r.article_count) for r in db.query(UserTermStats)),
+        sorted((r.user_id, r.kind, r.bucket, r.count) for r in db.query(UserStatBucket)),
+    )
+
+def test_user_stats_follow_creates_upserts_and_deletes(db_session_crud):
+    """
+    Test case for the per-user aggregates.
+    After creates, upserts and deletes they match a rebuild from the articles themselves.
+    """
+    python = article_crud.create_article(db_session_crud, ArticleCreate(
+        wikipedia_title="Python", wikipedia_url="http://py.com", processed_summary="s", word_count=100,
+        frequent_words=[("python", 9), ("lenguaje", 4)], sentiment_polarity=0.5, sentiment_subjectivity=0.4,
+        sentiment_label="positivo", user_id=TEST_USER_ID
+    ))
+    article_crud.bulk_upsert_articles(db_session_crud, [
+        ArticleCreate(wikipedia_title="Python", wikipedia_url="http://py.com", processed_summary="s", word_count=200,
+                      frequent_words=[("python", 12), ("código", 5)], sentiment_polarity=-0.2,
+                      sentiment_subjectivity=0.3, sentiment_label="negativo", user_id=TEST_USER_ID),
+        _bulk_article("Nuevo A", 2),
+        _bulk_article("Nuevo B", 40),
+    ])
+    article_crud.create_article(db_session_crud, _bulk_article("Otro", 7).model_copy(update={"user_id": 2}))
+    article_crud.delete_article(db_session_crud, article_crud.get_articles_page(
+        db_session_crud, title_prefix="Nuevo A")[0][0].id)
+
+    maintained = _stats_rows(db_session_crud)
+    article_crud.rebuild_user_stats(db_session_crud)
+    assert maintained == _stats_rows(db_session_crud)
+
+    stats = article_crud.get_user_stats(db_session_crud, TEST_USER_ID)
+    assert stats["article_count"] == 2
+    assert [t["term"] for t in stats["top_terms"]] == ["palabra", "python", "código"]
+    assert stats["sentiment"]["labels"] == {"negativo": 1, "sin_etiqueta": 1}
+    assert stats["sentiment"]["mean_polarity"] == -0.2
+    assert stats["word_count"]["total"] == 240 and stats["word_count"]["mean"] == 120.0
+    assert abs(stats["word_count"]["p99"] - 200) <= 9
+    # Neither article's words appear in the other, so each one's are all distinctive.
+    distinctive = {a["wikipedia_title"]: [t["term"] for t in a["terms"]] for a in stats["distinctive_terms"]}
+    assert distinctive == {"Nuevo B": ["palabra"], "Python": ["python", "código"]}
+    assert python.id in [a["article_id"] for a in stats["distinctive_terms"]]
+    assert article_crud.get_distinctive_terms(db_session_crud, python) == next(
+        a for a in stats["distinctive_terms"] if a["article_id"] == python.id)
+
+    empty = article_crud.get_user_stats(db_session_crud, 99)
+    assert empty["article_count"] == 0 and empty["word_count"] == {"total": 0, "mean": None}
+
+def test_concurrent_resaves_keep_user_stats_exact(tmp_path):
+    """
+    Test case for saving the same title from several sessions at once.
+    Every save reads the row it replaces under a lock, so the aggregates still match a rebuild.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    concurrent_engine = create_engine(f"sqlite:///{tmp_path}/concurrent.db", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=concurrent_engine)
+    Session = sessionmaker(bind=concurrent_engine)
+
+    def save(i):
+        with Session() as db:
+            article_crud.bulk_upsert_articles(db, [_bulk_article("Python", 10 + i % 7), _bulk_article(f"Otro {i}", 3)])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(save, range(64)))
+
+    with Session() as db:
+        maintained = _stats_rows(db)
+        article_crud.rebuild_user_stats(db)
+        assert maintained == _stats_rows(db)
+        assert maintained[0][0][:2] == (TEST_USER_ID, 65)
+    concurrent_engine.dispose()
@@ -0,0 +1,263 @@
+"""
+Local stand-in for the MediaWiki action API.
+
+Serves the subset of ``action=query`` used by the app (search, title
+resolution, extracts, external links and page props) from an in-memory
+set of pages, with optional artificial latency and throttling. Answers in formatversion=2
+when asked to, as our clients do, and in the legacy format otherwise, as
+the ``wikipedia`` library expects. Runs on a background
+thread so both blocking and asyncio clients can talk to it.
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+# External links per response, as with ellimit=max; the rest follow through elcontinue.
+EXTLINKS_LIMIT = 500
+
+
+@dataclass
+class FakePage:
+    title: str
+    content: str
+    pageid: int
+    lastrevid: int = 1
+    extlinks: List[str] = field(default_factory=list)
+    disambiguation: bool = False
+    links: List[str] = field(default_factory=list)
+    wikitext: Optional[str] = None
+
+
+DEFAULT_PAGES = [
+    FakePage(
+        title="Python (lenguaje de programación)",
+        pageid=1001,
+        lastrevid=5001,
+        content=(
+            "Python es un lenguaje de programación interpretado cuya filosofía hace hincapié "
+            "en la legibilidad de su código. Python es un lenguaje multiparadigma.\n\n\n"
+            "== Historia ==\n"
+            "Python fue creado a finales de los ochenta por Guido van Rossum. El lenguaje "
+            "python es popular, flexible y excelente para ciencia de datos."
+        ),
+        wikitext=(
+            "{{Ficha de lenguaje de programación|nombre = Python}}\n"
+            "'''Python''' es un [[lenguaje de programación]] interpretado cuya filosofía hace hincapié "
+            "en la legibilidad de su código.<ref>{{cita web|url=https://www.python.org}}</ref> "
+            "Python es un lenguaje [[Multiparadigma|multiparadigma]].\n\n"
+            "== Historia ==\n"
+            "Python fue creado a finales de los ochenta por [[Guido van Rossum]]. El lenguaje "
+            "python es popular, flexible y excelente para ciencia de datos.\n"
+            "[[Categoría:Lenguajes de programación]]"
+        ),
+        extlinks=["https://www.python.org/", "https://docs.python.org/es/3/"],
+    ),
+    FakePage(
+        title="FastAPI",
+        pageid=1002,
+        lastrevid=5002,
+        content=(
+            "FastAPI es un framework web moderno para construir interfaces de programación "
+            "con Python. FastAPI es rápido y sencillo.\n\n\n"
+            "== Características ==\n"
+            "Utiliza anotaciones de tipos de Python y genera documentación automática."
+        ),
+        extlinks=["https://fastapi.tiangolo.com/"],
+    ),
+    FakePage(
+        title="Pitón",
+        pageid=1003,
+        lastrevid=5003,
+        content="Pitón puede referirse a: una serpiente de la familia Pythonidae o al lenguaje Python.",
+        disambiguation=True,
+        links=["Pythonidae", "Python (lenguaje de programación)", "Pitón (mitología)"],
+    ),
+]
+
+DEFAULT_REDIRECTS = {"Python": "Python (lenguaje de programación)"}
+
+
+class FakeMediaWiki:
+    def __init__(self, pages: Optional[List[FakePage]] = None, redirects: Optional[Dict[str, str]] = None,
+                 latency: float = 0.0, port: int = 0):
+        # Copies, so a test that edits a page (e.g. bumps lastrevid) does not leak into the next one.
+        self.pages = {page.title: replace(page) for page in (pages if pages is not None else DEFAULT_PAGES)}
+        self.redirects = dict(DEFAULT_REDIRECTS if redirects is None else redirects)
+        self.latency = latency
+        self.port = port
+        self.request_count = 0
+        self.requests: List[Dict[str, str]] = []
+        # Statuses (e.g. 429, 503) answered to the next requests, in order, with ``retry_after`` if set.
+        self.failures: List[int] = []
+        self.retry_after: Optional[str] = None
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self) -> "FakeMediaWiki":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                params = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query, keep_blank_values=True).items()}
+                status, payload = fake.handle(params)
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if status in (429, 503) and fake.retry_after is not None:
+                    self.send_header("Retry-After", fake.retry_after)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeMediaWiki":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def handle(self, params: Dict[str, str]):
+        status, payload = self._handle(params)
+        if params.get("formatversion") != "2":
+            payload = legacy_format(payload)
+        return status, payload
+
+    def _handle(self, params: Dict[str, str]):
+        with self._lock:
+            self.request_count += 1
+            self.requests.append(params)
+            failure = self.failures.pop(0) if self.failures else None
+        if failure is not None:
+            return failure, {"error": {"code": "ratelimited" if failure == 429 else "unavailable"}}
+        if self.latency:
+            time.sleep(self.latency)
+        if params.get("action") != "query":
+            return 400, {"error": {"code": "badaction"}}
+
+        query: dict = {}
+        if params.get("list") == "search":
+            limit = int(params.get("srlimit", 10))
+            query["search"] = [
+                {"title": page.title, "pageid": page.pageid}
+                for page in self._search(params.get("srsearch", ""), limit)
+            ]
+            return 200, {"query": query}
+
+        if params.get("generator") == "search":
+            limit = int(params.get("gsrlimit", 10))
+            found = self._search(params.get("gsrsearch", ""), limit)
+            query["pages"] = [
+                dict(self._render_page(page, params), index=i + 1) for i, page in enumerate(found)
+            ]
+            return 200, {"query": query}
+
+        result_continue = None
+        if "titles" in params:
+            pages = []
+            normalized, redirects = [], []
+            for requested in params["titles"].split("|"):
+                title = requested[:1].upper() + requested[1:]
+                if title != requested:
+                    normalized.append({"from": requested, "to": title})
+                if "redirects" in params and title in self.redirects:
+                    redirects.append({"from": title, "to": self.redirects[title]})
+                    title = self.redirects[title]
+                page = self.pages.get(title)
+                pages.append(self._render_page(page, params) if page else {"title": title, "missing": True})
+                if page and "extlinks" in params.get("prop", "").split("|"):
+                    offset = self._extlinks_offset(page, params)
+                    if len(page.extlinks) > offset + EXTLINKS_LIMIT:
+                        result_continue = {"elcontinue": f"{page.pageid}|{offset + EXTLINKS_LIMIT}", "continue": "||"}
+            if normalized:
+                query["normalized"] = normalized
+            if redirects:
+                query["redirects"] = redirects
+            query["pages"] = pages
+        if result_continue:
+            return 200, {"continue": result_continue, "query": query}
+        return 200, {"query": query}
+
+    @staticmethod
+    def _extlinks_offset(page: FakePage, params: Dict[str, str]) -> int:
+        pageid, _, offset = params.get("elcontinue", "").partition("|")
+        return int(offset) if pageid == str(page.pageid) else 0
+
+    def _search(self, term: str, limit: int) -> List[FakePage]:
+        tokens = term.lower().split()
+        found = [
+            page for page in self.pages.values()
+            if any(token in page.title.lower() or token in page.content.lower() for token in tokens)
+        ]
+        return found[:limit]
+
+    def _render_page(self, page: FakePage, params: Dict[str, str]) -> dict:
+        props = set(params.get("prop", "").split("|"))
+        rendered = {"pageid": page.pageid, "ns": 0, "title": page.title}
+        if "info" in props:
+            rendered["lastrevid"] = page.lastrevid
+            rendered["length"] = len(page.content)
+            if "url" in params.get("inprop", ""):
+                rendered["fullurl"] = "https://es.wikipedia.org/wiki/" + quote(page.title.replace(" ", "_"))
+        if "pageprops" in props and page.disambiguation:
+            rendered["pageprops"] = {"disambiguation": ""}
+        if "extracts" in props:
+            extract = page.content
+            if "exintro" in params:
+                extract = extract.split("\n\n\n==")[0]
+            rendered["extract"] = extract
+        if "extlinks" in props:
+            offset = self._extlinks_offset(page, params)
+            rendered["extlinks"] = [{"url": url} for url in page.extlinks[offset:offset + EXTLINKS_LIMIT]]
+        if "revisions" in props:
+            revision = {"revid": page.lastrevid, "parentid": page.lastrevid - 1}
+            if "content" in params.get("rvprop", ""):
+                revision["slots"] = {"main": {"content": page.wikitext if page.wikitext is not None else page.content}}
+            rendered["revisions"] = [revision]
+        if "links" in props:
+            rendered["links"] = [{"ns": 0, "title": t} for t in page.links]
+        return rendered
+
+
+def legacy_format(payload: dict) -> dict:
+    """formatversion=1: pages keyed by pageid (negative for missing ones), blank-string flags, ``*`` values."""
+    query = payload.get("query", {})
+    if "pages" not in query:
+        return payload
+    pages = {}
+    for i, page in enumerate(query["pages"]):
+        page = dict(page)
+        if page.get("missing"):
+            page["missing"] = ""
+            key = str(-1 - i)
+        else:
+            key = str(page["pageid"])
+        if "extlinks" in page:
+            page["extlinks"] = [{"*": link["url"]} for link in page["extlinks"]]
+        pages[key] = page
+    return dict(payload, query=dict(query, pages=pages))
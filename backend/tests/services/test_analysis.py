@@ -0,0 +1,75 @@
+import pytest
+from textblob import TextBlob
+
+from app.services.analysis import AnalysisPool, AnalysisPoolSaturated, analyze_content, iter_chunks
+from app.services.wikitext import strip_wikitext
+
+CONTENT = "Python es un lenguaje excelente. Python es popular y python es flexible para la ciencia."
+
+
+def test_analyze_content_counts_words_and_skips_stopwords():
+    analysis = analyze_content(CONTENT)
+
+    assert analysis.word_count == 9
+    assert analysis.frequent_words[0] == ("python", 3)
+    assert "para" not in dict(analysis.frequent_words)
+    assert analysis.sentiment_label in ["positivo", "negativo", "neutral"]
+
+
+def test_chunks_never_split_words():
+    text = "uno dos\ntres cuatro cinco seis siete"
+    chunks = list(iter_chunks(text, 9))
+
+    assert "".join(chunks) == text
+    assert [word for chunk in chunks for word in chunk.split()] == text.split()
+
+
+def test_chunked_analysis_matches_whole_text_analysis():
+    content = (CONTENT + " Fue un día terrible y muy malo.\n") * 200
+    whole = analyze_content(content, chunk_size=len(content))
+    chunked = analyze_content(content, chunk_size=500)
+
+    assert chunked.word_count == whole.word_count
+    assert chunked.frequent_words == whole.frequent_words
+    assert chunked.sentiment_polarity == pytest.approx(TextBlob(content).sentiment.polarity, abs=1e-9)
+    assert chunked.sentiment_subjectivity == pytest.approx(whole.sentiment_subjectivity, abs=1e-9)
+    assert len(analyze_content(content, top_n=3).frequent_words) == 3
+
+
+def test_pool_matches_inline_analysis_and_sheds_load():
+    pool = AnalysisPool(workers=1, max_pending=1)
+    try:
+        pool.start()
+        assert pool.analyze(CONTENT) == analyze_content(CONTENT)
+
+        running = pool.submit(CONTENT * 5000)
+        with pytest.raises(AnalysisPoolSaturated):
+            pool.submit(CONTENT)
+        assert pool.rejected == 1
+        running.result()
+        assert pool.analyze(CONTENT).word_count == 9
+    finally:
+        pool.shutdown()
+
+
+def test_strip_wikitext_keeps_text_and_headings():
+    wikitext = (
+        "{{Ficha|nombre = Python {{small|x}}}}\n"
+        "'''Python''' es un [[lenguaje de programación|lenguaje]].<ref>{{cita web|url=x}}</ref> "
+        "Ver [https://python.org sitio oficial].<!-- nota -->\n"
+        "[[Archivo:Logo.svg|thumb|Logo de [[Python]]]]\n"
+        "== Historia ==\n* Creado por [[Guido van Rossum]] &amp; otros.\n"
+        "{| class=wikitable\n|-\n| a || b\n|}\n[[Categoría:Lenguajes]]"
+    )
+
+    assert strip_wikitext(wikitext) == (
+        "Python es un lenguaje. Ver sitio oficial.\n\n== Historia ==\nCreado por Guido van Rossum & otros."
+    )
+
+
+def test_stopwords_follow_the_wiki_language():
+    content = "the python language and the python community were born with the web"
+
+    assert "the" in dict(analyze_content(content, lang="es").frequent_words)
+    english = dict(analyze_content(content, lang="en").frequent_words)
+    assert "the" not in english and english["python"] == 2
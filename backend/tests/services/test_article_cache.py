@@ -0,0 +1,77 @@
+import pytest
+
+from app.schemas.wikipedia import WikipediaArticleDetail
+from app.services.cache import ArticleCache, SQLiteArticleStore
+from app.services.mediawiki import AsyncMediaWikiClient
+from app.services.wikipedia_async import AsyncWikipediaService
+
+
+def make_article(title: str, revision_id: int) -> WikipediaArticleDetail:
+    return WikipediaArticleDetail(
+        title=title, summary="", full_url="", content="", references=[], url="",
+        word_count=0, frequent_words=[], sentiment_polarity=0.0, sentiment_subjectivity=0.0,
+        sentiment_label="neutral", revision_id=revision_id,
+    )
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ArticleCache(maxsize=2, ttl=60)
+    cache.put("es", "A", make_article("A", 1))
+    cache.put("es", "B", make_article("B", 1))
+    assert cache.get("es", "A") is not None
+    cache.put("es", "C", make_article("C", 1))
+
+    assert cache.get("es", "B") is None
+    assert cache.get("es", "A") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_revalidated_by_revision():
+    cache = ArticleCache(maxsize=10, ttl=0)
+    cache.put("es", "A", make_article("A", 7))
+
+    assert cache.get("es", "A") is None
+    assert cache.get_revision("es", "A", 8) is None
+    assert cache.get_revision("es", "A", 7).title == "A"
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_persistent_tier_survives_a_new_memory_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ArticleCache(maxsize=10, ttl=60, persistent=SQLiteArticleStore(path)).put("es", "A", make_article("A", 3))
+
+    cache = ArticleCache(maxsize=10, ttl=60, persistent=SQLiteArticleStore(path))
+    assert cache.get_revision("es", "A", 2) is None
+    assert cache.get_revision("es", "A", 3).title == "A"
+    assert cache.get("es", "A") is not None
+    assert cache.stats()["persistent_hits"] == 1
+
+
+def test_persistent_tier_ignores_analyses_of_another_version(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteArticleStore(path, analysis="v1:top10").put("es", "A", 3, make_article("A", 3))
+
+    assert SQLiteArticleStore(path, analysis="v1:top20").get("es", "A", 3) is None
+    assert SQLiteArticleStore(path, analysis="v1:top10").get("es", "A", 3).title == "A"
+
+
+@pytest.mark.asyncio
+async def test_service_skips_refetch_when_revision_is_unchanged(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    cache = ArticleCache(maxsize=10, ttl=60)
+    service = AsyncWikipediaService(client=AsyncMediaWikiClient("es"), cache=cache)
+
+    first = await service.get_article_details("FastAPI")
+    assert await service.get_article_details("fastAPI") is first
+    assert fake_mediawiki.request_count == 1
+
+    cache.ttl = 0
+    assert await service.get_article_details("FastAPI") is first
+    assert fake_mediawiki.request_count == 2
+    assert "extracts" not in fake_mediawiki.requests[-1]["prop"]
+
+    fake_mediawiki.pages["FastAPI"].lastrevid += 1
+    refreshed = await service.get_article_details("FastAPI")
+    assert refreshed is not first
+    assert refreshed.revision_id == fake_mediawiki.pages["FastAPI"].lastrevid
+    await service.client.aclose()
@@ -0,0 +1,117 @@
+import bz2
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Article
+from app.database.session import Base
+from app.services.analysis import analyze_wikitext
+from app.services.dump_ingest import (
+    Checkpoint,
+    DatabaseSink,
+    DumpIngestion,
+    JsonlSink,
+    analyze_dump_pages,
+    iter_dump_pages,
+    open_dump,
+)
+
+NS = "http://www.mediawiki.org/xml/export-0.11/"
+
+
+def _page(pageid, title, text, ns=0, redirect=None):
+    redirect_tag = f'<redirect title="{redirect}" />' if redirect else ""
+    return (
+        f"<page><title>{title}</title><ns>{ns}</ns><id>{pageid}</id>{redirect_tag}"
+        f"<revision><id>{pageid + 1000}</id><text xml:space=\"preserve\">{text}</text></revision></page>"
+    )
+
+
+def write_dump(path, articles=6):
+    pages = [
+        _page(1, "Wikipedia:Portada", "Portada del proyecto.", ns=4),
+        _page(2, "Madrit", "#REDIRECCIÓN [[Madrid]]", redirect="Madrid"),
+        _page(3, "Mercurio", "'''Mercurio''' puede referirse a:\n{{desambiguación}}"),
+    ]
+    for i in range(articles):
+        text = (
+            f"'''Artículo {i}''' es una [[ciudad|ciudad]] con una historia excelente.{{{{Cita|x}}}}\n"
+            f"== Historia ==\nLa historia de la ciudad es larga y la ciudad es bonita.&lt;ref&gt;Fuente&lt;/ref&gt;"
+        )
+        pages.append(_page(10 + i, f"Artículo {i}", text))
+    xml = f'<mediawiki xmlns="{NS}" xml:lang="es"><siteinfo><sitename>Wikipedia</sitename></siteinfo>'
+    xml += "".join(pages) + "</mediawiki>"
+    with bz2.open(path, "wt", encoding="utf-8") as f:
+        f.write(xml)
+    return path
+
+
+def test_iter_dump_pages_keeps_only_articles(tmp_path):
+    dump = write_dump(tmp_path / "eswiki-test-pages-articles.xml.bz2", articles=2)
+    with open_dump(str(dump)) as stream:
+        pages = [page for _, page in iter_dump_pages(stream) if page is not None]
+
+    assert [page.title for page in pages] == ["Artículo 0", "Artículo 1"]
+    assert pages[0].position == 4
+    assert pages[0].pageid == 10 and pages[0].revision_id == 1010
+    assert "<ref>" in pages[0].wikitext
+
+
+def test_dump_pages_are_analysed_like_the_batch_endpoint(tmp_path):
+    dump = write_dump(tmp_path / "eswiki-test-pages-articles.xml.bz2", articles=1)
+    with open_dump(str(dump)) as stream:
+        pages = [page for _, page in iter_dump_pages(stream) if page is not None]
+
+    record = analyze_dump_pages(pages, sentiment="lexicon_es")[0]
+    analysis = analyze_wikitext(pages[0].wikitext, sentiment="lexicon_es")
+    assert record["word_count"] == analysis.word_count
+    assert record["frequent_words"] == [list(item) for item in analysis.frequent_words]
+    assert record["sentiment_polarity"] == analysis.sentiment_polarity
+    assert record["summary"].startswith("Artículo 0 es una ciudad")
+
+
+def test_jsonl_ingestion_resumes_from_checkpoint(tmp_path):
+    dump = str(write_dump(tmp_path / "eswiki-test-pages-articles.xml.bz2"))
+    output = str(tmp_path / "articles.jsonl")
+    checkpoint_path = str(tmp_path / "articles.jsonl.checkpoint.json")
+
+    first = DumpIngestion(dump, JsonlSink(output), checkpoint_path, Checkpoint.load(checkpoint_path, dump),
+                          batch_size=2, limit=4).run()
+    assert first.written == 4 and not first.finished
+
+    # A batch written after the last checkpoint, e.g. by a run that was killed, is dropped on resume.
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"title": "a medias"')
+
+    checkpoint = Checkpoint.load(checkpoint_path, dump)
+    second = DumpIngestion(dump, JsonlSink(output, resume_size=checkpoint.output_size), checkpoint_path,
+                           checkpoint, batch_size=2).run()
+    assert second.written == 6 and second.finished
+
+    with open(output, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["title"] for r in records] == [f"Artículo {i}" for i in range(6)]
+    record = records[0]
+    assert record["url"] == "https://es.wikipedia.org/wiki/Art%C3%ADculo_0"
+    assert record["summary"] == "Artículo 0 es una ciudad con una historia excelente."
+    assert ["ciudad", 3] in record["frequent_words"]
+    assert record["sentiment_label"] in ("positivo", "neutral", "negativo")
+
+
+def test_database_sink_upserts_articles(tmp_path):
+    dump = str(write_dump(tmp_path / "eswiki-test-pages-articles.xml.bz2", articles=3))
+    engine = create_engine(f"sqlite:///{tmp_path / 'dump.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    checkpoint_path = str(tmp_path / "db.checkpoint.json")
+
+    for _ in range(2):
+        DumpIngestion(dump, DatabaseSink(7, session_factory=Session), checkpoint_path,
+                      Checkpoint(dump="eswiki-test-pages-articles.xml.bz2"), batch_size=2).run()
+
+    with Session() as db:
+        articles = db.query(Article).order_by(Article.wikipedia_title).all()
+    assert [a.wikipedia_title for a in articles] == ["Artículo 0", "Artículo 1", "Artículo 2"]
+    assert all(a.user_id == 7 and a.word_count > 0 for a in articles)
+    engine.dispose()
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services.analysis import analyze_content
+from app.services.sentiment import (
+    SentimentBackend,
+    SpanishLexiconSentiment,
+    TextBlobSentiment,
+    get_sentiment_backend,
+    sentiment_cache_key,
+)
+
+
+def test_spanish_lexicon_scores_inflected_forms_negation_and_intensifiers():
+    backend = get_sentiment_backend("lexicon_es")
+
+    positive = backend.score_batch(["Una ciudad hermosa con museos excelentes."])[0]
+    assert positive.assessed == 2
+    assert positive.polarity == pytest.approx((0.7 + 0.9) / 2)
+
+    negated = backend.score_batch(["La película no fue buena."])[0]
+    assert negated.polarity == pytest.approx(-0.3)
+
+    boosted = backend.score_batch(["Un resultado muy malo."])[0]
+    assert boosted.polarity == pytest.approx(-0.78)
+    assert backend.score_batch(["Nada que ver aquí."])[0].assessed == 0
+
+
+def test_analyze_content_with_lexicon_keeps_word_counts():
+    content = "El museo no es aburrido. Madrid es una ciudad muy alegre y hermosa.\n" * 50
+    textblob = analyze_content(content, chunk_size=200, sentiment="textblob")
+    lexicon = analyze_content(content, chunk_size=200, sentiment="lexicon_es")
+    whole = get_sentiment_backend("lexicon_es").score_batch([content])[0]
+
+    assert lexicon.word_count == textblob.word_count
+    assert lexicon.frequent_words == textblob.frequent_words
+    assert lexicon.sentiment_label == "positivo"
+    assert lexicon.sentiment_polarity == pytest.approx(whole.polarity, abs=1e-9)
+
+
+def test_backend_registry_and_cache_keys():
+    assert isinstance(get_sentiment_backend("textblob"), TextBlobSentiment)
+    assert get_sentiment_backend("lexicon_es") is get_sentiment_backend("lexicon_es")
+    assert isinstance(get_sentiment_backend("lexicon_es"), SpanishLexiconSentiment)
+    with pytest.raises(ValueError):
+        get_sentiment_backend("vader")
+
+    class Incomplete(SentimentBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+    assert sentiment_cache_key("madrid", "textblob") == "madrid"
+    assert sentiment_cache_key("madrid", "lexicon_es") == "madrid#sentiment=lexicon_es"
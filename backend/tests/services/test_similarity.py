@@ -0,0 +1,84 @@
+import numpy as np
+
+from app.services.similarity import SimilarityIndex, article_terms
+
+PAGES = {
+    1: ("Python (lenguaje de programación)", "Python es un lenguaje de programación interpretado.",
+        [("python", 40), ("lenguaje", 22), ("programación", 18), ("código", 9)]),
+    2: ("Java (lenguaje de programación)", "Java es un lenguaje de programación orientado a objetos.",
+        [("java", 35), ("lenguaje", 20), ("programación", 15), ("objetos", 12)]),
+    3: ("Python (género)", "Python es un género de serpientes de la familia Pythonidae.",
+        [("serpientes", 14), ("python", 11), ("especies", 9), ("presas", 6)]),
+    4: ("Boa constrictor", "La boa es una especie de serpiente constrictora de América.",
+        [("boa", 25), ("serpiente", 12), ("especies", 10), ("presas", 8)]),
+}
+
+
+def build(index, user_id=1, pages=PAGES):
+    for article_id, (title, summary, words) in pages.items():
+        index.add(article_id, user_id, article_terms(title, summary, words))
+
+
+def test_similar_ranks_by_shared_terms_and_filters_by_user():
+    index = SimilarityIndex(dimensions=256)
+    build(index)
+    index.add(9, 2, article_terms("Perl", "Perl es un lenguaje de programación.", [("lenguaje", 30)]))
+
+    ranked = index.similar(1, k=3, user_id=1)
+    assert [article_id for article_id, _ in ranked][0] == 2
+    assert all(-1.0 <= score <= 1.0 for _, score in ranked)
+    assert [article_id for article_id, _ in index.similar(4, k=1, user_id=1)] == [3]
+    assert 9 not in [article_id for article_id, _ in index.similar(1, k=10, user_id=1)]
+    assert 9 in [article_id for article_id, _ in index.similar(1, k=10)]
+
+    assert index.remove(2) and not index.remove(2)
+    assert 2 not in [article_id for article_id, _ in index.similar(1, k=10)]
+    # The freed row is reused instead of growing the matrix.
+    index.add(10, 1, article_terms("Ruby", "Ruby es un lenguaje de programación.", [("ruby", 20)]))
+    assert index.stats()["rows"] == 5
+    assert index.similar(404) == []
+
+
+def test_index_persists_memory_mapped_and_grows(tmp_path):
+    path = str(tmp_path / "similarity")
+    index = SimilarityIndex(dimensions=128, path=path)
+    index.open()
+    assert index.needs_rebuild
+    index.rebuild([])
+    many = {i: (f"Artículo {i}", f"Texto sobre el tema {i % 7}", [(f"tema{i % 7}", 5)]) for i in range(1, 1500)}
+    build(index, pages=many)
+    assert index.stats()["capacity"] == 2048
+    expected = index.similar(8, k=5)
+    index.close()
+
+    reopened = SimilarityIndex(dimensions=128, path=path)
+    reopened.open()
+    assert not reopened.needs_rebuild
+    assert isinstance(reopened._vectors, np.memmap)
+    assert len(reopened) == 1499
+    assert reopened.similar(8, k=5) == expected
+    # ``reopened`` was never closed, so the next process must rebuild instead of trusting the files.
+    stale = SimilarityIndex(dimensions=128, path=path)
+    stale.open()
+    assert stale.needs_rebuild
+
+
+def test_only_one_process_writes_the_index_files(tmp_path):
+    path = str(tmp_path / "similarity")
+    owner = SimilarityIndex(dimensions=64, path=path)
+    owner.open()
+    # Stands in for another uvicorn worker: the directory's lock is already held.
+    other = SimilarityIndex(dimensions=64, path=path)
+    other.open()
+    assert other.needs_rebuild and not other.stats()["persistent"]
+    other.rebuild([])
+    build(other)
+    assert not isinstance(other._vectors, np.memmap)
+    owner.flush()
+    assert (np.load(tmp_path / "similarity" / "ids.npy") >= 0).sum() == 0
+
+    owner.close()
+    successor = SimilarityIndex(dimensions=64, path=path)
+    successor.open()
+    assert successor.stats()["persistent"]
+    successor.close()
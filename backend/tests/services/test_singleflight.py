@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.cache import ArticleCache
+from app.services.mediawiki import AsyncMediaWikiClient
+from app.services.singleflight import SingleFlight
+from app.services.wikipedia_async import AsyncWikipediaService
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    def slow_lookup(title):
+        calls.append(title)
+        time.sleep(0.2)
+        return title.upper()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do(("article", "A"), slow_lookup, "a")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["a"]
+    assert results == ["A"] * 8
+    assert flights.stats() == {"executions": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flights = SingleFlight()
+
+    def failing():
+        raise ValueError("upstream")
+
+    with pytest.raises(ValueError):
+        flights.do("key", failing)
+    assert flights.do("key", lambda: "ok") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_article_requests_hit_upstream_once(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    fake_mediawiki.latency = 0.1
+    service = AsyncWikipediaService(client=AsyncMediaWikiClient("es"), cache=ArticleCache(maxsize=16, ttl=60))
+
+    articles = await asyncio.gather(*(service.get_article_details(t) for t in ["FastAPI", "fastAPI", "FastAPI "] * 4))
+
+    assert fake_mediawiki.request_count == 1
+    assert all(article is articles[0] for article in articles)
+    assert service.flights.stats()["coalesced"] == 11
+    await service.client.aclose()
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.cache import ArticleCache
+from app.services.mediawiki import AsyncMediaWikiClient, MediaWikiClient
+from app.services.upstream import (
+    AdaptiveLimit,
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamGovernor,
+    UpstreamUnavailable,
+)
+from app.services.wikipedia_api import WikipediaService
+from app.services.wikipedia_async import AsyncWikipediaService
+
+
+def make_governor(**overrides) -> UpstreamGovernor:
+    options = dict(
+        rate=0, burst=1, initial_limit=4, min_limit=1, max_limit=8, retries=2, queue_timeout=1.0,
+        retry_backoff=0.0, retry_max_wait=5.0, breaker_threshold=5, breaker_cooldown=30.0,
+    )
+    options.update(overrides)
+    return UpstreamGovernor(**options)
+
+
+def test_token_bucket_spaces_calls_after_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    bucket.refund()
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert TokenBucket(rate=0, burst=1).reserve() == 0
+
+
+def test_adaptive_limit_grows_on_success_halves_on_throttling_and_hands_off_slots():
+    limit = AdaptiveLimit(initial=4, minimum=1, maximum=8)
+    for _ in range(4):
+        assert limit.acquire(timeout=0)
+        limit.release(True)
+    assert limit.limit == pytest.approx(5, abs=0.1)
+
+    assert limit.acquire(timeout=0)
+    limit.release(False)
+    assert limit.limit == pytest.approx(2.5, abs=0.1)
+
+    single = AdaptiveLimit(initial=1, minimum=1, maximum=1)
+    assert single.acquire(timeout=0)
+    assert not single.acquire(timeout=0.01)
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(single.acquire(timeout=5)))
+    waiter.start()
+    while not single.queued:
+        time.sleep(0.001)
+    single.release(True)
+    waiter.join()
+    assert acquired == [True] and single.in_flight == 1
+
+
+def test_circuit_breaker_opens_after_failures_and_closes_after_a_good_probe():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    breaker.before_call()
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == "open"
+    with pytest.raises(UpstreamUnavailable) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.reason == "circuit_open"
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.opened == 1
+
+
+def open_breaker(governor: UpstreamGovernor) -> None:
+    governor.breaker.cooldown = 0
+    for _ in range(governor.breaker.threshold):
+        governor.breaker.record(False)
+
+
+def probe_succeeds(governor: UpstreamGovernor) -> bool:
+    return governor.call(lambda: True, timeout=1.0)
+
+
+def test_rate_limited_probe_lets_the_next_call_probe():
+    governor = make_governor(rate=1, burst=1, queue_timeout=0)
+    open_breaker(governor)
+    governor.bucket.reserve()
+
+    with pytest.raises(UpstreamUnavailable) as exc_info:
+        governor.call(lambda: True, timeout=0)
+    assert exc_info.value.reason == "rate_limited"
+
+    governor.bucket.refund()
+    assert probe_succeeds(governor)
+    assert governor.breaker.state == "closed"
+
+
+def test_concurrency_limited_probe_lets_the_next_call_probe():
+    governor = make_governor(initial_limit=1, max_limit=1, queue_timeout=0.01)
+    open_breaker(governor)
+    assert governor.limit.acquire(timeout=0)
+
+    with pytest.raises(UpstreamUnavailable) as exc_info:
+        governor.call(lambda: True, timeout=0)
+    assert exc_info.value.reason == "concurrency_limited"
+
+    governor.limit.release(None)
+    assert probe_succeeds(governor)
+    assert governor.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_the_next_call_probe():
+    governor = make_governor()
+    open_breaker(governor)
+
+    probe = asyncio.ensure_future(governor.call_async(lambda: asyncio.sleep(10), timeout=1.0))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert governor.breaker.state == "half_open" and governor.limit.in_flight == 0
+
+    async def send():
+        return True
+
+    assert await governor.call_async(send, timeout=1.0)
+    assert governor.breaker.state == "closed"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(status_code)
+        self.response = FakeResponse(status_code)
+
+
+def test_server_errors_count_as_failures_even_when_not_retried():
+    governor = make_governor(breaker_threshold=3)
+    calls = []
+
+    def fail(status_code: int):
+        calls.append(status_code)
+        raise HTTPStatusError(status_code)
+
+    for status_code in (501, 505, 404):
+        with pytest.raises(HTTPStatusError):
+            governor.call(lambda: fail(status_code), timeout=1.0)
+    assert governor.breaker.failures == 0 and governor.limit.limit > 4
+
+    for _ in range(3):
+        with pytest.raises(HTTPStatusError):
+            governor.call(lambda: fail(500), timeout=1.0)
+    assert calls == [501, 505, 404, 500, 500, 500]
+    assert governor.breaker.state == "open"
+    assert governor.limit.limit < 4
+    assert governor.stats()["failures"] == 3
+
+
+def test_client_retries_throttled_requests_honouring_retry_after(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    governor = make_governor()
+    client = MediaWikiClient("es", governor=governor)
+    fake_mediawiki.failures = [429, 503]
+    fake_mediawiki.retry_after = "0"
+
+    assert client.search_titles("python", 5)
+    assert fake_mediawiki.request_count == 3
+    stats = governor.stats()
+    assert stats["retries"] == 2 and stats["throttled"] == 1 and stats["failures"] == 1
+    assert stats["state"] == "closed" and stats["in_flight"] == 0
+
+    fake_mediawiki.failures = [429]
+    fake_mediawiki.retry_after = "120"
+    with pytest.raises(UpstreamUnavailable) as exc_info:
+        client.search_titles("python", 5)
+    assert exc_info.value.retry_after == 120
+
+
+def test_service_serves_stale_article_or_fails_fast_with_503(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    governor = make_governor(breaker_threshold=2)
+    service = WikipediaService(client=MediaWikiClient("es", governor=governor), cache=ArticleCache(maxsize=10, ttl=0))
+    article = service.get_article_details("FastAPI")
+
+    fake_mediawiki.failures = [503] * 10
+    fake_mediawiki.retry_after = "30"
+    assert service.get_article_details("FastAPI") == article
+    assert service.cache.stats()["stale_served"] == 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_article_details("Python")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "30"
+    with pytest.raises(HTTPException) as exc_info:
+        service.search_articles("python")
+    assert exc_info.value.status_code == 503
+
+    # The breaker is open now: no more requests reach Wikipedia.
+    sent = fake_mediawiki.request_count
+    with pytest.raises(HTTPException):
+        service.get_article_details("Python")
+    assert fake_mediawiki.request_count == sent
+    assert governor.stats()["state"] == "open" and governor.stats()["rejected"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_async_service_shares_the_governance(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    governor = make_governor()
+    service = AsyncWikipediaService(
+        client=AsyncMediaWikiClient("es", governor=governor), cache=ArticleCache(maxsize=10, ttl=60),
+    )
+    fake_mediawiki.failures = [429]
+    fake_mediawiki.retry_after = "0"
+
+    article = await service.get_article_details("FastAPI")
+
+    assert article.title == "FastAPI"
+    assert fake_mediawiki.request_count == 2
+    assert governor.stats()["retries"] == 1 and governor.stats()["in_flight"] == 0
+
+    fake_mediawiki.failures = [429] * 5
+    fake_mediawiki.retry_after = "60"
+    with pytest.raises(HTTPException) as exc_info:
+        await service.search_articles("python")
+    assert exc_info.value.status_code == 503 and exc_info.value.headers["Retry-After"] == "60"
+    await service.client.aclose()
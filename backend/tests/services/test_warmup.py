@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import ArticleCache
+from app.services.mediawiki import AsyncMediaWikiClient, close_async_mediawiki_clients
+from app.services.warmup import WarmupWorker, WarmupWorkers, hot_titles
+from app.services.wikipedia_async import AsyncWikipediaService
+
+
+def make_worker(fake_mediawiki, monkeypatch, saved):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    cache = ArticleCache(maxsize=16, ttl=60)
+    service = AsyncWikipediaService(client=AsyncMediaWikiClient("es"), cache=cache)
+
+    async def titles_source(limit, lang):
+        return saved
+
+    return WarmupWorker(service=service, cache=cache, titles_source=titles_source,
+                        hot=["Python (lenguaje de programación)"], rate=0, concurrency=2)
+
+
+@pytest.mark.asyncio
+async def test_warmup_refreshes_only_changed_revisions(fake_mediawiki, monkeypatch):
+    worker = make_worker(fake_mediawiki, monkeypatch, saved=["FastAPI", "NoExiste", "FastAPI"])
+
+    first = await worker.run_once()
+    assert first == {"titles": 3, "refreshed": 2, "unchanged": 0, "not_found": 1, "failed": 0}
+    assert worker.cache.get("es", "FastAPI").revision_id == 5002
+
+    requests_before = fake_mediawiki.request_count
+    second = await worker.run_once()
+    assert second["unchanged"] == 2 and second["refreshed"] == 0
+    # Only the batched revision lookup went upstream.
+    assert fake_mediawiki.request_count == requests_before + 1
+
+    fake_mediawiki.pages["FastAPI"].lastrevid = 6002
+    third = await worker.run_once()
+    assert third["refreshed"] == 1 and third["unchanged"] == 1
+    assert worker.cache.get("es", "FastAPI").revision_id == 6002
+
+    assert worker.stats()["cycles"] == 3
+    assert worker.stats()["refreshed"] == 3
+    await worker.service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_one_process_runs_a_warmup_worker_per_language(monkeypatch, tmp_path):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_LANGUAGES", ["es", "en"])
+    monkeypatch.setattr("app.core.config.settings.WARMUP_HOT_TITLES", "Python, en:Guido van Rossum,Star Wars: Episodio I")
+    assert hot_titles("es") == ["Python", "Star Wars: Episodio I"]
+    assert hot_titles("en") == ["Guido van Rossum"]
+
+    lock_path = str(tmp_path / "warmup.lock")
+    workers, other_process = WarmupWorkers(lock_path), WarmupWorkers(lock_path)
+    monkeypatch.setattr(WarmupWorker, "run_forever", lambda self: asyncio.sleep(3600))
+    workers.start()
+    other_process.start()
+    try:
+        assert [worker.service.lang for worker in workers.all()] == ["es", "en"]
+        assert all(worker.stats()["running"] for worker in workers.all())
+        assert not any(worker.stats()["running"] for worker in other_process.all())
+    finally:
+        await workers.stop()
+        await close_async_mediawiki_clients()
+    assert other_process.acquire()
+    other_process.release()
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.cache import ArticleCache
+from app.services.mediawiki import AsyncMediaWikiClient
+from app.services.wikipedia_async import AsyncWikipediaService
+
+
+def make_service(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    return AsyncWikipediaService(client=AsyncMediaWikiClient("es"), cache=ArticleCache(maxsize=16, ttl=60))
+
+
+@pytest.mark.asyncio
+async def test_search_articles_in_a_single_request(fake_mediawiki, monkeypatch):
+    service = make_service(fake_mediawiki, monkeypatch)
+
+    articles = await service.search_articles("python", limit=10)
+
+    assert fake_mediawiki.request_count == 1
+    titles = [article.title for article in articles]
+    assert "Python (lenguaje de programación)" in titles
+    python = articles[titles.index("Python (lenguaje de programación)")]
+    assert python.pageid == 1001
+    assert str(python.url).startswith("https://es.wikipedia.org/wiki/")
+    assert articles[titles.index("Pitón")].pageid is None
+    await service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_article_details_follows_redirects(fake_mediawiki, monkeypatch):
+    service = make_service(fake_mediawiki, monkeypatch)
+
+    article = await service.get_article_details("Python")
+
+    assert article.title == "Python (lenguaje de programación)"
+    assert article.summary.startswith("Python es un lenguaje")
+    assert "Historia" not in article.summary
+    assert article.references == ["https://www.python.org/", "https://docs.python.org/es/3/"]
+    assert article.word_count > 0
+    assert dict(article.frequent_words)["python"] >= 3
+    assert article.sentiment_label in ["positivo", "negativo", "neutral"]
+    await service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_article_details_follows_extlinks_continuation(fake_mediawiki, monkeypatch):
+    service = make_service(fake_mediawiki, monkeypatch)
+    links = [f"https://example.org/referencia/{i}" for i in range(501)]
+    fake_mediawiki.pages["FastAPI"].extlinks = links
+
+    article = await service.get_article_details("FastAPI")
+
+    assert article.references == links
+    assert fake_mediawiki.request_count == 2
+    await service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_article_details_missing_and_disambiguation(fake_mediawiki, monkeypatch):
+    service = make_service(fake_mediawiki, monkeypatch)
+
+    assert await service.get_article_details("Zzzz inexistente") is None
+
+    with pytest.raises(HTTPException) as exc_info:
+        await service.get_article_details("Pitón")
+    assert exc_info.value.status_code == 400
+    assert "Pythonidae" in exc_info.value.detail
+    await service.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_each_sentiment_backend_has_its_own_cache_entry(fake_mediawiki, monkeypatch):
+    service = make_service(fake_mediawiki, monkeypatch)
+
+    textblob = await service.get_article_details("Python", sentiment="textblob")
+    lexicon = await service.get_article_details("Python", sentiment="lexicon_es")
+    requests = fake_mediawiki.request_count
+    assert await service.get_article_details("Python", sentiment="lexicon_es") == lexicon
+
+    assert fake_mediawiki.request_count == requests
+    assert lexicon.word_count == textblob.word_count
+    assert service.cache.get("es", "Python") == textblob
+    assert service.cache.get("es", "Python#sentiment=lexicon_es") == lexicon
+    await service.client.aclose()
+
+
+def test_aclose_closes_the_pool_of_every_loop(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    client = AsyncMediaWikiClient("es")
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+
+    async def main():
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.resolve_titles(["Python"]), other_loop))
+        await client.resolve_titles(["Python"])
+        pools = list(client._http.values())
+        assert len(pools) == 2
+        await client.aclose()
+        return pools
+
+    try:
+        pools = asyncio.run(main())
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+    assert all(pool.is_closed for pool in pools)
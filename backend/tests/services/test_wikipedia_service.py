@@ -0,0 +1,136 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.cache import ArticleCache
+from app.services.mediawiki import ARTICLE_PROPS, MediaWikiClient, article_props, build_page_params, parse_resolve_response
+from app.services.wikipedia_api import WikipediaService
+
+RESOLVE_RESPONSE = {
+    "query": {
+        "normalized": [{"from": "python", "to": "Python"}],
+        "redirects": [{"from": "Python", "to": "Python (lenguaje de programación)"}],
+        "pages": [
+            {
+                "pageid": 1,
+                "title": "Python (lenguaje de programación)",
+                "fullurl": "https://es.wikipedia.org/wiki/Python_(lenguaje_de_programaci%C3%B3n)",
+            },
+            {"pageid": 2, "title": "Pitón", "fullurl": "https://es.wikipedia.org/wiki/Pit%C3%B3n",
+             "pageprops": {"disambiguation": ""}},
+            {"title": "NoExiste", "missing": True},
+        ],
+    }
+}
+
+
+def test_parse_resolve_response_follows_normalization_and_redirects():
+    resolved = parse_resolve_response(["python", "Pitón", "NoExiste"], RESOLVE_RESPONSE)
+
+    assert list(resolved) == ["python"]
+    assert resolved["python"].title == "Python (lenguaje de programación)"
+    assert resolved["python"].pageid == 1
+
+
+def test_search_articles_resolves_all_titles_in_one_query(monkeypatch):
+    service = WikipediaService()
+    calls = []
+
+    def fake_query(params, timeout=None):
+        calls.append(params["titles"])
+        return RESOLVE_RESPONSE
+
+    monkeypatch.setattr(service.client, "search_titles",
+                        lambda query, limit, timeout=None: ["python", "Pitón", "NoExiste"])
+    monkeypatch.setattr(service.client, "query", fake_query)
+
+    articles = service.search_articles("python", limit=3)
+
+    assert calls == ["python|Pitón|NoExiste"]
+    assert [a.title for a in articles] == ["Python (lenguaje de programación)", "Pitón", "NoExiste"]
+    assert articles[0].pageid == 1
+    assert articles[1].pageid is None
+    assert articles[2].url is None
+
+
+def test_search_articles_returns_partial_results_after_deadline(monkeypatch):
+    service = WikipediaService()
+
+    def slow_query(params, timeout=None):
+        time.sleep(0.5)
+        return RESOLVE_RESPONSE
+
+    monkeypatch.setattr(settings, "WIKIPEDIA_SEARCH_DEADLINE", 0.1)
+    monkeypatch.setattr(service.client, "search_titles", lambda query, limit, timeout=None: ["python"])
+    monkeypatch.setattr(service.client, "query", slow_query)
+
+    started = time.monotonic()
+    articles = service.search_articles("python", limit=1)
+
+    assert time.monotonic() - started < 0.4
+    assert [a.title for a in articles] == ["python"]
+    assert articles[0].pageid is None
+
+
+def test_get_article_details_against_fake_mediawiki(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    service = WikipediaService(client=MediaWikiClient("es"), cache=ArticleCache(maxsize=10, ttl=60))
+
+    article = service.get_article_details("FastAPI")
+
+    assert fake_mediawiki.request_count == 1
+    assert article.title == "FastAPI"
+    assert article.summary.startswith("FastAPI es un framework web moderno")
+    assert "== Características ==" not in article.summary
+    assert article.references == ["https://fastapi.tiangolo.com/"]
+    assert article.revision_id == 5002
+    assert article.word_count > 0
+
+
+def test_get_article_details_follows_extlinks_continuation(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    links = [f"https://example.org/referencia/{i}" for i in range(1203)]
+    fake_mediawiki.pages["FastAPI"].extlinks = links
+    service = WikipediaService(client=MediaWikiClient("es"), cache=ArticleCache(maxsize=10, ttl=60))
+
+    article = service.get_article_details("FastAPI")
+
+    assert article.references == links
+    assert fake_mediawiki.request_count == 3
+    assert article.word_count > 0
+
+
+def test_article_query_asks_only_for_the_props_of_the_requested_fields():
+    assert article_props(None) == ARTICLE_PROPS
+    assert article_props({"title", "summary"}) == {"intro"}
+    assert article_props({"summary", "word_count"}) == {"extract"}
+    assert article_props({"title", "revision_id"}) == frozenset()
+
+    full = build_page_params("Python")
+    assert full["prop"] == "extracts|info|pageprops|extlinks"
+    assert full["redirects"] == 1 and "exintro" not in full
+    intro = build_page_params("Python", {"intro"})
+    assert intro["prop"] == "extracts|info|pageprops" and intro["exintro"] == 1
+    assert build_page_params("Python", set())["prop"] == "info|pageprops"
+
+
+def test_partial_article_fetch_follows_redirects_and_is_not_cached(fake_mediawiki, monkeypatch):
+    monkeypatch.setattr(settings, "WIKIPEDIA_API_URL_TEMPLATE", fake_mediawiki.api_url)
+    service = WikipediaService(client=MediaWikiClient("es"), cache=ArticleCache(maxsize=10, ttl=60))
+
+    article = service.get_article_details("Python", fields={"title", "summary", "revision_id"})
+
+    assert fake_mediawiki.request_count == 1
+    assert fake_mediawiki.requests[0]["prop"] == "extracts|info|pageprops"
+    assert article.title == "Python (lenguaje de programación)"
+    assert article.summary.startswith("Python es un lenguaje")
+    assert article.revision_id is not None
+    assert article.content == "" and article.references == []
+    assert service.cache.get("es", "Python") is None
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_article_details("Pitón")
+    assert exc_info.value.status_code == 400
+    assert "Pythonidae" in exc_info.value.detail
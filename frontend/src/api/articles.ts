@@ -16,13 +16,22 @@ export const saveArticle = async (article: ArticleCreate): Promise<ArticleInDB>
   return response.json();
 };
 
-export const getSavedArticles = async (skip = 0, limit = 10): Promise<ArticleInDB[]> => {
-  const response = await fetch(`${API_BASE_URL}/articles/?skip=${skip}&limit=${limit}`);
+export interface SavedArticlesPage {
+  articles: ArticleInDB[];
+  nextCursor: string | null;
+}
+
+export const getSavedArticles = async (cursor: string | null = null, limit = 10): Promise<SavedArticlesPage> => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(`${API_BASE_URL}/articles/?${params}`);
   if (!response.ok) {
     throw new Error(`Error al recuperar los artículos guardados: ${response.statusText}`);
   }
 
-  return await response.json();
+  return { articles: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
 };
 
 export const updateArticleNotes = async (articleId: number, notes: string | null): Promise<ArticleInDB> => {
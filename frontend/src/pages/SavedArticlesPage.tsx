@@ -9,21 +9,22 @@ const SavedArticlesPage: React.FC = () => {
   const [savedArticles, setSavedArticles] = useState<ArticleInDB[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [currentPage, setCurrentPage] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [hasMore, setHasMore] = useState(true);
 
-  const fetchSavedArticles = async (page: number) => {
+  const fetchSavedArticles = async (cursor: string | null) => {
     setIsLoading(true);
     setError(null);
     try {
-      const newArticles = await getSavedArticles(page * PAGE_SIZE, PAGE_SIZE);
+      const page = await getSavedArticles(cursor, PAGE_SIZE);
       setSavedArticles((prevArticles) => {
-        const uniqueNewArticles = newArticles.filter(
+        const uniqueNewArticles = page.articles.filter(
           (newArt) => !prevArticles.some((prevArt) => prevArt.id === newArt.id)
         );
         return [...prevArticles, ...uniqueNewArticles];
       });
-      setHasMore(newArticles.length === PAGE_SIZE);
+      setNextCursor(page.nextCursor);
+      setHasMore(page.nextCursor !== null);
     } catch (err) {
       setError('No se pudieron recuperar los artículos guardados.');
       console.error(err);
@@ -33,13 +34,11 @@ const SavedArticlesPage: React.FC = () => {
   };
 
   useEffect(() => {
-    fetchSavedArticles(currentPage);
-  }, [currentPage]);
+    fetchSavedArticles(null);
+  }, []);
 
   const handleArticleDeleted = (id: number) => {
-    setCurrentPage(0);
     setSavedArticles((prevArticles) => prevArticles.filter((article) => article.id !== id));
-    setCurrentPage(0);
   };
 
   const handleArticleUpdated = (updatedArticle: ArticleInDB) => {
@@ -51,7 +50,7 @@ const SavedArticlesPage: React.FC = () => {
   };
 
   const handleLoadMore = () => {
-    setCurrentPage((prevPage) => prevPage + 1);
+    fetchSavedArticles(nextCursor);
   };
 
   return (